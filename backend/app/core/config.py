@@ -1,7 +1,9 @@
 """Application configuration using Pydantic Settings."""
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
+import os
 from pathlib import Path
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -27,6 +29,40 @@ class Settings(BaseSettings):
     temp_files_dir: Path = Path(__file__).parent.parent.parent / "temp_files"
     max_file_size_mb: int = 50
     allowed_extensions: set[str] = {".xlsx", ".xls"}
+    upload_chunk_size_kb: int = 1024  # chunk size for streaming uploads to disk
+    stream_batch_rows: int = 50000  # rows per batch when streaming a file through an operation
+    # Files whose estimated in-memory size exceeds this are deduplicated in
+    # hash partitions spilled to disk, each of roughly this size
+    dedupe_memory_budget_mb: int = 512
+    # Files whose estimated in-memory size exceeds this are sorted in runs
+    # of roughly this size, spilled to disk and merged
+    sort_memory_budget_mb: int = 512
+    
+    # Excel rendering of derived files: "eager" (on save), "background"
+    # (idle-time worker, or on first download) or "lazy" (on first download)
+    excel_render_mode: Literal["eager", "background", "lazy"] = "background"
+    background_render_max_load: float = 0.75  # 1-minute load average per core
+    background_render_poll_seconds: float = 1.0
+    # zlib level of rendered XLSX: fast for downloads, smaller when rendered while idle
+    xlsx_compression_level: int = 1
+    background_render_compression_level: int = 6
+    
+    # Executor (blocking work is kept off the event loop)
+    thread_pool_workers: int = min(32, (os.cpu_count() or 1) + 4)
+    process_pool_workers: int = os.cpu_count() or 1
+    executor_queue_limit: int = 32  # pending tasks per pool beyond its workers
+    executor_saturated_status_code: int = 503  # or 429
+    executor_retry_after_seconds: int = 5
+    # Parse workbooks and render XLSX in the process pool (GIL-bound work)
+    process_pool_io: bool = True
+    # Per-operation pool override, e.g. {"sort": "process"}
+    operation_pools: dict[str, Literal["thread", "process"]] = {}
+    
+    # Result memoization (0 disables)
+    result_cache_max_entries: int = 1024
+    
+    # Async jobs
+    job_retention_hours: int = 24
     
     # File Cleanup
     file_retention_hours: int = 24
@@ -1,7 +1,8 @@
 """FastAPI dependency injection utilities."""
 from typing import Annotated
-from fastapi import Depends
+from fastapi import Depends, Header, Query
 
+from app.shared.columnar import ARROW_STREAM_MEDIA_TYPE
 from app.shared.file_service import FileService
 
 
@@ -12,3 +13,18 @@ def get_file_service() -> FileService:
 
 # Type alias for dependency injection
 FileServiceDep = Annotated[FileService, Depends(get_file_service)]
+
+# ?async=true runs an operation as a background job (see app.core.jobs)
+AsyncJobDep = Annotated[
+    bool,
+    Query(alias="async", description="Run as a background job and return a job_id")
+]
+
+
+def accepts_arrow(accept: str | None = Header(default=None)) -> bool:
+    """Whether the client asked for an Arrow IPC stream instead of the default format."""
+    return accept is not None and ARROW_STREAM_MEDIA_TYPE in accept
+
+
+# Accept: application/vnd.apache.arrow.stream selects Arrow IPC responses
+ArrowAcceptDep = Annotated[bool, Depends(accepts_arrow)]
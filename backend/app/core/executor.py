@@ -0,0 +1,341 @@
+"""Executor layer that runs blocking pandas/openpyxl work off the asyncio event loop."""
+import asyncio
+import contextvars
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from enum import Enum
+from typing import Any, Awaitable, Callable, TypeVar
+
+from fastapi import HTTPException
+
+from app.core import progress
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class PoolKind(str, Enum):
+    """Kind of worker pool an operation runs on."""
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+# Default pool per operation name; settings.operation_pools overrides these.
+# Heavy multi-frame operations (merge, deduplicate_merge, split) run on
+# threads and fan their parses, partitions and outputs out to the process
+# pool themselves (see map_in_process), so they scale across cores.
+DEFAULT_OPERATION_POOLS: dict[str, PoolKind] = {}
+
+# Set in worker processes by the pool initializer
+_in_worker_process = False
+
+# Calls a worker process asked the parent to run (see call_in_parent)
+_parent_calls: list[tuple[Callable[..., Any], tuple]] = []
+
+
+def _init_worker_process(progress_queue):
+    global _in_worker_process
+    _in_worker_process = True
+    progress.init_worker(progress_queue)
+
+
+def in_worker_process() -> bool:
+    """Whether the current code runs inside a process pool worker."""
+    return _in_worker_process
+
+
+def call_in_parent(func: Callable[..., Any], *args):
+    """
+    Run func(*args) in the API process.
+
+    Inside a worker process the call is recorded and replayed by the parent
+    once the task returns (func must be a picklable module-level function);
+    elsewhere it runs immediately. Used for side effects that only make sense
+    in the API process, such as queueing background renders.
+    """
+    if _in_worker_process:
+        _parent_calls.append((func, args))
+    else:
+        func(*args)
+
+
+class _RemoteHTTPError:
+    """Picklable stand-in for an HTTPException raised inside a worker process."""
+
+    def __init__(self, status_code: int, detail: Any, headers: dict[str, str] | None):
+        self.status_code = status_code
+        self.detail = detail
+        self.headers = headers
+
+
+class _WorkerOutcome:
+    """Result of a task run in a worker process, plus calls deferred to the parent."""
+
+    def __init__(self, value: Any, parent_calls: list[tuple[Callable[..., Any], tuple]]):
+        self.value = value
+        self.parent_calls = parent_calls
+
+
+def _call_in_worker(
+    func: Callable[..., T],
+    args: tuple,
+    kwargs: dict,
+    job_id: str | None = None
+) -> _WorkerOutcome:
+    """Run func in a worker process, converting HTTPException into a picklable value."""
+    _parent_calls.clear()
+    try:
+        value = progress.run_for_job(job_id, func, *args, **kwargs)
+    except HTTPException as e:
+        value = _RemoteHTTPError(e.status_code, e.detail, e.headers)
+    parent_calls = list(_parent_calls)
+    _parent_calls.clear()
+    return _WorkerOutcome(value, parent_calls)
+
+
+def _unwrap_outcome(outcome: _WorkerOutcome) -> Any:
+    """Replay deferred parent calls and return (or re-raise) the task result."""
+    for func, args in outcome.parent_calls:
+        func(*args)
+    if isinstance(outcome.value, _RemoteHTTPError):
+        raise HTTPException(
+            status_code=outcome.value.status_code,
+            detail=outcome.value.detail,
+            headers=outcome.value.headers
+        )
+    return outcome.value
+
+
+class OperationExecutor:
+    """
+    Thread and process pools shared by all feature routes.
+
+    Every pool admits at most its worker count plus settings.executor_queue_limit
+    pending tasks; beyond that, requests are rejected with
+    settings.executor_saturated_status_code (503 by default) and a Retry-After
+    header instead of piling up behind the event loop.
+    """
+
+    def __init__(self):
+        self._pools: dict[PoolKind, Executor] = {}
+        self._pending: dict[PoolKind, int] = {kind: 0 for kind in PoolKind}
+        self._lock = threading.Lock()
+
+    def _workers(self, kind: PoolKind) -> int:
+        if kind == PoolKind.THREAD:
+            return settings.thread_pool_workers
+        return settings.process_pool_workers
+
+    def _get_pool(self, kind: PoolKind) -> Executor:
+        with self._lock:
+            pool = self._pools.get(kind)
+            if pool is None:
+                if kind == PoolKind.THREAD:
+                    pool = ThreadPoolExecutor(
+                        max_workers=self._workers(kind),
+                        thread_name_prefix="operation"
+                    )
+                else:
+                    # spawn avoids forking a process that is running threads
+                    mp_context = multiprocessing.get_context("spawn")
+                    pool = ProcessPoolExecutor(
+                        max_workers=self._workers(kind),
+                        mp_context=mp_context,
+                        initializer=_init_worker_process,
+                        initargs=(progress.get_worker_queue(mp_context),)
+                    )
+                self._pools[kind] = pool
+            return pool
+
+    def _discard_broken_pool(self, pool: Executor) -> HTTPException:
+        """
+        Drop a process pool whose worker died (crash, OOM kill), with its progress queue.
+
+        A broken ProcessPoolExecutor fails every later task, so the next
+        call starts a fresh pool instead.
+
+        Returns:
+            HTTPException (503 with Retry-After) to raise for the failed call
+        """
+        with self._lock:
+            # Only once per pool, and under the lock so no new pool picks up the old queue
+            if self._pools.get(PoolKind.PROCESS) is pool:
+                del self._pools[PoolKind.PROCESS]
+                pool.shutdown(wait=False, cancel_futures=True)
+                progress.stop_listener()
+        return HTTPException(
+            status_code=503,
+            detail="A worker process stopped unexpectedly, retry later",
+            headers={"Retry-After": str(settings.executor_retry_after_seconds)}
+        )
+
+    def pool_for(self, operation: str) -> PoolKind:
+        """Resolve which pool an operation runs on."""
+        configured = settings.operation_pools.get(operation)
+        if configured:
+            return PoolKind(configured)
+        return DEFAULT_OPERATION_POOLS.get(operation, PoolKind.THREAD)
+
+    def _acquire(self, kind: PoolKind):
+        limit = self._workers(kind) + settings.executor_queue_limit
+        with self._lock:
+            if self._pending[kind] >= limit:
+                raise HTTPException(
+                    status_code=settings.executor_saturated_status_code,
+                    detail=f"Server is busy ({self._pending[kind]} {kind.value} tasks pending), retry later",
+                    headers={"Retry-After": str(settings.executor_retry_after_seconds)}
+                )
+            self._pending[kind] += 1
+
+    def _release(self, kind: PoolKind):
+        with self._lock:
+            self._pending[kind] -= 1
+
+    def run_in_process(self, func: Callable[..., T], *args) -> T:
+        """
+        Run a blocking callable on the process pool and wait for it.
+
+        For sub-steps of an already admitted operation (e.g. FileService
+        parsing a workbook), so no queue limit is applied. Called from a
+        worker process, func simply runs inline.
+
+        Raises:
+            HTTPException: Re-raised from func, or 503 if the worker died
+        """
+        if _in_worker_process:
+            return func(*args)
+
+        with self._lock:
+            self._pending[PoolKind.PROCESS] += 1
+        try:
+            pool = self._get_pool(PoolKind.PROCESS)
+            try:
+                future = pool.submit(_call_in_worker, func, args, {}, progress.current_job_id())
+                outcome = future.result()
+            except BrokenProcessPool:
+                raise self._discard_broken_pool(pool)
+        finally:
+            self._release(PoolKind.PROCESS)
+        return _unwrap_outcome(outcome)
+
+    def map_in_process(self, func: Callable[..., T], args_list: list[tuple]) -> list[T]:
+        """
+        Run func once per argument tuple on the process pool, in parallel.
+        
+        Like run_in_process (no queue limit), but all calls are submitted
+        at once so they spread across the pool's workers. Called from a
+        worker process, the calls run inline one after another.
+        
+        Returns:
+            Results in the order of args_list
+            
+        Raises:
+            HTTPException: Re-raised from the first failing call, or 503 if
+                a worker died
+        """
+        if _in_worker_process:
+            return [func(*args) for args in args_list]
+        
+        with self._lock:
+            self._pending[PoolKind.PROCESS] += len(args_list)
+        try:
+            pool = self._get_pool(PoolKind.PROCESS)
+            try:
+                futures = [
+                    pool.submit(_call_in_worker, func, args, {}, progress.current_job_id())
+                    for args in args_list
+                ]
+                outcomes = [future.result() for future in futures]
+            except BrokenProcessPool:
+                raise self._discard_broken_pool(pool)
+        finally:
+            with self._lock:
+                self._pending[PoolKind.PROCESS] -= len(args_list)
+        return [_unwrap_outcome(outcome) for outcome in outcomes]
+    
+    def submit(self, operation: str, func: Callable[..., T], *args, **kwargs) -> Awaitable[T]:
+        """
+        Queue a blocking callable on the pool selected for an operation.
+
+        Admission (and the saturation error) happens immediately; the
+        returned awaitable resolves to the callable's result.
+
+        Callables sent to the process pool, and their arguments, must be
+        picklable (e.g. a service's bound method and its Pydantic request).
+        DataFrames should not cross the process boundary: workers exchange
+        data through FileService's memory-mapped Arrow sidecars instead.
+
+        Args:
+            operation: Operation name used for pool selection
+            func: Blocking callable to run
+            *args, **kwargs: Arguments for func
+
+        Returns:
+            Awaitable of the callable's return value
+
+        Raises:
+            HTTPException: If the pool is saturated, or 503 if a worker process died
+        """
+        kind = self.pool_for(operation)
+        self._acquire(kind)
+        try:
+            pool = self._get_pool(kind)
+            if kind == PoolKind.THREAD:
+                ctx = contextvars.copy_context()
+                future = pool.submit(ctx.run, func, *args, **kwargs)
+            else:
+                future = pool.submit(_call_in_worker, func, args, kwargs, progress.current_job_id())
+        except BrokenProcessPool:
+            self._release(kind)
+            raise self._discard_broken_pool(pool)
+        except BaseException:
+            self._release(kind)
+            raise
+        future.add_done_callback(lambda _: self._release(kind))
+        return self._result(kind, pool, asyncio.wrap_future(future))
+
+    async def _result(self, kind: PoolKind, pool: Executor, future: Awaitable[Any]) -> Any:
+        try:
+            result = await future
+        except BrokenProcessPool:
+            raise self._discard_broken_pool(pool)
+        if kind == PoolKind.PROCESS:
+            return _unwrap_outcome(result)
+        return result
+
+    async def run(self, operation: str, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Run a blocking callable on the pool selected for an operation.
+
+        See submit for the pickling rules of process pool operations.
+
+        Raises:
+            HTTPException: If the pool is saturated or a worker process
+                died (503), or re-raised from func
+        """
+        return await self.submit(operation, func, *args, **kwargs)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Current pending task counts and capacity per pool."""
+        with self._lock:
+            return {
+                kind.value: {
+                    "pending": self._pending[kind],
+                    "workers": self._workers(kind),
+                    "capacity": self._workers(kind) + settings.executor_queue_limit,
+                }
+                for kind in PoolKind
+            }
+
+    def shutdown(self):
+        """Shut down all pools, waiting for running tasks."""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+        progress.stop_listener()
+
+
+executor = OperationExecutor()
@@ -0,0 +1,208 @@
+"""Async job subsystem for long-running operations."""
+import asyncio
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Callable
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core import progress, result_cache
+from app.core.config import settings
+from app.core.executor import executor
+from app.shared.models import JobSubmittedResponse
+
+
+class JobStatus(str, Enum):
+    """Lifecycle state of a job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class Job:
+    """State of one asynchronously executed operation."""
+
+    def __init__(self, operation: str):
+        self.job_id = str(uuid.uuid4())
+        self.operation = operation
+        self.status = JobStatus.QUEUED
+        self.stage: str | None = None
+        self.rows_processed = 0
+        self.rows_total: int | None = None
+        self.created_at = datetime.now()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.result: dict[str, Any] | None = None
+        self.error: str | None = None
+        # Bumped on every change so streaming clients can detect updates
+        self.version = 0
+
+    @property
+    def percent(self) -> float | None:
+        """Percent of the current stage, when its size is known."""
+        if self.status == JobStatus.COMPLETED:
+            return 100.0
+        if not self.rows_total:
+            return None
+        return round(min(100.0, 100.0 * self.rows_processed / self.rows_total), 1)
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return round((self.finished_at or time.monotonic()) - self.started_at, 3)
+
+    @property
+    def file_ids(self) -> list[str]:
+        """File ids produced by the operation."""
+        if not self.result:
+            return []
+        if "file_ids" in self.result:
+            return list(self.result["file_ids"])
+        if "file_id" in self.result:
+            return [self.result["file_id"]]
+        return []
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+
+class JobManager:
+    """In-memory registry of jobs, fed by progress reports from the executor."""
+
+    def __init__(self):
+        self._jobs: dict[str, Job] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        progress.set_sink(self.update_progress)
+
+    def get(self, job_id: str) -> Job:
+        """
+        Get a job by id.
+
+        Raises:
+            HTTPException: If the job does not exist (or has expired)
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
+        return job
+
+    def update_progress(self, job_id: str, stage: str, rows_processed: int, rows_total: int | None):
+        """Record a progress report for a job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.is_finished:
+                return
+            job.stage = stage
+            job.rows_processed = rows_processed
+            job.rows_total = rows_total
+            job.version += 1
+
+    def submit(self, operation: str, func: Callable[..., Any], *args, cached_result: Any = None) -> Job:
+        """
+        Start an operation as a background job on the executor.
+
+        With cached_result the job completes immediately with that result
+        instead of running func.
+
+        Raises:
+            HTTPException: If the executor is saturated
+        """
+        self._prune()
+        job = Job(operation)
+        with self._lock:
+            self._jobs[job.job_id] = job
+
+        token = progress.set_current_job_id(job.job_id)
+        try:
+            if cached_result is not None:
+                awaitable = _resolved(cached_result)
+            else:
+                awaitable = executor.submit(operation, func, *args)
+        except HTTPException:
+            with self._lock:
+                self._jobs.pop(job.job_id, None)
+            raise
+        finally:
+            progress.reset_current_job_id(token)
+
+        task = asyncio.create_task(self._finish(job, awaitable))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _finish(self, job: Job, awaitable):
+        with self._lock:
+            job.status = JobStatus.RUNNING
+            job.started_at = time.monotonic()
+            job.version += 1
+        try:
+            result = await awaitable
+        except HTTPException as e:
+            status, error, result = JobStatus.FAILED, str(e.detail), None
+        except Exception as e:
+            status, error, result = JobStatus.FAILED, str(e), None
+        else:
+            status, error = JobStatus.COMPLETED, None
+            if isinstance(result, BaseModel):
+                result = result.model_dump(mode="json")
+
+        with self._lock:
+            job.status = status
+            job.error = error
+            job.result = result
+            job.finished_at = time.monotonic()
+            job.version += 1
+
+    def _prune(self):
+        cutoff = datetime.now() - timedelta(hours=settings.job_retention_hours)
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.is_finished and job.created_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+async def _resolved(value: Any) -> Any:
+    return value
+
+
+job_manager = JobManager()
+
+# OpenAPI `responses` entry for routes that accept ?async=true
+ASYNC_JOB_RESPONSES = {202: {"model": JobSubmittedResponse, "description": "Accepted as an async job"}}
+
+
+async def run_operation(operation: str, func: Callable[..., Any], *args, run_async: bool = False):
+    """
+    Run an operation inline or, with run_async, as a background job.
+
+    Inline operations return the service's response. Async ones return
+    202 Accepted with the job_id to poll at /api/jobs/{job_id}. Memoized
+    results are returned without queueing any work.
+    """
+    cached = result_cache.lookup(func, *args)
+    if not run_async:
+        if cached is not None:
+            return cached
+        return await executor.run(operation, func, *args)
+
+    job = job_manager.submit(operation, func, *args, cached_result=cached)
+    response = JobSubmittedResponse(
+        job_id=job.job_id,
+        operation=operation,
+        status=job.status.value,
+        status_url=f"/api/jobs/{job.job_id}"
+    )
+    return JSONResponse(status_code=202, content=response.model_dump())
@@ -0,0 +1,53 @@
+"""ASGI middleware."""
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Allowance for multipart boundaries and headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def _too_large_detail() -> str:
+    return f"File too large. Maximum size: {settings.max_file_size_mb} MB"
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject upload request bodies larger than settings.max_file_size_mb.
+
+    Requests announcing a larger Content-Length are refused before any byte
+    is read; bodies without one are counted as they stream in and cut off
+    with 413 as soon as they exceed the limit.
+    """
+
+    def __init__(self, app: ASGIApp, path_prefix: str = "/api/upload"):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        limit = settings.max_file_size_mb * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse(status_code=413, content={"detail": _too_large_detail()})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside body parsing, so FastAPI turns it into the response
+                    raise HTTPException(status_code=413, detail=_too_large_detail())
+            return message
+
+        await self.app(scope, limited_receive, send)
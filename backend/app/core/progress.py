@@ -0,0 +1,118 @@
+"""Progress reporting from blocking work (threads or worker processes) to jobs."""
+import contextvars
+import threading
+from typing import Callable
+
+# Job the current task is running for (None outside of async jobs)
+_current_job_id: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "current_job_id", default=None
+)
+
+# Receives (job_id, stage, rows_processed, rows_total) in the API process
+ProgressSink = Callable[[str, str, int, int | None], None]
+_sink: ProgressSink | None = None
+
+# In worker processes: queue back to the API process (set by the pool initializer)
+_worker_queue = None
+
+# In the API process: queue shared with worker processes and its listener thread
+_parent_queue = None
+_listener: threading.Thread | None = None
+_listener_lock = threading.Lock()
+
+
+def current_job_id() -> str | None:
+    """Job id of the running task, if any."""
+    return _current_job_id.get()
+
+
+def set_current_job_id(job_id: str | None) -> contextvars.Token:
+    """Bind the running task to a job; returns a token for reset_current_job_id."""
+    return _current_job_id.set(job_id)
+
+
+def reset_current_job_id(token: contextvars.Token):
+    """Undo set_current_job_id."""
+    _current_job_id.reset(token)
+
+
+def set_sink(sink: ProgressSink):
+    """Register the API-process consumer of progress updates."""
+    global _sink
+    _sink = sink
+
+
+def report_progress(stage: str, rows_processed: int, rows_total: int | None = None):
+    """
+    Report progress of the current job; a no-op outside of async jobs.
+
+    Args:
+        stage: Short stage name, e.g. "reading" or "writing"
+        rows_processed: Rows handled so far in this stage
+        rows_total: Expected rows in this stage, if known
+    """
+    job_id = _current_job_id.get()
+    if job_id is None:
+        return
+    if _worker_queue is not None:
+        _worker_queue.put((job_id, stage, rows_processed, rows_total))
+    elif _sink is not None:
+        _sink(job_id, stage, rows_processed, rows_total)
+
+
+def get_worker_queue(mp_context):
+    """
+    Queue that worker processes report progress through.
+
+    Created on first use together with a listener thread that forwards
+    updates to the registered sink.
+    """
+    global _parent_queue, _listener
+    with _listener_lock:
+        if _parent_queue is None:
+            _parent_queue = mp_context.Queue()
+            _listener = threading.Thread(
+                target=_forward_worker_updates,
+                args=(_parent_queue,),
+                name="progress-listener",
+                daemon=True
+            )
+            _listener.start()
+        return _parent_queue
+
+
+def _forward_worker_updates(queue):
+    while True:
+        update = queue.get()
+        if update is None:
+            break
+        if _sink is not None:
+            _sink(*update)
+
+
+def stop_listener():
+    """Stop forwarding worker updates (on shutdown)."""
+    global _parent_queue, _listener
+    with _listener_lock:
+        if _parent_queue is not None:
+            _parent_queue.put(None)
+            if _listener:
+                _listener.join(timeout=5)
+        _parent_queue = None
+        _listener = None
+
+
+def init_worker(queue):
+    """Process pool initializer hook: route progress through queue."""
+    global _worker_queue
+    _worker_queue = queue
+
+
+def run_for_job(job_id: str | None, func: Callable, *args, **kwargs):
+    """Run func with the current job bound (used inside worker processes)."""
+    token = _current_job_id.set(job_id)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _current_job_id.reset(token)
+
@@ -0,0 +1,182 @@
+"""Memoization of operation results by input content and request."""
+import functools
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.executor import call_in_parent, in_worker_process
+
+# Request fields naming input files; replaced by their content in the key
+INPUT_FILE_FIELDS = ("file_id", "file_ids")
+
+
+def _output_file_ids(result: BaseModel) -> list[str]:
+    data = result.model_dump()
+    if "file_ids" in data:
+        return list(data["file_ids"])
+    if "file_id" in data:
+        return [data["file_id"]]
+    return []
+
+
+def make_key(operation: str, file_service, request: BaseModel) -> str:
+    """
+    Build the cache key of an operation request.
+
+    Input file_ids are replaced by the content hash (and extension) they
+    refer to, so the same data uploaded twice shares cache entries; all
+    other request fields are canonicalized as sorted JSON.
+
+    Raises:
+        HTTPException: If an input file_id does not exist
+    """
+    fields = request.model_dump(mode="json")
+    inputs = []
+    for field in INPUT_FILE_FIELDS:
+        value = fields.pop(field, None)
+        for file_id in ([value] if isinstance(value, str) else value or []):
+            ref = file_service.store.get_ref(file_id)
+            inputs.append(f"{ref['hash']}{ref['extension']}")
+
+    canonical = json.dumps(
+        {"operation": operation, "inputs": inputs, "request": fields},
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+    """LRU map from (operation, input content, request) to the operation's response."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, BaseModel] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str, file_service, record: bool = True) -> BaseModel | None:
+        """
+        Return the cached response for key, if its output files still exist.
+
+        Args:
+            key: Key from make_key
+            file_service: FileService used to check the outputs
+            record: Whether to count the lookup in the hit/miss metrics
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+
+        # Outputs may have been deleted or expired since they were cached
+        if result is not None and not all(
+            file_service.file_exists(file_id) for file_id in _output_file_ids(result)
+        ):
+            with self._lock:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+            result = None
+
+        if record:
+            with self._lock:
+                if result is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+        return result.model_copy() if result is not None else None
+
+    def put(self, key: str, result: BaseModel):
+        """Cache a response, evicting the least recently used entries beyond max_entries."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (metrics are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Size and hit/miss counters, e.g. for the health endpoint."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+
+result_cache = ResultCache(settings.result_cache_max_entries)
+
+
+def _store_result(key: str, result: BaseModel):
+    result_cache.put(key, result)
+
+
+def memoize_result(operation: str):
+    """
+    Memoize a service method taking a single request model.
+
+    The service must expose its FileService as ``self.file_service``. On a
+    hit the previous response (and its output file_ids) is returned without
+    loading any data. Results computed in worker processes are stored in the
+    API process's cache.
+    """
+    def decorator(method: Callable[[Any, BaseModel], BaseModel]):
+        @functools.wraps(method)
+        def wrapper(self, request: BaseModel) -> BaseModel:
+            try:
+                key = make_key(operation, self.file_service, request)
+            except HTTPException:
+                return method(self, request)  # Let the operation report the missing input
+
+            if not in_worker_process():
+                # Recheck: an identical request may have finished while this one was queued
+                cached = result_cache.get(key, self.file_service, record=False)
+                if cached is not None:
+                    return cached
+
+            result = method(self, request)
+            call_in_parent(_store_result, key, result)
+            return result
+
+        wrapper.memoized_operation = operation
+        return wrapper
+    return decorator
+
+
+def lookup(func: Callable[..., Any], *args) -> BaseModel | None:
+    """
+    Return the cached response for calling a memoized bound method with args.
+
+    Returns None for functions that are not memoized, or on a miss.
+    """
+    operation = getattr(func, "memoized_operation", None)
+    if operation is None or len(args) != 1 or not isinstance(args[0], BaseModel):
+        return None
+    file_service = func.__self__.file_service
+    try:
+        key = make_key(operation, file_service, args[0])
+    except HTTPException:
+        return None
+    return result_cache.get(key, file_service)
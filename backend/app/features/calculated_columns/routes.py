@@ -1,21 +1,53 @@
 """Calculated columns feature."""
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 import pandas as pd
 
+from app.core.config import settings
 from app.shared.file_service import FileService
-from app.core.dependencies import FileServiceDep
+from app.core.dependencies import FileServiceDep, AsyncJobDep
+from app.core.jobs import run_operation, ASYNC_JOB_RESPONSES
+from app.core.result_cache import memoize_result
+from app.shared.expressions import CompiledFormulas, ExpressionError, compile_formulas
+
+
+class CalculatedColumnDefinition(BaseModel):
+    new_column_name: str = Field(..., min_length=1)
+    formula: str = Field(..., min_length=1, description="Formula over column names (see app.shared.expressions)")
 
 
 class CalculatedColumnRequest(BaseModel):
     file_id: str
-    new_column_name: str = Field(..., min_length=1)
-    formula: str = Field(..., description="Python expression using column names")
+    new_column_name: str | None = Field(default=None, min_length=1)
+    formula: str | None = Field(default=None, min_length=1, description="Formula over column names (see app.shared.expressions)")
+    columns: list[CalculatedColumnDefinition] | None = Field(
+        default=None,
+        min_length=1,
+        description="Several columns at once, replacing new_column_name and formula; formulas may use other new columns"
+    )
+    
+    @model_validator(mode="after")
+    def check_columns(self) -> "CalculatedColumnRequest":
+        if self.columns is None and (self.new_column_name is None or self.formula is None):
+            raise ValueError("Either new_column_name and formula, or columns, is required")
+        names = [definition.new_column_name for definition in self.definitions]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate new column names: {', '.join(duplicates)}")
+        return self
+    
+    @property
+    def definitions(self) -> list[CalculatedColumnDefinition]:
+        """The requested columns, or the single new_column_name and formula."""
+        if self.columns is not None:
+            return self.columns
+        return [CalculatedColumnDefinition(new_column_name=self.new_column_name, formula=self.formula)]
 
 
 class CalculatedColumnResponse(BaseModel):
     file_id: str
-    new_column: str
+    new_column: str = Field(..., description="New column name(s), comma-separated")
+    new_columns: list[str] = Field(default_factory=list)
     message: str
 
 
@@ -23,39 +55,103 @@ class CalculatedColumnsService:
     def __init__(self, file_service: FileService):
         self.file_service = file_service
     
+    @memoize_result("calculated_column")
     def create_calculated_column(self, request: CalculatedColumnRequest) -> CalculatedColumnResponse:
-        df = self.file_service.load_excel(request.file_id)
+        """
+        Add calculated columns, evaluating the formulas batch by batch.
+        
+        The formulas are compiled once against the file's column types, so
+        errors (including circular references between new columns) are
+        reported before any data is read. All columns are added in one
+        pass and one save.
+        """
+        dtypes = self.file_service.get_metadata(request.file_id)["dtypes"]
+        plan = self._compile(request, dtypes)
+        
+        def add_columns(batch: pd.DataFrame) -> pd.DataFrame:
+            for name, values in self._evaluate(plan, batch).items():
+                batch[name] = values
+            return batch
+        
+        new_file_id = self.file_service.map_batches(request.file_id, add_columns)
+        
+        names = [definition.new_column_name for definition in request.definitions]
+        return CalculatedColumnResponse(
+            file_id=new_file_id,
+            new_column=", ".join(names),
+            new_columns=names,
+            message=(
+                "Calculated column created successfully" if len(names) == 1
+                else f"{len(names)} calculated columns created successfully"
+            )
+        )
+    
+    def add_calculated_column(self, df: pd.DataFrame, request: CalculatedColumnRequest) -> pd.DataFrame:
+        """
+        Add the requested calculated columns to a loaded DataFrame.
         
+        Raises:
+            HTTPException: If a formula is invalid for the DataFrame's columns
+        """
+        plan = self._compile(request, df.dtypes.to_dict())
+        for name, values in self._evaluate(plan, df).items():
+            df[name] = values
+        return df
+    
+    def _compile(self, request: CalculatedColumnRequest, dtypes: dict) -> CompiledFormulas:
+        """
+        Compile the request's formulas against column dtypes.
+        
+        Raises:
+            HTTPException: If a formula is invalid or formulas reference each other in a cycle
+        """
         try:
-            # Evaluate formula in DataFrame context
-            # Note: This uses eval which can be dangerous in production
-            # Consider using a safer expression parser for production use
-            df[request.new_column_name] = df.eval(request.formula)
-        except Exception as e:
+            return compile_formulas(
+                {definition.new_column_name: definition.formula for definition in request.definitions},
+                dtypes
+            )
+        except ExpressionError as e:
             raise HTTPException(
                 status_code=400,
                 detail=f"Failed to evaluate formula: {str(e)}"
             )
+    
+    def _evaluate(self, plan: CompiledFormulas, df: pd.DataFrame) -> dict[str, pd.Series]:
+        """
+        Evaluate compiled formulas on a DataFrame, independent ones concurrently.
         
-        new_file_id = self.file_service.save_dataframe(df, request.file_id)
-        
-        return CalculatedColumnResponse(
-            file_id=new_file_id,
-            new_column=request.new_column_name,
-            message="Calculated column created successfully"
-        )
+        Raises:
+            HTTPException: If the data does not fit a formula (e.g. text
+                compared with numbers in a mixed column)
+        """
+        try:
+            # One thread per core; NumPy releases the GIL in its kernels
+            return plan.evaluate(df, workers=settings.process_pool_workers)
+        except (TypeError, ValueError, OverflowError) as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Failed to evaluate formula: {str(e)}"
+            )
 
 
 router = APIRouter(prefix="/api", tags=["Calculated Columns"])
 
 
-@router.post("/calculated-column", response_model=CalculatedColumnResponse)
-async def create_calculated_column(request: CalculatedColumnRequest, file_service: FileServiceDep = None):
+@router.post("/calculated-column", response_model=CalculatedColumnResponse, responses=ASYNC_JOB_RESPONSES)
+async def create_calculated_column(request: CalculatedColumnRequest, file_service: FileServiceDep = None, run_async: AsyncJobDep = False):
     """
-    Create a new column based on a formula.
+    Create new columns based on formulas.
+    
+    Send new_column_name and formula for one column, or columns for
+    several; their formulas may reference other new columns by name, and
+    all are added with a single save.
     
-    Formula should be a Python expression using existing column names.
-    Example: "Price * Quantity" or "Column_A + Column_B"
+    Formulas use column names (bracketed when they contain spaces),
+    arithmetic, comparisons (also chained, and IN / NOT IN lists),
+    AND/OR/NOT, IF(...) and CASE WHEN ... END, and text, number, date
+    and missing-value functions. a // b is floor division; dividing by
+    zero gives an empty value, not infinity.
+    Example: "Price * Quantity" or "IF([Unit Price] > 100, 'high', 'low')"
     """
     service = CalculatedColumnsService(file_service)
-    return service.create_calculated_column(request)
+    return await run_operation("calculated_column", service.create_calculated_column, request, run_async=run_async)
@@ -3,9 +3,12 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import Annotated
 from fastapi import Depends
+import pandas as pd
 
 from app.shared.file_service import FileService
-from app.core.dependencies import FileServiceDep
+from app.core.dependencies import FileServiceDep, AsyncJobDep
+from app.core.jobs import run_operation, ASYNC_JOB_RESPONSES
+from app.core.result_cache import memoize_result
 
 
 # Schemas
@@ -34,45 +37,58 @@ class ColumnManagementService:
     def __init__(self, file_service: FileService):
         self.file_service = file_service
     
+    @memoize_result("rename_columns")
     def rename_columns(self, request: RenameColumnsRequest) -> ColumnManagementResponse:
         df = self.file_service.load_excel(request.file_id)
-        df = df.rename(columns=request.rename_map)
+        df = self.rename_dataframe_columns(df, request)
         new_file_id = self.file_service.save_dataframe(df, request.file_id)
         return ColumnManagementResponse(file_id=new_file_id, message="Columns renamed successfully")
     
+    @memoize_result("delete_columns")
     def delete_columns(self, request: DeleteColumnsRequest) -> ColumnManagementResponse:
         df = self.file_service.load_excel(request.file_id)
-        df = df.drop(columns=request.columns, errors='raise')
+        df = self.delete_dataframe_columns(df, request)
         new_file_id = self.file_service.save_dataframe(df, request.file_id)
         return ColumnManagementResponse(file_id=new_file_id, message="Columns deleted successfully")
     
+    @memoize_result("reorder_columns")
     def reorder_columns(self, request: ReorderColumnsRequest) -> ColumnManagementResponse:
         df = self.file_service.load_excel(request.file_id)
-        df = df[request.column_order]
+        df = self.reorder_dataframe_columns(df, request)
         new_file_id = self.file_service.save_dataframe(df, request.file_id)
         return ColumnManagementResponse(file_id=new_file_id, message="Columns reordered successfully")
+    
+    # DataFrame-level operations (shared with the pipeline)
+    def rename_dataframe_columns(self, df: pd.DataFrame, request: RenameColumnsRequest) -> pd.DataFrame:
+        return df.rename(columns=request.rename_map)
+    
+    def delete_dataframe_columns(self, df: pd.DataFrame, request: DeleteColumnsRequest) -> pd.DataFrame:
+        return df.drop(columns=request.columns, errors='raise')
+    
+    def reorder_dataframe_columns(self, df: pd.DataFrame, request: ReorderColumnsRequest) -> pd.DataFrame:
+        return df[request.column_order]
 
 
 # Routes
 router = APIRouter(prefix="/api/columns", tags=["Column Management"])
 
 
-@router.post("/rename", response_model=ColumnManagementResponse)
-async def rename_columns(request: RenameColumnsRequest, file_service: FileServiceDep = None):
+@router.post("/rename", response_model=ColumnManagementResponse, responses=ASYNC_JOB_RESPONSES)
+async def rename_columns(request: RenameColumnsRequest, file_service: FileServiceDep = None, run_async: AsyncJobDep = False):
     """Rename columns using a mapping dictionary."""
     service = ColumnManagementService(file_service)
-    return service.rename_columns(request)
+    return await run_operation("rename_columns", service.rename_columns, request, run_async=run_async)
 
 
-@router.post("/delete", response_model=ColumnManagementResponse)
-async def delete_columns(request: DeleteColumnsRequest, file_service: FileServiceDep = None):
+@router.post("/delete", response_model=ColumnManagementResponse, responses=ASYNC_JOB_RESPONSES)
+async def delete_columns(request: DeleteColumnsRequest, file_service: FileServiceDep = None, run_async: AsyncJobDep = False):
     """Delete specified columns."""
     service = ColumnManagementService(file_service)
-    return service.delete_columns(request)
+    return await run_operation("delete_columns", service.delete_columns, request, run_async=run_async)
 
 
-@router.post("/reorder", response_model=ColumnManagementResponse)
-async def reorder_columns(request: ReorderColumnsRequest, file_service: FileServiceDep = None):
+@router.post("/reorder", response_model=ColumnManagementResponse, responses=ASYNC_JOB_RESPONSES)
+async def reorder_columns(request: ReorderColumnsRequest, file_service: FileServiceDep = None, run_async: AsyncJobDep = False):
     """Reorder columns to specified order."""
     service = ColumnManagementService(file_service)
-    return service.reorder_columns(request)
+    return await run_operation("reorder_columns", service.reorder_columns, request, run_async=run_async)
@@ -1,10 +1,14 @@
 """Data filtering feature."""
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from enum import Enum
+from functools import partial
+import pandas as pd
 
 from app.shared.file_service import FileService
-from app.core.dependencies import FileServiceDep
+from app.core.dependencies import FileServiceDep, AsyncJobDep
+from app.core.jobs import run_operation, ASYNC_JOB_RESPONSES
+from app.core.result_cache import memoize_result
 
 
 class FilterOperator(str, Enum):
@@ -37,51 +41,71 @@ class DataFilteringResponse(BaseModel):
     message: str
 
 
+def build_filter_mask(df: pd.DataFrame, request: DataFilteringRequest) -> pd.Series:
+    """
+    Evaluate the request's conditions on a DataFrame (or one batch of it).
+    
+    Raises:
+        HTTPException: If a condition refers to a missing column
+    """
+    missing_cols = {condition.column for condition in request.conditions} - set(df.columns)
+    if missing_cols:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Columns not found in file: {missing_cols}"
+        )
+    
+    # Build filter mask
+    masks = []
+    for condition in request.conditions:
+        col = condition.column
+        op = condition.operator
+        val = condition.value
+        
+        if op == FilterOperator.EQUALS:
+            mask = df[col] == val
+        elif op == FilterOperator.NOT_EQUALS:
+            mask = df[col] != val
+        elif op == FilterOperator.CONTAINS:
+            mask = df[col].astype(str).str.contains(str(val), na=False)
+        elif op == FilterOperator.NOT_CONTAINS:
+            mask = ~df[col].astype(str).str.contains(str(val), na=False)
+        elif op == FilterOperator.GREATER_THAN:
+            mask = df[col] > val
+        elif op == FilterOperator.LESS_THAN:
+            mask = df[col] < val
+        elif op == FilterOperator.GREATER_EQUAL:
+            mask = df[col] >= val
+        elif op == FilterOperator.LESS_EQUAL:
+            mask = df[col] <= val
+        
+        # Comparisons on nullable dtypes (Int64, boolean) give NA for missing values
+        masks.append(mask.fillna(False).astype(bool))
+    
+    # Combine masks
+    if request.match_all:
+        final_mask = masks[0]
+        for mask in masks[1:]:
+            final_mask &= mask
+    else:
+        final_mask = masks[0]
+        for mask in masks[1:]:
+            final_mask |= mask
+    
+    return final_mask
+
+
 class DataFilteringService:
     def __init__(self, file_service: FileService):
         self.file_service = file_service
     
+    @memoize_result("filter")
     def filter_data(self, request: DataFilteringRequest) -> DataFilteringResponse:
-        df = self.file_service.load_excel(request.file_id)
-        original_rows = len(df)
-        
-        # Build filter mask
-        masks = []
-        for condition in request.conditions:
-            col = condition.column
-            op = condition.operator
-            val = condition.value
-            
-            if op == FilterOperator.EQUALS:
-                mask = df[col] == val
-            elif op == FilterOperator.NOT_EQUALS:
-                mask = df[col] != val
-            elif op == FilterOperator.CONTAINS:
-                mask = df[col].astype(str).str.contains(str(val), na=False)
-            elif op == FilterOperator.NOT_CONTAINS:
-                mask = ~df[col].astype(str).str.contains(str(val), na=False)
-            elif op == FilterOperator.GREATER_THAN:
-                mask = df[col] > val
-            elif op == FilterOperator.LESS_THAN:
-                mask = df[col] < val
-            elif op == FilterOperator.GREATER_EQUAL:
-                mask = df[col] >= val
-            elif op == FilterOperator.LESS_EQUAL:
-                mask = df[col] <= val
-            
-            masks.append(mask)
-        
-        # Combine masks
-        if request.match_all:
-            final_mask = masks[0]
-            for mask in masks[1:]:
-                final_mask &= mask
-        else:
-            final_mask = masks[0]
-            for mask in masks[1:]:
-                final_mask |= mask
-        
-        filtered_df = df[final_mask]
+        # Stream the file batch by batch, keeping only matching rows in memory
+        filtered_df, original_rows = self.file_service.select_rows(
+            request.file_id,
+            partial(build_filter_mask, request=request)
+        )
         new_file_id = self.file_service.save_dataframe(filtered_df, request.file_id)
         
         return DataFilteringResponse(
@@ -90,13 +114,16 @@ class DataFilteringService:
             filtered_rows=len(filtered_df),
             message="Data filtered successfully"
         )
+    
+    def filter_dataframe(self, df: pd.DataFrame, request: DataFilteringRequest) -> pd.DataFrame:
+        return df[build_filter_mask(df, request)]
 
 
 router = APIRouter(prefix="/api", tags=["Data Filtering"])
 
 
-@router.post("/filter", response_model=DataFilteringResponse)
-async def filter_data(request: DataFilteringRequest, file_service: FileServiceDep = None):
+@router.post("/filter", response_model=DataFilteringResponse, responses=ASYNC_JOB_RESPONSES)
+async def filter_data(request: DataFilteringRequest, file_service: FileServiceDep = None, run_async: AsyncJobDep = False):
     """Filter rows based on conditions (equals, contains, >, <, etc.)."""
     service = DataFilteringService(file_service)
-    return service.filter_data(request)
+    return await run_operation("filter", service.filter_data, request, run_async=run_async)
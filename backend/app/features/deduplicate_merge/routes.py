@@ -1,7 +1,8 @@
 """API routes for deduplicate & merge feature."""
 from fastapi import APIRouter
 
-from app.core.dependencies import FileServiceDep
+from app.core.dependencies import FileServiceDep, AsyncJobDep
+from app.core.jobs import run_operation, ASYNC_JOB_RESPONSES
 from app.features.deduplicate_merge.service import DeduplicateMergeService
 from app.features.deduplicate_merge.schemas import (
     DeduplicateMergeRequest,
@@ -11,10 +12,11 @@ from app.features.deduplicate_merge.schemas import (
 router = APIRouter(prefix="/api", tags=["Deduplicate & Merge"])
 
 
-@router.post("/deduplicate-merge", response_model=DeduplicateMergeResponse)
+@router.post("/deduplicate-merge", response_model=DeduplicateMergeResponse, responses=ASYNC_JOB_RESPONSES)
 async def deduplicate_and_merge(
     request: DeduplicateMergeRequest,
-    file_service: FileServiceDep = None
+    file_service: FileServiceDep = None,
+    run_async: AsyncJobDep = False
 ):
     """
     Identify and merge duplicate rows.
@@ -23,8 +25,10 @@ async def deduplicate_and_merge(
     When merging duplicates:
     - Numeric columns are summed
     - Non-numeric columns take the first value
+    - Unless aggregations picks sum, min, max, mean, count, first,
+      last, concat_unique or mode for a column
     
     Returns a new file_id with deduplicated data.
     """
     service = DeduplicateMergeService(file_service)
-    return service.deduplicate_and_merge(request)
+    return await run_operation("deduplicate_merge", service.deduplicate_and_merge, request, run_async=run_async)
@@ -1,7 +1,22 @@
 """Pydantic schemas for deduplicate & merge feature."""
+from enum import Enum
+
 from pydantic import BaseModel, Field
 
 
+class AggregationFunction(str, Enum):
+    """How the values of a column are combined across duplicate rows."""
+    SUM = "sum"
+    MIN = "min"
+    MAX = "max"
+    MEAN = "mean"
+    COUNT = "count"
+    FIRST = "first"
+    LAST = "last"
+    CONCAT_UNIQUE = "concat_unique"
+    MODE = "mode"
+
+
 class DeduplicateMergeRequest(BaseModel):
     """Request for deduplicating and merging rows."""
     
@@ -11,6 +26,10 @@ class DeduplicateMergeRequest(BaseModel):
         description="Columns to use for identifying duplicates",
         min_length=1
     )
+    aggregations: dict[str, AggregationFunction] = Field(
+        default_factory=dict,
+        description="Aggregation per column; other columns are summed if numeric, else take the first value"
+    )
 
 
 class DeduplicateMergeResponse(BaseModel):
@@ -1,14 +1,199 @@
 """Service layer for deduplicate & merge operations."""
+import math
+import shutil
+from itertools import chain
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
 from fastapi import HTTPException
+from pandas.api.types import is_numeric_dtype, pandas_dtype
 
+from app.core.config import settings
+from app.core.executor import executor
+from app.core.progress import report_progress
+from app.core.result_cache import memoize_result
+from app.shared import columnar
 from app.shared.file_service import FileService
 from app.features.deduplicate_merge.schemas import (
+    AggregationFunction,
     DeduplicateMergeRequest,
     DeduplicateMergeResponse
 )
 
+# Estimated bytes of pandas memory (frame plus groupby) per byte of sidecar
+MEMORY_PER_SIDECAR_BYTE = 4
+
+# Upper bound on spill partitions (one open file each while partitioning)
+MAX_PARTITIONS = 256
+
+# Separator between the values joined by concat_unique
+CONCAT_SEPARATOR = ", "
+
+
+def aggregation_spec(
+    df: pd.DataFrame,
+    duplicate_columns: list[str],
+    aggregations: dict[str, AggregationFunction] | None = None
+) -> dict[str, str]:
+    """
+    Aggregation per non-key column, in column order.
+    
+    Columns without an entry in aggregations are summed if numeric and
+    take the first value otherwise. Only the dtypes of df are used, so an
+    empty frame with the file's dtypes gives the same spec as the whole file.
+    
+    Args:
+        df: DataFrame (or empty template) with the file's columns and dtypes
+        duplicate_columns: Key columns, which are not aggregated
+        aggregations: Requested aggregation per column
+        
+    Returns:
+        AggregationFunction value by column
+        
+    Raises:
+        HTTPException: If an aggregation names a missing or key column, or
+            sums / averages a non-numeric column
+    """
+    aggregations = aggregations or {}
+    missing_cols = set(aggregations) - set(df.columns)
+    if missing_cols:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Columns not found in file: {missing_cols}"
+        )
+    key_cols = set(aggregations) & set(duplicate_columns)
+    if key_cols:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Duplicate columns cannot be aggregated: {key_cols}"
+        )
+    numeric_only = {AggregationFunction.SUM, AggregationFunction.MEAN}
+    non_numeric = {
+        col for col, func in aggregations.items()
+        if func in numeric_only and not is_numeric_dtype(df[col])
+    }
+    if non_numeric:
+        raise HTTPException(
+            status_code=400,
+            detail=f"sum and mean need numeric columns: {non_numeric}"
+        )
+    
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    agg_dict = {}
+    for col in numeric_cols:
+        if col not in duplicate_columns:
+            agg_dict[col] = AggregationFunction(aggregations.get(col, AggregationFunction.SUM)).value
+    for col in df.columns:
+        if col not in numeric_cols and col not in duplicate_columns:
+            agg_dict[col] = AggregationFunction(aggregations.get(col, AggregationFunction.FIRST)).value
+    return agg_dict
+
+
+def _value_pairs(values: pd.Series, group_ids: np.ndarray) -> pd.DataFrame:
+    """Group id and value of every row with a value."""
+    pairs = pd.DataFrame({"group": group_ids, "value": values.to_numpy()})
+    return pairs[values.notna().to_numpy()]
+
+
+def _concat_unique(values: pd.Series, group_ids: np.ndarray, n_groups: int) -> np.ndarray:
+    """Distinct non-missing values of each group as text, in order of first appearance."""
+    pairs = _value_pairs(values, group_ids).drop_duplicates()
+    joined = pairs["value"].astype(str).groupby(pairs["group"]).agg(CONCAT_SEPARATOR.join)
+    return joined.reindex(range(n_groups), fill_value="").to_numpy()
+
+
+def _mode(values: pd.Series, group_ids: np.ndarray, n_groups: int) -> np.ndarray:
+    """Most frequent non-missing value of each group (the smallest on ties)."""
+    counts = _value_pairs(values, group_ids).value_counts(sort=False).reset_index(name="count")
+    counts = counts.sort_values(
+        ["group", "count", "value"],
+        ascending=[True, False, True],
+        kind="stable"
+    ).drop_duplicates("group")
+    modes = pd.Series(counts["value"].to_numpy(dtype=values.dtype), index=counts["group"])
+    return modes.reindex(range(n_groups)).to_numpy()
+
+
+def _text_extreme(values: pd.Series, group_ids: np.ndarray, n_groups: int, func: str) -> np.ndarray:
+    """
+    min or max of a text column per group, skipping missing values.
+    
+    Compares sorted factorize codes instead of the Python objects, which
+    pandas cannot order once missing values are mixed in.
+    """
+    codes, uniques = pd.factorize(values, sort=True)
+    codes = pd.Series(np.where(codes < 0, np.nan, codes))
+    picked = codes.groupby(group_ids, sort=True).agg(func).reindex(range(n_groups))
+    return pd.api.extensions.take(
+        np.asarray(uniques, dtype=object),
+        picked.fillna(-1).to_numpy(dtype=np.int64),
+        allow_fill=True
+    )
+
+
+# Aggregations computed from the group id of each row, for those pandas
+# has no (or no missing-value-safe) built-in for
+_GROUP_ID_AGGREGATIONS = {
+    AggregationFunction.CONCAT_UNIQUE.value: _concat_unique,
+    AggregationFunction.MODE.value: _mode,
+    "text_min": lambda values, group_ids, n_groups: _text_extreme(values, group_ids, n_groups, "min"),
+    "text_max": lambda values, group_ids, n_groups: _text_extreme(values, group_ids, n_groups, "max"),
+}
+
+
+def aggregate_groups(
+    df: pd.DataFrame,
+    duplicate_columns: list[str],
+    agg_dict: dict[str, str]
+) -> pd.DataFrame:
+    """
+    Collapse rows with equal duplicate_columns using agg_dict (see aggregation_spec).
+    
+    Built-in aggregations run in pandas' groupby, which encodes the keys
+    as integer codes. concat_unique, mode and min / max of text columns
+    are computed vectorized over the resulting group ids (ngroup). Rows
+    come out sorted by key, as from
+    groupby(duplicate_columns, as_index=False, dropna=False).
+    """
+    if not agg_dict:
+        # If no columns to aggregate, just drop duplicates
+        return df.drop_duplicates(
+            subset=duplicate_columns,
+            keep='first'
+        )
+    
+    funcs = {
+        col: f"text_{func}" if func in ("min", "max") and df[col].dtype == object else func
+        for col, func in agg_dict.items()
+    }
+    builtin = {col: func for col, func in funcs.items() if func not in _GROUP_ID_AGGREGATIONS}
+    
+    grouped = df.groupby(duplicate_columns, as_index=False, dropna=False)
+    if builtin:
+        result = grouped.agg(builtin)
+    else:
+        result = grouped.size().drop(columns="size")
+    if len(builtin) < len(funcs):
+        group_ids = grouped.ngroup().to_numpy()
+        for col, func in funcs.items():
+            if func in _GROUP_ID_AGGREGATIONS:
+                result[col] = _GROUP_ID_AGGREGATIONS[func](df[col], group_ids, len(result))
+    return result[duplicate_columns + list(agg_dict)]
+
+
+def _aggregate_partition(
+    partition_path: Path,
+    output_path: Path,
+    duplicate_columns: list[str],
+    agg_dict: dict[str, str]
+) -> int:
+    """Aggregate one sidecar (a whole file or a spilled partition) into another; returns its rows."""
+    df = columnar.read_dataframe(partition_path)
+    result = aggregate_groups(df, duplicate_columns, agg_dict)
+    columnar.write_dataframe(result, output_path)
+    return len(result)
+
 
 class DeduplicateMergeService:
     """Business logic for deduplicating and merging rows."""
@@ -16,6 +201,7 @@ class DeduplicateMergeService:
     def __init__(self, file_service: FileService):
         self.file_service = file_service
     
+    @memoize_result("deduplicate_merge")
     def deduplicate_and_merge(self, request: DeduplicateMergeRequest) -> DeduplicateMergeResponse:
         """
         Deduplicate rows based on selected columns and sum numeric values.
@@ -23,6 +209,15 @@ class DeduplicateMergeService:
         For duplicate rows:
         - Numeric columns are summed
         - Non-numeric columns take the first value
+        - Unless aggregations picks sum, min, max, mean, count, first,
+          last, concat_unique or mode for a column
+        
+        Files larger than settings.dedupe_memory_budget_mb are
+        hash-partitioned by the duplicate columns into sidecars spilled to
+        disk, so all rows of a group land in one partition. Partitions are
+        aggregated in parallel on the process pool and concatenated, so
+        the output is ordered by partition, then by key, instead of by key
+        alone.
         
         Args:
             request: DeduplicateMergeRequest with file_id and duplicate_columns
@@ -30,67 +225,142 @@ class DeduplicateMergeService:
         Returns:
             DeduplicateMergeResponse with new file_id and statistics
         """
-        # Load DataFrame
-        df = self.file_service.load_excel(request.file_id)
-        original_rows = len(df)
-        
-        # Validate columns exist
-        missing_cols = set(request.duplicate_columns) - set(df.columns)
-        if missing_cols:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Columns not found in file: {missing_cols}"
+        if not self.file_service.can_stream(request.file_id):
+            # Not representable in Arrow: deduplicate the parsed frame
+            df = self.file_service.load_excel(request.file_id)
+            original_rows = len(df)
+            deduplicated_df = self.deduplicate_dataframe(df, request)
+            new_file_id = self.file_service.save_dataframe(
+                deduplicated_df,
+                request.file_id
             )
+            deduplicated_rows = len(deduplicated_df)
+        else:
+            new_file_id, original_rows, deduplicated_rows = self._deduplicate_sidecar(request)
         
-        # Identify numeric and non-numeric columns
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        non_numeric_cols = [col for col in df.columns if col not in numeric_cols]
+        return DeduplicateMergeResponse(
+            file_id=new_file_id,
+            original_rows=original_rows,
+            deduplicated_rows=deduplicated_rows,
+            duplicates_removed=original_rows - deduplicated_rows,
+            message="Deduplication completed successfully"
+        )
+    
+    def _deduplicate_sidecar(self, request: DeduplicateMergeRequest) -> tuple[str, int, int]:
+        """
+        Deduplicate a file stored as a sidecar, spilling partitions if it exceeds the budget.
         
-        # Remove duplicate columns from numeric list (they should be keys)
-        numeric_cols_to_sum = [
-            col for col in numeric_cols 
-            if col not in request.duplicate_columns
-        ]
+        Returns:
+            Tuple of (new file_id, original rows, deduplicated rows)
+        """
+        metadata = self.file_service.get_metadata(request.file_id)
+        template = pd.DataFrame({
+            col: pd.Series(dtype=pandas_dtype(metadata["dtypes"][col]))
+            for col in metadata["columns"]
+        })
+        self._validate_columns(template, request)
+        agg_dict = aggregation_spec(template, request.duplicate_columns, request.aggregations)
         
-        # Build aggregation dictionary
-        agg_dict = {}
+        sidecar_path = self.file_service.get_sidecar_path(request.file_id)
+        budget = settings.dedupe_memory_budget_mb * 1024 * 1024
+        estimated_bytes = sidecar_path.stat().st_size * MEMORY_PER_SIDECAR_BYTE
+        n_partitions = min(MAX_PARTITIONS, math.ceil(estimated_bytes / max(budget, 1)))
         
-        # For numeric columns (excluding duplicate keys), sum them
-        for col in numeric_cols_to_sum:
-            agg_dict[col] = 'sum'
+        spill_dir = self.file_service.store.staging_path("")
+        spill_dir.mkdir()
+        try:
+            if n_partitions > 1:
+                inputs = self._spill_partitions(
+                    request, n_partitions, spill_dir, metadata["rows"]
+                )
+            else:
+                inputs = [sidecar_path]
+            
+            tasks = [
+                (path, spill_dir / f"result-{i}{columnar.SIDECAR_SUFFIX}", request.duplicate_columns, agg_dict)
+                for i, path in enumerate(inputs)
+            ]
+            if len(tasks) > 1 and settings.process_pool_io:
+                # Partitions are independent: aggregate them in parallel
+                deduplicated_rows = sum(executor.map_in_process(_aggregate_partition, tasks))
+            else:
+                # Nothing to fan out; spare the process pool's start-up
+                deduplicated_rows = sum(_aggregate_partition(*task) for task in tasks)
+            results = (
+                columnar.iter_dataframes(output_path, settings.stream_batch_rows)
+                for _, output_path, _, _ in tasks
+            )
+            new_file_id = self.file_service.save_batches(
+                chain.from_iterable(results),
+                request.file_id,
+                deduplicated_rows
+            )
+        finally:
+            shutil.rmtree(spill_dir, ignore_errors=True)
         
-        # For non-numeric columns (excluding duplicate keys), take first
-        for col in non_numeric_cols:
-            if col not in request.duplicate_columns:
-                agg_dict[col] = 'first'
+        return new_file_id, metadata["rows"], deduplicated_rows
+    
+    def _spill_partitions(
+        self,
+        request: DeduplicateMergeRequest,
+        n_partitions: int,
+        spill_dir: Path,
+        total_rows: int
+    ) -> list[Path]:
+        """
+        Stream a file into sidecars partitioned by a hash of the duplicate columns.
         
-        # Group by duplicate columns and aggregate
-        if agg_dict:
-            deduplicated_df = df.groupby(
-                request.duplicate_columns,
-                as_index=False,
-                dropna=False
-            ).agg(agg_dict)
-        else:
-            # If no columns to aggregate, just drop duplicates
-            deduplicated_df = df.drop_duplicates(
-                subset=request.duplicate_columns,
-                keep='first'
-            )
+        Rows keep their file order within each partition, so "first" still
+        picks the earliest value of a group.
         
-        deduplicated_rows = len(deduplicated_df)
-        duplicates_removed = original_rows - deduplicated_rows
+        Returns:
+            Paths of the partitions that received rows
+        """
+        writers = [
+            columnar.SidecarWriter(spill_dir / f"partition-{i}{columnar.SIDECAR_SUFFIX}")
+            for i in range(n_partitions)
+        ]
+        rows_read = 0
+        try:
+            for batch in self.file_service.iter_batches(request.file_id):
+                hashes = pd.util.hash_pandas_object(
+                    batch[request.duplicate_columns],
+                    index=False
+                ).to_numpy()
+                partition_ids = hashes % np.uint64(n_partitions)
+                for partition_id in np.unique(partition_ids):
+                    writers[partition_id].write(batch[partition_ids == partition_id])
+                rows_read += len(batch)
+                report_progress("partitioning", rows_read, total_rows)
+            for writer in writers:
+                writer.close()
+        except BaseException:
+            for writer in writers:
+                writer.abort()
+            raise
+        return [writer.path for writer in writers if writer.rows]
+    
+    def _validate_columns(self, df: pd.DataFrame, request: DeduplicateMergeRequest):
+        """
+        Check that the duplicate columns exist in df.
         
-        # Save to new file
-        new_file_id = self.file_service.save_dataframe(
-            deduplicated_df,
-            request.file_id
-        )
+        Raises:
+            HTTPException: If a duplicate column does not exist
+        """
+        missing_cols = set(request.duplicate_columns) - set(df.columns)
+        if missing_cols:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Columns not found in file: {missing_cols}"
+            )
+    
+    def deduplicate_dataframe(self, df: pd.DataFrame, request: DeduplicateMergeRequest) -> pd.DataFrame:
+        """
+        Deduplicate a loaded DataFrame, summing numeric and keeping first other values.
         
-        return DeduplicateMergeResponse(
-            file_id=new_file_id,
-            original_rows=original_rows,
-            deduplicated_rows=deduplicated_rows,
-            duplicates_removed=duplicates_removed,
-            message="Deduplication completed successfully"
-        )
+        Raises:
+            HTTPException: If a duplicate column does not exist
+        """
+        self._validate_columns(df, request)
+        agg_dict = aggregation_spec(df, request.duplicate_columns, request.aggregations)
+        return aggregate_groups(df, request.duplicate_columns, agg_dict)
@@ -1,19 +1,42 @@
 """File download endpoint."""
-from fastapi import APIRouter
-from fastapi.responses import FileResponse
-from app.core.dependencies import FileServiceDep
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+from app.core.dependencies import ArrowAcceptDep, FileServiceDep
+from app.core.executor import executor
+from app.shared import columnar
 
 router = APIRouter(prefix="/api", tags=["File Download"])
 
 
 @router.get("/download/{file_id}")
-async def download_file(file_id: str, file_service: FileServiceDep):
+async def download_file(file_id: str, file_service: FileServiceDep, arrow: ArrowAcceptDep = False):
     """
     Download an Excel file by its file_id.
     
-    Returns the file as a downloadable attachment.
+    Returns the file as a downloadable attachment. Files that only exist as
+    a columnar sidecar are rendered to Excel on first download.
+    
+    With `Accept: application/vnd.apache.arrow.stream` the data is streamed
+    as Arrow record batches instead, straight from the sidecar, without
+    rendering Excel.
     """
-    file_path = file_service.get_file_path(file_id)
+    if arrow:
+        if not await executor.run("download", file_service.can_stream, file_id):
+            raise HTTPException(
+                status_code=406,
+                detail="File data cannot be represented in Arrow; download Excel instead"
+            )
+        metadata = await executor.run("download", file_service.get_metadata, file_id)
+        return StreamingResponse(
+            columnar.iter_ipc_stream(file_service.get_sidecar_path(file_id)),
+            media_type=columnar.ARROW_STREAM_MEDIA_TYPE,
+            headers={
+                "Content-Disposition": f'attachment; filename="{file_id}.arrows"',
+                "X-Total-Rows": str(metadata["rows"])
+            }
+        )
+    
+    file_path = await executor.run("download", file_service.materialize_excel, file_id)
     
     # Get the original filename with extension
     filename = f"{file_id}{file_path.suffix}"
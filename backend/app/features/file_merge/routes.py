@@ -1,17 +1,19 @@
 """API routes for file merge feature."""
 from fastapi import APIRouter
 
-from app.core.dependencies import FileServiceDep
+from app.core.dependencies import FileServiceDep, AsyncJobDep
+from app.core.jobs import run_operation, ASYNC_JOB_RESPONSES
 from app.features.file_merge.service import FileMergeService
 from app.features.file_merge.schemas import FileMergeRequest, FileMergeResponse
 
 router = APIRouter(prefix="/api", tags=["File Merge"])
 
 
-@router.post("/merge", response_model=FileMergeResponse)
+@router.post("/merge", response_model=FileMergeResponse, responses=ASYNC_JOB_RESPONSES)
 async def merge_files(
     request: FileMergeRequest,
-    file_service: FileServiceDep = None
+    file_service: FileServiceDep = None,
+    run_async: AsyncJobDep = False
 ):
     """
     Merge multiple Excel files into one.
@@ -20,4 +22,4 @@ async def merge_files(
     Returns a new file_id for the merged file.
     """
     service = FileMergeService(file_service)
-    return service.merge_files(request)
+    return await run_operation("merge", service.merge_files, request, run_async=run_async)
@@ -1,11 +1,34 @@
 """Pydantic schemas for file merge feature."""
+from enum import Enum
 from pydantic import BaseModel, Field
 
 
+class ColumnAlignment(str, Enum):
+    """Which columns the merged file has."""
+    
+    UNION = "union"  # Every column of any file; missing values are empty
+    INTERSECT = "intersect"  # Only columns present in every file
+
+
+class DtypeReconciliation(str, Enum):
+    """How a column whose type differs between files is stored."""
+    
+    COMMON = "common"  # Widest type holding every file's values (as pandas.concat)
+    STRING = "string"  # Text
+
+
 class FileMergeRequest(BaseModel):
     """Request for merging multiple files."""
     
     file_ids: list[str] = Field(..., description="List of file IDs to merge", min_length=2)
+    columns: ColumnAlignment = Field(
+        default=ColumnAlignment.UNION,
+        description="union: all columns, intersect: only columns every file has"
+    )
+    dtype_reconciliation: DtypeReconciliation = Field(
+        default=DtypeReconciliation.COMMON,
+        description="common: widen to a shared type, string: store conflicting columns as text"
+    )
 
 
 class FileMergeResponse(BaseModel):
@@ -14,4 +37,8 @@ class FileMergeResponse(BaseModel):
     file_id: str = Field(..., description="New file identifier with merged data")
     files_merged: int = Field(..., description="Number of files merged")
     total_rows: int = Field(..., description="Total rows in merged file")
+    reconciled_columns: list[str] = Field(
+        default_factory=list,
+        description="Columns whose type differed between files"
+    )
     message: str = Field(default="Files merged successfully")
@@ -1,8 +1,75 @@
 """Service layer for file merge operations."""
+from typing import Iterator
+
+import numpy as np
 import pandas as pd
+from pandas.api.types import pandas_dtype
+from pandas.core.dtypes.cast import ensure_dtype_can_hold_na, find_common_type
 
+from app.core.result_cache import memoize_result
 from app.shared.file_service import FileService
-from app.features.file_merge.schemas import FileMergeRequest, FileMergeResponse
+from app.features.file_merge.schemas import (
+    ColumnAlignment,
+    DtypeReconciliation,
+    FileMergeRequest,
+    FileMergeResponse
+)
+
+
+def merged_schema(
+    metadata: list[dict],
+    alignment: ColumnAlignment
+) -> tuple[list[str], dict[str, np.dtype], list[str]]:
+    """
+    Work out the columns and dtypes of the merged file from the inputs' metadata.
+    
+    Dtypes follow pandas.concat: the common type of the files' dtypes,
+    widened to hold missing values when some file lacks the column.
+    
+    Args:
+        metadata: Metadata of each input file (see FileService.get_metadata)
+        alignment: Union or intersection of the files' columns
+        
+    Returns:
+        Tuple of (columns in order of first appearance, dtype by column,
+        columns whose dtype differs between files)
+    """
+    if alignment == ColumnAlignment.UNION:
+        columns = list(dict.fromkeys(col for meta in metadata for col in meta["columns"]))
+    else:
+        shared = set.intersection(*(set(meta["columns"]) for meta in metadata))
+        columns = [col for col in metadata[0]["columns"] if col in shared]
+    
+    dtypes = {}
+    conflicts = []
+    for col in columns:
+        having = [meta for meta in metadata if col in meta["dtypes"]]
+        # Files without rows do not affect the dtype, as in pandas.concat
+        col_dtypes = [pandas_dtype(meta["dtypes"][col]) for meta in having if meta["rows"]]
+        col_dtypes = col_dtypes or [pandas_dtype(meta["dtypes"][col]) for meta in having]
+        dtype = find_common_type(col_dtypes)
+        if any(meta["rows"] and col not in meta["dtypes"] for meta in metadata):
+            dtype = ensure_dtype_can_hold_na(dtype)
+        if len(set(col_dtypes)) > 1:
+            conflicts.append(col)
+        dtypes[col] = dtype
+    return columns, dtypes, conflicts
+
+
+def align_batch(
+    batch: pd.DataFrame,
+    columns: list[str],
+    dtypes: dict[str, np.dtype],
+    text_columns: set[str]
+) -> pd.DataFrame:
+    """Give a batch of one input file the merged file's columns and dtypes."""
+    batch = batch.reindex(columns=columns)
+    for col in columns:
+        if col in text_columns:
+            batch[col] = batch[col].map(str, na_action="ignore").astype(object)
+        elif batch[col].dtype != dtypes[col]:
+            batch[col] = batch[col].astype(dtypes[col])
+    return batch
 
 
 class FileMergeService:
@@ -11,31 +78,59 @@ class FileMergeService:
     def __init__(self, file_service: FileService):
         self.file_service = file_service
     
+    @memoize_result("merge")
     def merge_files(self, request: FileMergeRequest) -> FileMergeResponse:
         """
         Merge multiple Excel files into one.
         
+        Inputs are parsed in parallel across the process pool, then
+        streamed batch by batch, in input order, into the merged file, so
+        no input is held in memory whole. Inputs that cannot be stored in
+        Arrow, or columns that would mix numbers and text, are merged in
+        memory instead.
+        
         Args:
             request: FileMergeRequest with list of file_ids
             
         Returns:
             FileMergeResponse with new file_id
         """
-        # Load all DataFrames
-        dataframes = []
-        for file_id in request.file_ids:
-            df = self.file_service.load_excel(file_id)
-            dataframes.append(df)
+        metadata = self.file_service.prepare_files(request.file_ids)
+        columns, dtypes, conflicts = merged_schema(metadata, request.columns)
         
-        # Concatenate all DataFrames
-        merged_df = pd.concat(dataframes, ignore_index=True)
+        text_columns = set()
+        if request.dtype_reconciliation == DtypeReconciliation.STRING:
+            text_columns = set(conflicts)
+        total_rows = sum(meta["rows"] for meta in metadata)
         
-        # Save merged file
-        new_file_id = self.file_service.save_dataframe(merged_df, request.file_ids[0])
+        # Object columns fed by typed columns may mix value types Arrow cannot store
+        mixed = [col for col in conflicts if dtypes[col] == object and col not in text_columns]
+        streamable = not mixed and all(
+            self.file_service.get_sidecar_path(file_id).exists() for file_id in request.file_ids
+        )
+        
+        if streamable:
+            def batches() -> Iterator[pd.DataFrame]:
+                for file_id, meta in zip(request.file_ids, metadata):
+                    present = [col for col in columns if col in meta["dtypes"]]
+                    for batch in self.file_service.iter_batches(file_id, columns=present):
+                        yield align_batch(batch, columns, dtypes, text_columns)
+            
+            new_file_id = self.file_service.save_batches(batches(), request.file_ids[0], total_rows)
+        else:
+            merged_df = pd.concat(
+                [
+                    align_batch(self.file_service.load_excel(file_id), columns, dtypes, text_columns)
+                    for file_id in request.file_ids
+                ],
+                ignore_index=True
+            )
+            new_file_id = self.file_service.save_dataframe(merged_df, request.file_ids[0])
         
         return FileMergeResponse(
             file_id=new_file_id,
             files_merged=len(request.file_ids),
-            total_rows=len(merged_df),
+            total_rows=total_rows,
+            reconciled_columns=conflicts,
             message="Files merged successfully"
         )
@@ -1,9 +1,11 @@
 """API routes for file preview feature."""
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Response
 
-from app.core.dependencies import FileServiceDep
+from app.core.dependencies import ArrowAcceptDep, FileServiceDep
+from app.core.executor import executor
 from app.features.file_preview.service import FilePreviewService
-from app.features.file_preview.schemas import PreviewResponse
+from app.features.file_preview.schemas import PreviewFormat, PreviewResponse
+from app.shared.columnar import ARROW_STREAM_MEDIA_TYPE
 
 router = APIRouter(prefix="/api", tags=["File Preview"])
 
@@ -12,12 +14,36 @@ router = APIRouter(prefix="/api", tags=["File Preview"])
 async def preview_file(
     file_id: str,
     file_service: FileServiceDep,
-    max_rows: int = Query(default=50, ge=1, le=1000, description="Maximum rows to preview")
+    max_rows: int = Query(default=50, ge=1, le=1000, description="Maximum rows to preview"),
+    offset: int = Query(default=0, ge=0, description="Index of the first row to return"),
+    limit: int | None = Query(default=None, ge=1, le=5000, description="Rows per page (overrides max_rows)"),
+    columns: list[str] | None = Query(default=None, description="Only these columns (repeat the parameter)"),
+    format: PreviewFormat = Query(default=PreviewFormat.RECORDS, description="records or columnar"),
+    arrow: ArrowAcceptDep = False
 ):
     """
-    Get a preview of the Excel file data.
+    Get a page of the Excel file data.
     
-    Returns the first N rows as JSON for display in the frontend.
+    Returns rows offset..offset+limit (the first max_rows by default) as
+    JSON for display in the frontend. Pages are read from the cached
+    columnar copy of the file, so deep pages are as fast as the first.
+    The columnar format returns one list per column under `values`,
+    which is smaller and faster to produce than per-row objects.
+    
+    With `Accept: application/vnd.apache.arrow.stream` the page is
+    returned as Arrow record batches instead (total rows and offset in
+    the X-Total-Rows and X-Offset headers).
     """
     service = FilePreviewService(file_service)
-    return service.get_preview(file_id, max_rows)
+    if arrow:
+        content, total_rows = await executor.run(
+            "preview", service.get_preview_arrow, file_id, limit or max_rows, offset, columns
+        )
+        return Response(
+            content=content,
+            media_type=ARROW_STREAM_MEDIA_TYPE,
+            headers={"X-Total-Rows": str(total_rows), "X-Offset": str(offset)}
+        )
+    return await executor.run(
+        "preview", service.get_preview, file_id, limit or max_rows, offset, columns, format
+    )
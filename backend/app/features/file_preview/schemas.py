@@ -1,13 +1,28 @@
 """Pydantic schemas for file preview feature."""
+from enum import Enum
 from pydantic import BaseModel, Field
 from typing import Any
 
 
+class PreviewFormat(str, Enum):
+    """Shape of the rows in a preview response."""
+    
+    RECORDS = "records"  # data: one object per row
+    COLUMNAR = "columnar"  # values: one list per column, in columns order
+
+
 class PreviewResponse(BaseModel):
     """Response for file preview."""
     
     file_id: str = Field(..., description="File identifier")
     columns: list[str] = Field(..., description="Column names")
-    data: list[dict[str, Any]] = Field(..., description="Preview data rows")
+    dtypes: dict[str, str] = Field(default_factory=dict, description="Inferred pandas dtype by column")
+    sheets: list[str] = Field(default_factory=list, description="Worksheet names (data is from the first)")
+    data: list[dict[str, Any]] = Field(..., description="Preview data rows (records format)")
+    values: list[list[Any]] | None = Field(
+        default=None,
+        description="Preview data as one list per column, in columns order (columnar format)"
+    )
+    offset: int = Field(default=0, description="Index of the first row in the preview")
     total_rows: int = Field(..., description="Total rows in file")
     preview_rows: int = Field(..., description="Number of rows in preview")
@@ -1,6 +1,7 @@
 """Service layer for file preview operations."""
+from app.shared import columnar
 from app.shared.file_service import FileService
-from app.features.file_preview.schemas import PreviewResponse
+from app.features.file_preview.schemas import PreviewFormat, PreviewResponse
 
 
 class FilePreviewService:
@@ -9,28 +10,65 @@ class FilePreviewService:
     def __init__(self, file_service: FileService):
         self.file_service = file_service
     
-    def get_preview(self, file_id: str, max_rows: int = 50) -> PreviewResponse:
+    def get_preview(
+        self,
+        file_id: str,
+        max_rows: int = 50,
+        offset: int = 0,
+        columns: list[str] | None = None,
+        format: PreviewFormat = PreviewFormat.RECORDS
+    ) -> PreviewResponse:
         """
-        Get preview data from an Excel file.
+        Get a page of preview data from an Excel file.
         
         Args:
             file_id: The file identifier
             max_rows: Maximum number of rows to return
+            offset: Index of the first row to return
+            columns: Only these columns, in this order (default all)
+            format: Return rows as records or as one list per column
             
         Returns:
             PreviewResponse with column names and data
         """
         # Get preview data and total rows efficiently
-        df, total_rows = self.file_service.get_excel_preview(file_id, max_rows)
+        df, total_rows = self.file_service.get_excel_preview(file_id, max_rows, offset, columns)
+        metadata = self.file_service.get_metadata(file_id)
         
-        # Convert to list of dictionaries
-        # Handle NaN values by converting to None
-        data = df.fillna("").to_dict(orient="records")
+        # Empty cells become "" (via object: nullable dtypes such as boolean or Int8 reject "")
+        df = df.astype(object).where(df.notna(), "")
+        if format == PreviewFormat.COLUMNAR:
+            # Plain lists per column avoid building one dict per row
+            data = []
+            values = [df.iloc[:, position].tolist() for position in range(df.shape[1])]
+        else:
+            data = df.to_dict(orient="records")
+            values = None
         
         return PreviewResponse(
             file_id=file_id,
             columns=df.columns.tolist(),
+            dtypes={col: metadata["dtypes"][col] for col in df.columns if col in metadata["dtypes"]},
+            sheets=metadata["sheets"],
             data=data,
+            values=values,
+            offset=offset,
             total_rows=total_rows,
             preview_rows=int(len(df))
         )
+    
+    def get_preview_arrow(
+        self,
+        file_id: str,
+        max_rows: int = 50,
+        offset: int = 0,
+        columns: list[str] | None = None
+    ) -> tuple[bytes, int]:
+        """
+        Get a page of preview data as an Arrow IPC stream.
+        
+        Returns:
+            Tuple of (IPC stream bytes, total rows in file)
+        """
+        table, total_rows = self.file_service.get_preview_table(file_id, max_rows, offset, columns)
+        return columnar.table_to_ipc_stream(table), total_rows
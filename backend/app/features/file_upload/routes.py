@@ -1,9 +1,13 @@
 """API routes for file upload feature."""
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, UploadFile, File, Request, Query
 
 from app.core.dependencies import FileServiceDep
 from app.features.file_upload.service import FileUploadService
-from app.features.file_upload.schemas import UploadResponse
+from app.features.file_upload.schemas import (
+    UploadResponse,
+    UploadInitRequest,
+    UploadStatusResponse
+)
 
 router = APIRouter(prefix="/api", tags=["File Upload"])
 
@@ -20,3 +24,47 @@ async def upload_file(
     """
     service = FileUploadService(file_service)
     return await service.upload_file(file)
+
+
+@router.post("/upload/init", response_model=UploadStatusResponse)
+async def init_upload(request: UploadInitRequest, file_service: FileServiceDep = None):
+    """
+    Start a chunked (resumable) upload for large workbooks.
+    
+    Send the file in parts to /api/upload/{upload_id}/part, then call
+    /api/upload/{upload_id}/complete to receive the file_id.
+    """
+    service = FileUploadService(file_service)
+    return service.init_upload(request)
+
+
+@router.get("/upload/{upload_id}", response_model=UploadStatusResponse)
+async def get_upload_status(upload_id: str, file_service: FileServiceDep = None):
+    """Get the bytes received so far, i.e. the offset to resume from."""
+    service = FileUploadService(file_service)
+    return service.get_upload_status(upload_id)
+
+
+@router.post("/upload/{upload_id}/part", response_model=UploadStatusResponse)
+async def upload_part(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Byte offset of this part"),
+    file_service: FileServiceDep = None
+):
+    """
+    Append a part to a chunked upload.
+    
+    The raw request body is the part's bytes and is written to disk as it
+    arrives. offset must equal the bytes received so far; after a failed
+    part, resume from the received_bytes reported by GET /api/upload/{upload_id}.
+    """
+    service = FileUploadService(file_service)
+    return await service.upload_part(upload_id, offset, request.stream())
+
+
+@router.post("/upload/{upload_id}/complete", response_model=UploadResponse)
+async def complete_upload(upload_id: str, file_service: FileServiceDep = None):
+    """Finish a chunked upload and receive the file_id."""
+    service = FileUploadService(file_service)
+    return await service.complete_upload(upload_id)
@@ -7,4 +7,25 @@ class UploadResponse(BaseModel):
     
     file_id: str = Field(..., description="Unique identifier for the uploaded file")
     filename: str = Field(..., description="Original filename")
+    sha256: str | None = Field(default=None, description="SHA-256 of the uploaded content")
+    column_types: dict[str, str] | None = Field(
+        default=None,
+        description="Type inferred for each column from a sample of rows (string, integer, float, boolean, datetime)"
+    )
     message: str = Field(default="File uploaded successfully")
+
+
+class UploadInitRequest(BaseModel):
+    """Request to start a chunked (resumable) upload."""
+    
+    filename: str = Field(..., min_length=1, description="Original filename")
+    total_size: int | None = Field(default=None, ge=1, description="Total size in bytes, if known")
+
+
+class UploadStatusResponse(BaseModel):
+    """State of a chunked upload."""
+    
+    upload_id: str = Field(..., description="Chunked upload identifier")
+    received_bytes: int = Field(..., description="Bytes received; the next part starts at this offset")
+    chunk_size: int = Field(..., description="Recommended part size in bytes")
+    max_size_bytes: int = Field(..., description="Maximum total upload size in bytes")
@@ -1,8 +1,16 @@
 """Service layer for file upload operations."""
-from fastapi import UploadFile
+from typing import AsyncIterator
 
+from fastapi import HTTPException, UploadFile
+
+from app.core.config import settings
+from app.core.executor import executor
 from app.shared.file_service import FileService
-from app.features.file_upload.schemas import UploadResponse
+from app.features.file_upload.schemas import (
+    UploadResponse,
+    UploadInitRequest,
+    UploadStatusResponse
+)
 
 
 class FileUploadService:
@@ -21,10 +29,62 @@ class FileUploadService:
         Returns:
             UploadResponse with file_id and filename
         """
-        file_id, _ = await self.file_service.save_upload(file)
+        file_id, _, content_hash = await self.file_service.save_upload(file)
+        metadata = await self._index(file_id)
         
         return UploadResponse(
             file_id=file_id,
             filename=file.filename,
+            sha256=content_hash,
+            column_types=metadata and metadata.get("inferred_types"),
+            message="File uploaded successfully"
+        )
+    
+    async def _index(self, file_id: str) -> dict | None:
+        """
+        Build the file's metadata index so previews need not open the workbook.
+        
+        Failures are left to the first operation on the file to report, as
+        before indexing existed.
+        
+        Returns:
+            The metadata, or None if the file could not be indexed
+        """
+        try:
+            return await executor.run("index", self.file_service.index_file, file_id)
+        except HTTPException:
+            return None
+    
+    def _status(self, upload_id: str, received_bytes: int) -> UploadStatusResponse:
+        return UploadStatusResponse(
+            upload_id=upload_id,
+            received_bytes=received_bytes,
+            chunk_size=settings.upload_chunk_size_kb * 1024,
+            max_size_bytes=settings.max_file_size_mb * 1024 * 1024
+        )
+    
+    def init_upload(self, request: UploadInitRequest) -> UploadStatusResponse:
+        """Start a chunked upload."""
+        upload_id = self.file_service.init_chunked_upload(request.filename, request.total_size)
+        return self._status(upload_id, 0)
+    
+    def get_upload_status(self, upload_id: str) -> UploadStatusResponse:
+        """Report how many bytes of a chunked upload have been received."""
+        return self._status(upload_id, self.file_service.get_upload_offset(upload_id))
+    
+    async def upload_part(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> UploadStatusResponse:
+        """Append one part of a chunked upload."""
+        received = await self.file_service.append_upload_part(upload_id, offset, chunks)
+        return self._status(upload_id, received)
+    
+    async def complete_upload(self, upload_id: str) -> UploadResponse:
+        """Assemble a chunked upload into a file_id."""
+        file_id, _, content_hash, filename = self.file_service.complete_chunked_upload(upload_id)
+        metadata = await self._index(file_id)
+        return UploadResponse(
+            file_id=file_id,
+            filename=filename,
+            sha256=content_hash,
+            column_types=metadata and metadata.get("inferred_types"),
             message="File uploaded successfully"
         )
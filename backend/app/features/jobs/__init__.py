@@ -0,0 +1 @@
+# Async Jobs Feature
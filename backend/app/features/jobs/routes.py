@@ -0,0 +1,63 @@
+"""API routes for async jobs feature."""
+import asyncio
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from app.core.jobs import Job, job_manager
+from app.features.jobs.schemas import JobStatusResponse
+
+router = APIRouter(prefix="/api", tags=["Jobs"])
+
+# How often the event stream checks a job for changes
+EVENT_POLL_SECONDS = 0.25
+
+
+def _to_response(job: Job) -> JobStatusResponse:
+    return JobStatusResponse(
+        job_id=job.job_id,
+        operation=job.operation,
+        status=job.status.value,
+        stage=job.stage,
+        rows_processed=job.rows_processed,
+        rows_total=job.rows_total,
+        percent=job.percent,
+        elapsed_seconds=job.elapsed_seconds,
+        file_ids=job.file_ids,
+        result=job.result,
+        error=job.error
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """
+    Get the status of an async job.
+    
+    Operations submitted with ?async=true return a job_id; poll this endpoint
+    until status is completed (file_ids holds the result) or failed.
+    """
+    return _to_response(job_manager.get(job_id))
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Stream job progress as Server-Sent Events.
+    
+    Sends the job status whenever it changes and closes the stream once
+    the job has completed or failed.
+    """
+    job = job_manager.get(job_id)
+    
+    async def events():
+        last_version = -1
+        while True:
+            if job.version != last_version:
+                last_version = job.version
+                yield f"data: {_to_response(job).model_dump_json()}\n\n"
+            if job.is_finished and job.version == last_version:
+                break
+            await asyncio.sleep(EVENT_POLL_SECONDS)
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -0,0 +1,19 @@
+"""Pydantic schemas for async jobs feature."""
+from pydantic import BaseModel, Field
+from typing import Any
+
+
+class JobStatusResponse(BaseModel):
+    """Status and progress of an async job."""
+    
+    job_id: str = Field(..., description="Job identifier")
+    operation: str = Field(..., description="Operation being run")
+    status: str = Field(..., description="queued, running, completed or failed")
+    stage: str | None = Field(default=None, description="Current stage (e.g. reading, writing)")
+    rows_processed: int = Field(..., description="Rows handled so far in the current stage")
+    rows_total: int | None = Field(default=None, description="Rows expected in the current stage")
+    percent: float | None = Field(default=None, description="Percent complete of the current stage")
+    elapsed_seconds: float = Field(..., description="Time since the job started")
+    file_ids: list[str] = Field(default_factory=list, description="Resulting file identifiers")
+    result: dict[str, Any] | None = Field(default=None, description="Operation response once completed")
+    error: str | None = Field(default=None, description="Error message if the job failed")
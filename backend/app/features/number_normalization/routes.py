@@ -1,7 +1,8 @@
 """API routes for number normalization feature."""
 from fastapi import APIRouter
 
-from app.core.dependencies import FileServiceDep
+from app.core.dependencies import FileServiceDep, AsyncJobDep
+from app.core.jobs import run_operation, ASYNC_JOB_RESPONSES
 from app.features.number_normalization.service import NumberNormalizationService
 from app.features.number_normalization.schemas import (
     NumberNormalizationRequest,
@@ -11,16 +12,19 @@ from app.features.number_normalization.schemas import (
 router = APIRouter(prefix="/api", tags=["Number Normalization"])
 
 
-@router.post("/normalize-numbers", response_model=NumberNormalizationResponse)
+@router.post("/normalize-numbers", response_model=NumberNormalizationResponse, responses=ASYNC_JOB_RESPONSES)
 async def normalize_numbers(
     request: NumberNormalizationRequest,
-    file_service: FileServiceDep = None
+    file_service: FileServiceDep = None,
+    run_async: AsyncJobDep = False
 ):
     """
-    Convert Persian digits (۰-۹) to English (0-9) or vice versa.
+    Convert Persian and Arabic-Indic digits to English (0-9) or English to Persian (۰-۹) in text columns.
     
-    Useful for standardizing number formats across different locales.
+    Number and date columns are left unchanged. Options also unify
+    Arabic yeh/kaf with the Persian letters, clean up ZWNJs and store
+    columns that are all numbers as numbers.
     Returns a new file_id with normalized data.
     """
     service = NumberNormalizationService(file_service)
-    return service.normalize_numbers(request)
+    return await run_operation("normalize_numbers", service.normalize_numbers, request, run_async=run_async)
@@ -9,6 +9,13 @@ class NormalizationDirection(str, Enum):
     ENGLISH_TO_PERSIAN = "english_to_persian"
 
 
+class ZwnjHandling(str, Enum):
+    """What happens to zero-width non-joiners (ZWNJ, U+200C)."""
+    KEEP = "keep"
+    TIDY = "tidy"  # Drop repeated ZWNJs and ZWNJs at word edges
+    REMOVE = "remove"
+
+
 class NumberNormalizationRequest(BaseModel):
     """Request for number normalization."""
     
@@ -21,11 +28,25 @@ class NumberNormalizationRequest(BaseModel):
         ...,
         description="Direction of normalization"
     )
+    normalize_letters: bool = Field(
+        default=False,
+        description="Replace Arabic yeh and kaf (ي ى ك) with the Persian letters"
+    )
+    zwnj: ZwnjHandling = Field(default=ZwnjHandling.KEEP, description="Handling of zero-width non-joiners")
+    parse_numbers: bool = Field(
+        default=False,
+        description="Store text columns whose values are all numbers after normalization as numbers (persian_to_english only)"
+    )
 
 
 class NumberNormalizationResponse(BaseModel):
     """Response after number normalization."""
     
     file_id: str = Field(..., description="New file identifier")
-    columns_processed: int = Field(..., description="Number of columns processed")
+    columns_processed: int = Field(..., description="Number of text columns normalized")
+    skipped_columns: list[str] = Field(
+        default_factory=list,
+        description="Requested columns left unchanged because they hold numbers or dates"
+    )
+    parsed_columns: list[str] = Field(default_factory=list, description="Text columns stored as numbers")
     message: str = Field(default="Number normalization completed successfully")
@@ -1,28 +1,84 @@
 """Service layer for number normalization operations."""
+import numpy as np
 import pandas as pd
 from fastapi import HTTPException
 
+from app.core.result_cache import memoize_result
 from app.shared.file_service import FileService
+from app.shared.text_normalization import (
+    ARABIC_DECIMAL_SEPARATOR,
+    ARABIC_DIGITS,
+    ARABIC_LETTER_VARIANTS,
+    ARABIC_THOUSANDS_SEPARATOR,
+    ASCII_DIGITS,
+    PERSIAN_DIGITS,
+    ZWNJ,
+    NormalizationRules,
+    normalize_text,
+    parse_numbers
+)
 from app.features.number_normalization.schemas import (
     NumberNormalizationRequest,
     NumberNormalizationResponse,
-    NormalizationDirection
+    NormalizationDirection,
+    ZwnjHandling
 )
 
+# Largest magnitude stored as an integer when parsing numbers (exact in float64)
+MAX_EXACT_INTEGER = 2 ** 53
+
+
+def normalization_rules(request: NumberNormalizationRequest) -> NormalizationRules:
+    """Character rules for a normalization request."""
+    if request.direction == NormalizationDirection.PERSIAN_TO_ENGLISH:
+        # Persian and Arabic-Indic digits and the Arabic separators become ASCII
+        mapping = list(zip(
+            PERSIAN_DIGITS + ARABIC_DIGITS + ARABIC_DECIMAL_SEPARATOR + ARABIC_THOUSANDS_SEPARATOR,
+            ASCII_DIGITS * 2 + ".,"
+        ))
+        digit_separators = ()
+    else:
+        mapping = list(zip(ASCII_DIGITS + ARABIC_DIGITS, PERSIAN_DIGITS * 2))
+        # Only inside numbers, so "Mr. Smith" or "a,b" keep their punctuation
+        digit_separators = ((".", ARABIC_DECIMAL_SEPARATOR), (",", ARABIC_THOUSANDS_SEPARATOR))
+    if request.normalize_letters:
+        mapping += ARABIC_LETTER_VARIANTS.items()
+    return NormalizationRules(
+        mapping=tuple(mapping),
+        delete=ZWNJ if request.zwnj == ZwnjHandling.REMOVE else "",
+        tidy_zwnj=request.zwnj == ZwnjHandling.TIDY,
+        digit_separators=digit_separators
+    )
+
+
+def _number_profile(values: pd.Series) -> tuple[bool, bool, bool]:
+    """(every value is a number, some value is, all are integers with none missing) for normalized text."""
+    numbers, not_numbers = parse_numbers(values)
+    present = numbers.notna()
+    integral = bool(
+        present.all()
+        and (numbers % 1 == 0).all()
+        and (numbers.abs() <= MAX_EXACT_INTEGER).all()
+    )
+    return not not_numbers.any(), bool(present.any()), integral
+
 
 class NumberNormalizationService:
     """Business logic for converting Persian/English numbers."""
     
-    # Persian to English digit mapping
-    PERSIAN_TO_ENGLISH_MAP = str.maketrans('۰۱۲۳۴۵۶۷۸۹', '0123456789')
-    ENGLISH_TO_PERSIAN_MAP = str.maketrans('0123456789', '۰۱۲۳۴۵۶۷۸۹')
-    
     def __init__(self, file_service: FileService):
         self.file_service = file_service
     
+    @memoize_result("normalize_numbers")
     def normalize_numbers(self, request: NumberNormalizationRequest) -> NumberNormalizationResponse:
         """
-        Convert Persian digits to English or vice versa.
+        Normalize digits (and optionally letters and ZWNJs) in text columns.
+        
+        Only text columns are touched: number and date columns are left
+        as they are instead of being turned into text. The file is
+        streamed batch by batch, so memory use does not grow with its
+        size; with parse_numbers, a first pass over the text columns
+        decides which of them become number columns.
         
         Args:
             request: NumberNormalizationRequest
@@ -30,36 +86,120 @@ class NumberNormalizationService:
         Returns:
             NumberNormalizationResponse with new file_id
         """
-        # Load DataFrame
-        df = self.file_service.load_excel(request.file_id)
+        metadata = self.file_service.get_metadata(request.file_id)
+        columns = self._select_columns(metadata["columns"], request)
+        text_columns = [col for col in columns if metadata["dtypes"][col] == "object"]
+        rules = normalization_rules(request)
+        
+        number_dtypes = {}
+        if request.parse_numbers and text_columns:
+            number_dtypes = self._number_dtypes(
+                (
+                    self._normalize_columns(batch, text_columns, rules)
+                    for batch in self.file_service.iter_batches(request.file_id, columns=text_columns)
+                ),
+                text_columns
+            )
+        
+        def normalize_batch(batch: pd.DataFrame) -> pd.DataFrame:
+            return self.normalize_dataframe(batch, request, number_dtypes)[0]
         
-        # Determine columns to process
+        new_file_id = self.file_service.map_batches(request.file_id, normalize_batch)
+        
+        return NumberNormalizationResponse(
+            file_id=new_file_id,
+            columns_processed=len(text_columns),
+            skipped_columns=[col for col in columns if col not in text_columns],
+            parsed_columns=list(number_dtypes),
+            message="Number normalization completed successfully"
+        )
+    
+    def _select_columns(self, columns: list[str], request: NumberNormalizationRequest) -> list[str]:
+        """
+        Columns a request applies to.
+        
+        Raises:
+            HTTPException: If a requested column does not exist, or
+                parse_numbers is asked for with english_to_persian
+        """
+        if request.parse_numbers and request.direction != NormalizationDirection.PERSIAN_TO_ENGLISH:
+            raise HTTPException(
+                status_code=400,
+                detail="parse_numbers requires direction persian_to_english"
+            )
         if request.columns:
-            missing_cols = set(request.columns) - set(df.columns)
+            missing_cols = set(request.columns) - set(columns)
             if missing_cols:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Columns not found: {missing_cols}"
                 )
-            columns_to_process = request.columns
-        else:
-            columns_to_process = df.columns.tolist()
+            return request.columns
+        return list(columns)
+    
+    def _normalize_columns(self, df: pd.DataFrame, text_columns: list[str], rules: NormalizationRules) -> pd.DataFrame:
+        """Normalize text columns of a DataFrame in place."""
+        for col in text_columns:
+            df[col] = normalize_text(df[col], rules)
+        return df
+    
+    def _number_dtypes(self, batches, text_columns: list[str]) -> dict[str, str]:
+        """
+        dtype of each text column whose normalized values are all numbers.
         
-        # Select translation map
-        if request.direction == NormalizationDirection.PERSIAN_TO_ENGLISH:
-            trans_map = self.PERSIAN_TO_ENGLISH_MAP
-        else:
-            trans_map = self.ENGLISH_TO_PERSIAN_MAP
+        Args:
+            batches: Normalized DataFrames holding text_columns (the whole data, in parts)
+            text_columns: Candidate columns
+            
+        Returns:
+            "int64" or "float64" by column, for columns with at least one number
+        """
+        profiles = {col: (True, False, True) for col in text_columns}
+        for batch in batches:
+            for col, (parses, has_numbers, integral) in list(profiles.items()):
+                batch_parses, batch_has_numbers, batch_integral = _number_profile(batch[col])
+                if not batch_parses:
+                    del profiles[col]
+                else:
+                    profiles[col] = (True, has_numbers or batch_has_numbers, integral and batch_integral)
+        return {
+            col: "int64" if integral else "float64"
+            for col, (_, has_numbers, integral) in profiles.items()
+            if has_numbers
+        }
+    
+    def normalize_dataframe(
+        self,
+        df: pd.DataFrame,
+        request: NumberNormalizationRequest,
+        number_dtypes: dict[str, str] | None = None
+    ) -> tuple[pd.DataFrame, int]:
+        """
+        Normalize the text columns of a loaded DataFrame.
         
-        # Apply normalization
-        for col in columns_to_process:
-            df[col] = df[col].astype(str).apply(lambda x: x.translate(trans_map))
+        Args:
+            df: Data to normalize
+            request: NumberNormalizationRequest
+            number_dtypes: Columns to parse as numbers and their dtypes,
+                decided over the whole file; computed from df when None
+                and request.parse_numbers is set
+                
+        Returns:
+            Tuple of (normalized DataFrame, number of text columns normalized)
+            
+        Raises:
+            HTTPException: If a requested column does not exist
+        """
+        columns = self._select_columns(df.columns, request)
+        text_columns = [col for col in columns if df[col].dtype == object]
+        rules = normalization_rules(request)
         
-        # Save to new file
-        new_file_id = self.file_service.save_dataframe(df, request.file_id)
+        df = self._normalize_columns(df, text_columns, rules)
         
-        return NumberNormalizationResponse(
-            file_id=new_file_id,
-            columns_processed=len(columns_to_process),
-            message="Number normalization completed successfully"
-        )
+        if request.parse_numbers:
+            if number_dtypes is None:
+                number_dtypes = self._number_dtypes([df], text_columns)
+            for col, dtype in number_dtypes.items():
+                df[col] = parse_numbers(df[col])[0].astype(np.dtype(dtype))
+        
+        return df, len(text_columns)
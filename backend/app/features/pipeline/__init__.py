@@ -0,0 +1 @@
+# Pipeline Feature
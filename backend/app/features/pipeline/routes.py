@@ -0,0 +1,28 @@
+"""API routes for pipeline feature."""
+from fastapi import APIRouter
+
+from app.core.dependencies import FileServiceDep, AsyncJobDep
+from app.core.jobs import run_operation, ASYNC_JOB_RESPONSES
+from app.features.pipeline.service import PipelineService
+from app.features.pipeline.schemas import PipelineRequest, PipelineResponse
+
+router = APIRouter(prefix="/api", tags=["Pipeline"])
+
+
+@router.post("/pipeline", response_model=PipelineResponse, responses=ASYNC_JOB_RESPONSES)
+async def run_pipeline(
+    request: PipelineRequest,
+    file_service: FileServiceDep = None,
+    run_async: AsyncJobDep = False
+):
+    """
+    Run several operations on one file in a single pass.
+    
+    Each step names its operation (filter, sort, rename_columns,
+    delete_columns, reorder_columns, search_replace, convert_types,
+    calculated_column, normalize_numbers, deduplicate_merge) plus the fields
+    of that endpoint's request. The file is loaded once and only the final
+    result is saved, unless a step sets save=true.
+    """
+    service = PipelineService(file_service)
+    return await run_operation("pipeline", service.run_pipeline, request, run_async=run_async)
@@ -0,0 +1,115 @@
+"""Pydantic schemas for the pipeline feature."""
+from typing import Annotated, Literal, Union
+
+from pydantic import BaseModel, Field
+
+from app.features.calculated_columns.routes import CalculatedColumnRequest
+from app.features.column_management.routes import (
+    RenameColumnsRequest,
+    DeleteColumnsRequest,
+    ReorderColumnsRequest
+)
+from app.features.data_filtering.routes import DataFilteringRequest
+from app.features.deduplicate_merge.schemas import DeduplicateMergeRequest
+from app.features.number_normalization.schemas import NumberNormalizationRequest
+from app.features.search_replace.schemas import SearchReplaceRequest
+from app.features.sort_data.schemas import SortDataRequest
+from app.features.type_conversion.schemas import TypeConversionRequest
+
+
+class PipelineStepOptions(BaseModel):
+    """Fields shared by every pipeline step."""
+    
+    # Steps run on the pipeline's working data, so the request's file_id is not needed
+    file_id: str | None = Field(default=None, description="Ignored in pipeline steps")
+    save: bool = Field(
+        default=False,
+        description="Also store the data after this step and return its file_id"
+    )
+
+
+class FilterStep(PipelineStepOptions, DataFilteringRequest):
+    operation: Literal["filter"]
+
+
+class SortStep(PipelineStepOptions, SortDataRequest):
+    operation: Literal["sort"]
+
+
+class RenameColumnsStep(PipelineStepOptions, RenameColumnsRequest):
+    operation: Literal["rename_columns"]
+
+
+class DeleteColumnsStep(PipelineStepOptions, DeleteColumnsRequest):
+    operation: Literal["delete_columns"]
+
+
+class ReorderColumnsStep(PipelineStepOptions, ReorderColumnsRequest):
+    operation: Literal["reorder_columns"]
+
+
+class SearchReplaceStep(PipelineStepOptions, SearchReplaceRequest):
+    operation: Literal["search_replace"]
+
+
+class ConvertTypesStep(PipelineStepOptions, TypeConversionRequest):
+    operation: Literal["convert_types"]
+
+
+class CalculatedColumnStep(PipelineStepOptions, CalculatedColumnRequest):
+    operation: Literal["calculated_column"]
+
+
+class NormalizeNumbersStep(PipelineStepOptions, NumberNormalizationRequest):
+    operation: Literal["normalize_numbers"]
+
+
+class DeduplicateMergeStep(PipelineStepOptions, DeduplicateMergeRequest):
+    operation: Literal["deduplicate_merge"]
+
+
+PipelineStep = Annotated[
+    Union[
+        FilterStep,
+        SortStep,
+        RenameColumnsStep,
+        DeleteColumnsStep,
+        ReorderColumnsStep,
+        SearchReplaceStep,
+        ConvertTypesStep,
+        CalculatedColumnStep,
+        NormalizeNumbersStep,
+        DeduplicateMergeStep
+    ],
+    Field(discriminator="operation")
+]
+
+
+class PipelineRequest(BaseModel):
+    """Request for running several operations on one file in a single pass."""
+    
+    file_id: str = Field(..., description="File identifier")
+    steps: list[PipelineStep] = Field(
+        ...,
+        description="Operations to apply in order; each takes the fields of its endpoint's request",
+        min_length=1
+    )
+
+
+class PipelineStepResult(BaseModel):
+    """Outcome of one pipeline step."""
+    
+    operation: str = Field(..., description="Operation applied")
+    rows: int = Field(..., description="Number of rows after the step")
+    columns: int = Field(..., description="Number of columns after the step")
+    file_id: str | None = Field(default=None, description="File identifier of the intermediate result, if saved")
+
+
+class PipelineResponse(BaseModel):
+    """Response after running a pipeline."""
+    
+    file_id: str = Field(..., description="New file identifier with the final result")
+    original_rows: int = Field(..., description="Number of rows in the original file")
+    final_rows: int = Field(..., description="Number of rows in the result")
+    steps: list[PipelineStepResult] = Field(..., description="Per-step results")
+    message: str = Field(default="Pipeline completed successfully")
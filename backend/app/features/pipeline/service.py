@@ -0,0 +1,93 @@
+"""Service layer for pipeline operations."""
+from typing import Callable
+
+import pandas as pd
+
+from app.core.progress import report_progress
+from app.core.result_cache import memoize_result
+from app.shared.file_service import FileService
+from app.features.calculated_columns.routes import CalculatedColumnsService
+from app.features.column_management.routes import ColumnManagementService
+from app.features.data_filtering.routes import DataFilteringService
+from app.features.deduplicate_merge.service import DeduplicateMergeService
+from app.features.number_normalization.service import NumberNormalizationService
+from app.features.search_replace.service import SearchReplaceService
+from app.features.sort_data.service import SortDataService
+from app.features.type_conversion.service import TypeConversionService
+from app.features.pipeline.schemas import (
+    PipelineRequest,
+    PipelineResponse,
+    PipelineStep,
+    PipelineStepResult
+)
+
+
+class PipelineService:
+    """Business logic for chaining operations on one in-memory DataFrame."""
+    
+    def __init__(self, file_service: FileService):
+        self.file_service = file_service
+    
+    def _operations(self) -> dict[str, Callable[[pd.DataFrame, PipelineStep], pd.DataFrame]]:
+        """Map each step operation to the DataFrame-level method of its endpoint's service."""
+        columns = ColumnManagementService(self.file_service)
+        search_replace = SearchReplaceService(self.file_service)
+        normalization = NumberNormalizationService(self.file_service)
+        type_conversion = TypeConversionService(self.file_service)
+        return {
+            "filter": DataFilteringService(self.file_service).filter_dataframe,
+            "sort": SortDataService(self.file_service).sort_dataframe,
+            "rename_columns": columns.rename_dataframe_columns,
+            "delete_columns": columns.delete_dataframe_columns,
+            "reorder_columns": columns.reorder_dataframe_columns,
+            "search_replace": lambda df, step: search_replace.replace_in_dataframe(df, step)[0],
+            "convert_types": lambda df, step: type_conversion.convert_dataframe(df, step)[0],
+            "calculated_column": CalculatedColumnsService(self.file_service).add_calculated_column,
+            "normalize_numbers": lambda df, step: normalization.normalize_dataframe(df, step)[0],
+            "deduplicate_merge": DeduplicateMergeService(self.file_service).deduplicate_dataframe
+        }
+    
+    @memoize_result("pipeline")
+    def run_pipeline(self, request: PipelineRequest) -> PipelineResponse:
+        """
+        Apply the requested steps in order with a single load and a single save.
+        
+        Intermediate results are stored only for steps with save=True.
+        
+        Args:
+            request: PipelineRequest with file_id and steps
+            
+        Returns:
+            PipelineResponse with the final file_id and per-step results
+        """
+        operations = self._operations()
+        df = self.file_service.load_excel(request.file_id)
+        original_rows = len(df)
+        
+        step_results = []
+        for index, step in enumerate(request.steps):
+            df = operations[step.operation](df, step)
+            report_progress("steps", index + 1, len(request.steps))
+            
+            step_file_id = None
+            # The last step's data is saved below anyway
+            if step.save and index < len(request.steps) - 1:
+                step_file_id = self.file_service.save_dataframe(df, request.file_id)
+            step_results.append(PipelineStepResult(
+                operation=step.operation,
+                rows=len(df),
+                columns=len(df.columns),
+                file_id=step_file_id
+            ))
+        
+        new_file_id = self.file_service.save_dataframe(df, request.file_id)
+        if request.steps[-1].save:
+            step_results[-1].file_id = new_file_id
+        
+        return PipelineResponse(
+            file_id=new_file_id,
+            original_rows=original_rows,
+            final_rows=len(df),
+            steps=step_results,
+            message=f"Pipeline completed successfully ({len(request.steps)} steps)"
+        )
@@ -0,0 +1,66 @@
+"""Pydantic schemas for search and replace feature."""
+from enum import Enum
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class ReplaceMode(str, Enum):
+    """How search text is matched."""
+    SUBSTRING = "substring"  # Every occurrence inside a cell
+    REGEX = "regex"  # search_text is a regular expression; replace_text may use \1 or \g<name>
+    EXACT = "exact"  # The whole cell equals the search text
+
+
+class SearchReplaceRequest(BaseModel):
+    """Request for search and replace."""
+    
+    file_id: str
+    columns: list[str] | None = Field(default=None, description="Columns to search (null = all)")
+    search_text: str | None = Field(default=None, min_length=1)
+    replace_text: str = Field(default="")
+    replacements: dict[str, str] | None = Field(
+        default=None,
+        min_length=1,
+        description="Search text -> replacement; all are applied in one pass (substring or exact mode)"
+    )
+    replacements_file_id: str | None = Field(
+        default=None,
+        description="File holding a replacement table (substring or exact mode)"
+    )
+    search_column: str | None = Field(
+        default=None,
+        description="Column of the replacements file with the search texts (default: its first column)"
+    )
+    replace_column: str | None = Field(
+        default=None,
+        description="Column of the replacements file with the replacements (default: its second column)"
+    )
+    mode: ReplaceMode = Field(default=ReplaceMode.SUBSTRING)
+    case_sensitive: bool = Field(default=False)
+    
+    @model_validator(mode="after")
+    def check_search(self) -> "SearchReplaceRequest":
+        sources = [self.search_text, self.replacements, self.replacements_file_id]
+        if sum(source is not None for source in sources) != 1:
+            raise ValueError("Exactly one of search_text, replacements or replacements_file_id is required")
+        if self.replacements is not None and "" in self.replacements:
+            raise ValueError("Search texts in replacements must not be empty")
+        if self.mode == ReplaceMode.REGEX and self.search_text is None:
+            raise ValueError("Regex mode takes search_text and replace_text")
+        return self
+
+
+class SearchReplaceResponse(BaseModel):
+    """Response after search and replace."""
+    
+    file_id: str
+    replacements_made: int
+    column_counts: dict[str, int] = Field(
+        default_factory=dict,
+        description="Replacements per column (occurrences; cells in exact mode)"
+    )
+    skipped_columns: list[str] = Field(
+        default_factory=list,
+        description="Requested columns left unchanged because they hold numbers or dates"
+    )
+    message: str
@@ -0,0 +1,282 @@
+"""Service layer for search and replace operations."""
+import re
+from functools import lru_cache
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+from app.core.result_cache import memoize_result
+from app.shared.file_service import FileService
+from app.features.search_replace.schemas import (
+    ReplaceMode,
+    SearchReplaceRequest,
+    SearchReplaceResponse
+)
+
+# Replaces one cell's text: (new text, number of replacements)
+Replacer = Callable[[str], tuple[str, int]]
+
+
+def trie_pattern(patterns: list[str]) -> str:
+    """
+    Regular expression matching any of patterns, built from their trie.
+    
+    Shared prefixes are matched once, so the regex engine walks the trie
+    like an Aho-Corasick automaton instead of trying every pattern at
+    each position. Longer patterns win over their prefixes.
+    """
+    trie: dict = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[""] = {}  # End of a pattern
+    
+    def build(node: dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        # Optional when a pattern ends here; greedy, so the longer match is tried first
+        return "(?:" + "|".join(branches) + ")" + ("?" if terminal else "")
+    
+    return build(trie)
+
+
+# The regex engine ignores case character by character, by simple
+# lowercase; str.lower maps these to more than one character
+_SIMPLE_LOWERCASE = {ord("İ"): "i"}
+
+
+@lru_cache(maxsize=32)
+def compile_replacer(pairs: tuple[tuple[str, str], ...], mode: ReplaceMode, case_sensitive: bool) -> Replacer:
+    """
+    Compile search/replacement pairs into a function applying all of them in one pass.
+    
+    Substring mode scans each cell once with the trie of all search
+    texts (leftmost, then longest match; replaced text is not searched
+    again). Exact mode looks whole cells up in a hash table. Regex mode
+    takes a single (pattern, template) pair.
+    
+    Raises:
+        HTTPException: If a regular expression is invalid
+    """
+    def fold(text: str) -> str:
+        return text if case_sensitive else text.translate(_SIMPLE_LOWERCASE).lower()
+    
+    if mode == ReplaceMode.REGEX:
+        (pattern, template), = pairs
+        try:
+            compiled = re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+        except re.error as e:
+            raise HTTPException(status_code=400, detail=f"Invalid regular expression: {e}")
+        return lambda text: compiled.subn(template, text)
+    
+    lookup = {fold(search): replacement for search, replacement in pairs if search}
+    if not lookup:
+        # An empty trie pattern would match at every position
+        return lambda text: (text, 0)
+    
+    if mode == ReplaceMode.EXACT:
+        def replace_exact(text: str) -> tuple[str, int]:
+            replacement = lookup.get(fold(text))
+            return (text, 0) if replacement is None else (replacement, 1)
+        return replace_exact
+    
+    compiled = re.compile(trie_pattern(list(lookup)), 0 if case_sensitive else re.IGNORECASE)
+    
+    def replace_substrings(text: str) -> tuple[str, int]:
+        replaced = 0
+        
+        def substitute(match: re.Match) -> str:
+            nonlocal replaced
+            replacement = lookup.get(fold(match.group()))
+            if replacement is None:
+                # Matched ignoring case where fold disagrees (e.g. "ſ" and "s"): kept, not counted
+                return match.group()
+            replaced += 1
+            return replacement
+        
+        return compiled.sub(substitute, text), replaced
+    return replace_substrings
+
+
+def replace_column(values: pd.Series, replacer: Replacer) -> tuple[pd.Series, int]:
+    """
+    Apply a replacer to the text cells of a column.
+    
+    Each distinct text is replaced once; numbers, dates and missing
+    values (in mixed columns) are kept as they are.
+    
+    Returns:
+        Tuple of (new column, number of replacements)
+    """
+    codes, uniques = pd.factorize(values)
+    new_uniques = np.empty(len(uniques), dtype=object)
+    counts = np.zeros(len(uniques), dtype=np.int64)
+    for i, value in enumerate(uniques):
+        if isinstance(value, str):
+            new_uniques[i], counts[i] = replacer(value)
+        else:
+            new_uniques[i] = value
+    if not counts.any():
+        return values, 0
+    
+    present = codes >= 0
+    total = int(np.bincount(codes[present], minlength=len(uniques)) @ counts)
+    replaced = values.to_numpy(dtype=object).copy()
+    replaced[present] = new_uniques[codes[present]]
+    return pd.Series(replaced, index=values.index, name=values.name, dtype=object), total
+
+
+def _cell_text(value) -> str | None:
+    """Text of a replacement-table cell (whole numbers without .0)."""
+    if pd.isna(value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class SearchReplaceService:
+    """Business logic for search and replace."""
+    
+    def __init__(self, file_service: FileService):
+        self.file_service = file_service
+    
+    @memoize_result("search_replace")
+    def search_replace(self, request: SearchReplaceRequest) -> SearchReplaceResponse:
+        """
+        Replace text in text columns, batch by batch.
+        
+        The replacement table is loaded and compiled once; counts add up
+        across batches.
+        
+        Args:
+            request: SearchReplaceRequest
+            
+        Returns:
+            SearchReplaceResponse with new file_id and per-column counts
+        """
+        metadata = self.file_service.get_metadata(request.file_id)
+        columns = self._select_columns(metadata["columns"], request)
+        text_columns = [col for col in columns if metadata["dtypes"][col] == "object"]
+        replacer = self._replacer(request)
+        column_counts = dict.fromkeys(text_columns, 0)
+        
+        def replace_batch(batch: pd.DataFrame) -> pd.DataFrame:
+            batch, counts = self.replace_in_dataframe(batch, request, replacer)
+            for col, count in counts.items():
+                column_counts[col] += count
+            return batch
+        
+        new_file_id = self.file_service.map_batches(request.file_id, replace_batch)
+        total_replacements = sum(column_counts.values())
+        
+        return SearchReplaceResponse(
+            file_id=new_file_id,
+            replacements_made=total_replacements,
+            column_counts=column_counts,
+            skipped_columns=[col for col in columns if col not in text_columns],
+            message=f"Search and replace completed ({total_replacements} replacements)"
+        )
+    
+    def _select_columns(self, columns: list[str], request: SearchReplaceRequest) -> list[str]:
+        """
+        Columns a request applies to.
+        
+        Raises:
+            HTTPException: If a requested column does not exist
+        """
+        if request.columns:
+            missing_cols = set(request.columns) - set(columns)
+            if missing_cols:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Columns not found: {missing_cols}"
+                )
+            return request.columns
+        return list(columns)
+    
+    def _replacer(self, request: SearchReplaceRequest) -> Replacer:
+        """Compiled replacer for the request's search text or replacement table."""
+        if request.replacements_file_id is not None:
+            pairs = self._load_replacements(request)
+        elif request.replacements is not None:
+            pairs = tuple(request.replacements.items())
+        else:
+            pairs = ((request.search_text, request.replace_text),)
+        return compile_replacer(pairs, request.mode, request.case_sensitive)
+    
+    def _load_replacements(self, request: SearchReplaceRequest) -> tuple[tuple[str, str], ...]:
+        """
+        Read (search, replacement) pairs from the replacements file.
+        
+        Rows without search text are ignored; a missing replacement
+        deletes the match.
+        
+        Raises:
+            HTTPException: If the file lacks the search or replace column
+        """
+        table = self.file_service.load_excel(request.replacements_file_id)
+        columns = table.columns.tolist()
+        search_column = request.search_column or (columns[0] if columns else None)
+        replace_column = request.replace_column or (columns[1] if len(columns) > 1 else None)
+        for col in (search_column, replace_column):
+            if col is None or col not in columns:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Column '{col}' not found in replacements file" if col else
+                    "Replacements file needs a search column and a replace column"
+                )
+        
+        pairs = []
+        for search, replacement in zip(table[search_column], table[replace_column]):
+            search = _cell_text(search)
+            if search:
+                pairs.append((search, _cell_text(replacement) or ""))
+        if not pairs:
+            raise HTTPException(status_code=400, detail="Replacements file has no search texts")
+        return tuple(pairs)
+    
+    def replace_in_dataframe(
+        self,
+        df: pd.DataFrame,
+        request: SearchReplaceRequest,
+        replacer: Replacer | None = None
+    ) -> tuple[pd.DataFrame, dict[str, int]]:
+        """
+        Replace text in the text columns of a loaded DataFrame.
+        
+        Number and date columns keep their dtype and are not searched.
+        
+        Args:
+            df: Data to search
+            request: SearchReplaceRequest
+            replacer: Compiled replacer (built from request when None)
+            
+        Returns:
+            Tuple of (DataFrame, replacements per text column)
+            
+        Raises:
+            HTTPException: If a column does not exist or a regex
+                replacement refers to a missing group
+        """
+        columns = self._select_columns(df.columns, request)
+        if replacer is None:
+            replacer = self._replacer(request)
+        
+        counts = {}
+        for col in columns:
+            if df[col].dtype != object:
+                continue
+            try:
+                df[col], counts[col] = replace_column(df[col], replacer)
+            except re.error as e:
+                raise HTTPException(status_code=400, detail=f"Invalid replacement: {e}")
+        
+        return df, counts
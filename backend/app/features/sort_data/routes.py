@@ -1,17 +1,19 @@
 """API routes for sort data feature."""
 from fastapi import APIRouter
 
-from app.core.dependencies import FileServiceDep
+from app.core.dependencies import FileServiceDep, AsyncJobDep
+from app.core.jobs import run_operation, ASYNC_JOB_RESPONSES
 from app.features.sort_data.service import SortDataService
 from app.features.sort_data.schemas import SortDataRequest, SortDataResponse
 
 router = APIRouter(prefix="/api", tags=["Sort Data"])
 
 
-@router.post("/sort", response_model=SortDataResponse)
+@router.post("/sort", response_model=SortDataResponse, responses=ASYNC_JOB_RESPONSES)
 async def sort_data(
     request: SortDataRequest,
-    file_service: FileServiceDep = None
+    file_service: FileServiceDep = None,
+    run_async: AsyncJobDep = False
 ):
     """
     Sort data by a specific column in ascending or descending order.
@@ -19,4 +21,4 @@ async def sort_data(
     Returns a new file_id with sorted data.
     """
     service = SortDataService(file_service)
-    return service.sort_data(request)
+    return await run_operation("sort", service.sort_data, request, run_async=run_async)
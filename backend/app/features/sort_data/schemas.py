@@ -1,5 +1,5 @@
 """Pydantic schemas for sort data feature."""
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from enum import Enum
 
 
@@ -9,18 +9,57 @@ class SortOrder(str, Enum):
     DESCENDING = "desc"
 
 
+class NullPlacement(str, Enum):
+    """Where missing values go, independent of the sort order."""
+    FIRST = "first"
+    LAST = "last"
+
+
+class Collation(str, Enum):
+    """How text values are ordered."""
+    BINARY = "binary"  # Unicode code point order
+    PERSIAN = "persian"  # Persian alphabet order
+
+
+class SortKey(BaseModel):
+    """One column of a multi-column sort."""
+    
+    column: str = Field(..., description="Column name to sort by")
+    order: SortOrder = Field(default=SortOrder.ASCENDING, description="Sort order")
+    nulls: NullPlacement = Field(default=NullPlacement.LAST, description="Placement of missing values")
+
+
 class SortDataRequest(BaseModel):
     """Request for sorting data."""
     
     file_id: str = Field(..., description="File identifier")
-    column: str = Field(..., description="Column name to sort by")
+    column: str | None = Field(default=None, description="Column name to sort by (single-column sort)")
     order: SortOrder = Field(default=SortOrder.ASCENDING, description="Sort order")
+    keys: list[SortKey] | None = Field(
+        default=None,
+        min_length=1,
+        description="Columns to sort by, most significant first; replaces column and order"
+    )
+    collation: Collation = Field(default=Collation.BINARY, description="Ordering of text values")
+    
+    @model_validator(mode="after")
+    def check_sort_columns(self) -> "SortDataRequest":
+        if self.keys is None and self.column is None:
+            raise ValueError("Either column or keys is required")
+        return self
+    
+    @property
+    def sort_keys(self) -> list[SortKey]:
+        """The requested keys, or the single column and order."""
+        if self.keys is not None:
+            return self.keys
+        return [SortKey(column=self.column, order=self.order)]
 
 
 class SortDataResponse(BaseModel):
     """Response after sort operation."""
     
     file_id: str = Field(..., description="New file identifier with sorted data")
-    sorted_by: str = Field(..., description="Column used for sorting")
-    order: str = Field(..., description="Sort order applied")
+    sorted_by: str = Field(..., description="Column(s) used for sorting, comma-separated")
+    order: str = Field(..., description="Sort order(s) applied, comma-separated")
     message: str = Field(default="Data sorted successfully")
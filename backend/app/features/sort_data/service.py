@@ -1,8 +1,238 @@
 """Service layer for sorting data operations."""
+import math
+import shutil
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
 from fastapi import HTTPException
 
+from app.core.config import settings
+from app.core.progress import report_progress
+from app.core.result_cache import memoize_result
+from app.shared import columnar
+from app.shared.collation import COLLATIONS
 from app.shared.file_service import FileService
-from app.features.sort_data.schemas import SortDataRequest, SortDataResponse, SortOrder
+from app.features.sort_data.schemas import (
+    NullPlacement,
+    SortDataRequest,
+    SortDataResponse,
+    SortKey,
+    SortOrder
+)
+
+# Estimated bytes of pandas memory (frame plus sort) per byte of sidecar
+MEMORY_PER_SIDECAR_BYTE = 4
+
+# Upper bound on sorted runs (all are read side by side while merging)
+MAX_RUNS = 256
+
+# Prefix of the encoded key columns stored alongside the rows of a sorted run
+RUN_KEY_PREFIX = "__sort_key_"
+
+
+def rank_text(values: pd.Series, collation: str) -> pd.Index:
+    """
+    Distinct non-missing values of a text column in collation order.
+    
+    Non-text values (numbers in a mixed column) sort before text, as in
+    pandas; values that cannot be compared are ordered by their text form.
+    """
+    sort_key = COLLATIONS[collation]
+    uniques = pd.unique(values.dropna())
+    
+    def key(value):
+        return (1, sort_key(value)) if isinstance(value, str) else (0, value)
+    
+    try:
+        ordered = sorted(uniques, key=key)
+    except TypeError:
+        ordered = sorted(uniques, key=lambda value: key(str(value)))
+    return pd.Index(ordered, dtype=object)
+
+
+def encode_sort_keys(
+    df: pd.DataFrame,
+    keys: list[SortKey],
+    text_ranks: dict[str, pd.Index]
+) -> list[np.ndarray]:
+    """
+    Encode sort keys as numeric arrays whose lexicographic order is the requested order.
+    
+    Each key gives a null flag (placing missing values first or last) and
+    its values: numbers, dates and booleans as themselves, text as its
+    position in text_ranks. Descending keys are negated, so the arrays of
+    separately encoded chunks compare correctly with each other.
+    
+    Args:
+        df: Rows to encode
+        keys: Sort keys, most significant first
+        text_ranks: Ordered distinct values of each text key (see rank_text)
+        
+    Returns:
+        Arrays, most significant first (two per key)
+    """
+    arrays = []
+    for key in keys:
+        values = df[key.column]
+        nulls = values.isna().to_numpy()
+        if key.column in text_ranks:
+            encoded = text_ranks[key.column].get_indexer(values).astype(np.int64)
+        elif values.dtype.kind in "mM":
+            encoded = values.to_numpy().view(np.int64)
+        elif values.dtype.kind == "f":
+            encoded = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            # Missing values of nullable dtypes (Int64, boolean) are flagged by nulls
+            encoded = values.to_numpy(dtype=np.int64, na_value=0)
+        encoded = np.where(nulls, 0, encoded)
+        if key.order == SortOrder.DESCENDING:
+            encoded = -encoded if encoded.dtype.kind == "f" else ~encoded
+        
+        null_flags = nulls if key.nulls == NullPlacement.LAST else ~nulls
+        arrays.append(null_flags.astype(np.int8))
+        arrays.append(encoded)
+    return arrays
+
+
+def _collation_string(text: str, collation: str) -> str:
+    """Collation key of text as one string with the same order."""
+    key = COLLATIONS[collation](text)
+    # Tuple keys are joined by a character below any text, so shorter parts still sort first
+    return "\x00".join(key) if isinstance(key, tuple) else key
+
+
+# Complements the bytes of UTF-32 text, reversing its order
+_REVERSE_BYTES = bytes(range(255, -1, -1))
+
+
+def _reversed_string(text: str) -> bytes:
+    """
+    Bytes that order in reverse of text (as NumPy compares bytes).
+    
+    The terminator ranks above any complemented character, so a prefix
+    sorts after the longer text, and keeps trailing NUL bytes (which
+    NumPy ignores) from ending the value.
+    """
+    return text.encode("utf-32-be").translate(_REVERSE_BYTES) + b"\xff\xff\xff\xff"
+
+
+def encode_run_keys(
+    df: pd.DataFrame,
+    keys: list[SortKey],
+    text_columns: set[str],
+    collation: str
+) -> list[np.ndarray]:
+    """
+    Encode sort keys for a sorted run of an external sort.
+    
+    Like encode_sort_keys, but a text key is encoded by its values rather
+    than by rank, so runs encoded separately compare correctly without
+    holding the whole column: a null flag, a flag placing non-text values
+    (numbers in a mixed column) before text, their number, and the
+    collation key of text as a fixed-width NumPy string (bytes in reverse
+    order for descending keys), which NumPy compares natively.
+    
+    Args:
+        df: Rows of the run
+        keys: Sort keys, most significant first
+        text_columns: Text columns of the file (the same for every run)
+        collation: Collation name of text keys
+    
+    Returns:
+        Arrays, most significant first (two per non-text key, four per text key)
+    """
+    arrays = []
+    for key in keys:
+        values = df[key.column]
+        if key.column not in text_columns:
+            arrays.extend(encode_sort_keys(df, [key], {}))
+            continue
+        
+        nulls = values.isna().to_numpy()
+        codes, uniques = pd.factorize(values)
+        is_text = np.array([isinstance(value, str) for value in uniques], dtype=bool)
+        numbers = pd.to_numeric(pd.Series(uniques, dtype=object).where(~is_text), errors="coerce").to_numpy(dtype=np.float64)
+        # Values that are neither text nor numbers (dates in a mixed column) sort as their text
+        is_text |= np.isnan(numbers)
+        texts = [_collation_string(str(value), collation) if text else "" for value, text in zip(uniques, is_text)]
+        empty = ""
+        if key.order == SortOrder.DESCENDING:
+            texts, empty = [_reversed_string(text) for text in texts], b""
+        texts = np.array(texts + [empty])
+        kinds = np.append(is_text, False).astype(np.int8)[codes]
+        numbers = np.append(np.where(is_text, 0, numbers), 0)[codes]
+        texts = texts[codes]  # Code -1 (missing) takes the appended empty value
+        if key.order == SortOrder.DESCENDING:
+            kinds, numbers = ~kinds, -numbers
+        
+        null_flags = nulls if key.nulls == NullPlacement.LAST else ~nulls
+        arrays.extend([null_flags.astype(np.int8), kinds, numbers, texts])
+    return arrays
+
+
+def _lexsort(arrays: list[np.ndarray]) -> np.ndarray:
+    """Stable order of rows by arrays, most significant first."""
+    return np.lexsort(arrays[::-1])
+
+
+def _count_not_after(arrays: list[np.ndarray], bound: tuple) -> int:
+    """Number of leading rows of sorted arrays whose key is at most bound."""
+    before = np.zeros(len(arrays[0]), dtype=bool)
+    equal = np.ones(len(arrays[0]), dtype=bool)
+    for array, value in zip(arrays, bound):
+        before |= equal & (array < value)
+        equal &= array == value
+    return int(np.count_nonzero(before | equal))
+
+
+def merge_runs(run_paths: list[Path], n_keys: int, block_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    k-way merge of sorted runs, a block at a time.
+    
+    Each run holds its rows and their encoded keys (RUN_KEY_PREFIX
+    columns), with keys unique across runs. Every step emits all buffered
+    rows up to the smallest last key of the runs' buffers, which no
+    unread row can precede.
+    
+    Yields:
+        Sorted batches without the key columns
+    """
+    key_columns = [f"{RUN_KEY_PREFIX}{i}" for i in range(n_keys)]
+    readers = [columnar.iter_dataframes(path, block_rows) for path in run_paths]
+    
+    def next_block(reader) -> list | None:
+        """[block, its key arrays, position of its first unmerged row] or None at the end."""
+        for block in reader:
+            if len(block):
+                arrays = [block[col].to_numpy() for col in key_columns]
+                # Text keys come back as objects; fixed-width strings compare natively
+                arrays = [np.array(array.tolist()) if array.dtype == object else array for array in arrays]
+                return [block, arrays, 0]
+        return None
+    
+    buffers = [next_block(reader) for reader in readers]
+    while True:
+        live = [i for i, buffer in enumerate(buffers) if buffer is not None]
+        if not live:
+            return
+        bound = min(tuple(array[-1] for array in buffers[i][1]) for i in live)
+        
+        parts = []
+        part_keys = []
+        for i in live:
+            block, arrays, start = buffers[i]
+            if tuple(array[start] for array in arrays) > bound:
+                continue
+            stop = start + _count_not_after([array[start:] for array in arrays], bound)
+            parts.append(block.iloc[start:stop])
+            part_keys.append([array[start:stop] for array in arrays])
+            buffers[i] = next_block(readers[i]) if stop == len(block) else [block, arrays, stop]
+        
+        order = _lexsort([np.concatenate(column_keys) for column_keys in zip(*part_keys)])
+        merged = pd.concat(parts, ignore_index=True).drop(columns=key_columns)
+        yield merged.take(order).reset_index(drop=True)
 
 
 class SortDataService:
@@ -11,9 +241,15 @@ class SortDataService:
     def __init__(self, file_service: FileService):
         self.file_service = file_service
     
+    @memoize_result("sort")
     def sort_data(self, request: SortDataRequest) -> SortDataResponse:
         """
-        Sort data by specified column.
+        Sort data by one or more columns.
+        
+        Files whose estimated in-memory size exceeds
+        settings.sort_memory_budget_mb are sorted externally: sorted runs
+        of at most that size are spilled to disk and k-way merged into the
+        output (see merge_runs).
         
         Args:
             request: SortDataRequest
@@ -21,26 +257,102 @@ class SortDataService:
         Returns:
             SortDataResponse with new file_id
         """
-        # Load DataFrame
-        df = self.file_service.load_excel(request.file_id)
-        
-        # Validate column exists
-        if request.column not in df.columns:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Column '{request.column}' not found in file"
-            )
-        
-        # Sort data
-        ascending = request.order == SortOrder.ASCENDING
-        sorted_df = df.sort_values(by=request.column, ascending=ascending)
-        
-        # Save to new file
-        new_file_id = self.file_service.save_dataframe(sorted_df, request.file_id)
+        keys = request.sort_keys
+        if self._run_count(request.file_id) > 1:
+            new_file_id = self._sort_external(request)
+        else:
+            df = self.file_service.load_excel(request.file_id)
+            sorted_df = self.sort_dataframe(df, request)
+            new_file_id = self.file_service.save_dataframe(sorted_df, request.file_id)
         
         return SortDataResponse(
             file_id=new_file_id,
-            sorted_by=request.column,
-            order=request.order.value,
+            sorted_by=", ".join(key.column for key in keys),
+            order=", ".join(key.order.value for key in keys),
             message="Data sorted successfully"
         )
+    
+    def _validate_columns(self, columns: list[str], request: SortDataRequest):
+        """
+        Check that the sort columns exist.
+        
+        Raises:
+            HTTPException: If a column does not exist
+        """
+        for key in request.sort_keys:
+            if key.column not in columns:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Column '{key.column}' not found in file"
+                )
+    
+    def _run_count(self, file_id: str) -> int:
+        """Number of sorted runs needed to stay within the memory budget (1: sort in memory)."""
+        if not self.file_service.can_stream(file_id):
+            return 1
+        budget = settings.sort_memory_budget_mb * 1024 * 1024
+        estimated_bytes = self.file_service.get_sidecar_path(file_id).stat().st_size * MEMORY_PER_SIDECAR_BYTE
+        return min(MAX_RUNS, math.ceil(estimated_bytes / max(budget, 1)))
+    
+    def _sort_external(self, request: SortDataRequest) -> str:
+        """Sort a file in runs spilled to disk and merge them into a new file."""
+        keys = request.sort_keys
+        metadata = self.file_service.get_metadata(request.file_id)
+        self._validate_columns(metadata["columns"], request)
+        
+        text_columns = {key.column for key in keys if metadata["dtypes"][key.column] == "object"}
+        n_keys = sum(4 if key.column in text_columns else 2 for key in keys) + 1
+        
+        total_rows = metadata["rows"]
+        n_runs = self._run_count(request.file_id)
+        run_rows = max(1, math.ceil(total_rows / n_runs))
+        spill_dir = self.file_service.store.staging_path("")
+        spill_dir.mkdir()
+        try:
+            run_paths = []
+            rows_sorted = 0
+            for batch in self.file_service.iter_batches(request.file_id, batch_rows=run_rows):
+                # Text keys are encoded by value, not ranked over the whole
+                # file, so a run never needs more than its own rows; file
+                # position as the last key makes keys unique, so the merge
+                # never has to order ties between runs
+                arrays = encode_run_keys(batch, keys, text_columns, request.collation.value)
+                arrays.append(np.arange(rows_sorted, rows_sorted + len(batch)))
+                order = _lexsort(arrays)
+                run = batch.take(order).reset_index(drop=True)
+                for i, array in enumerate(arrays):
+                    run[f"{RUN_KEY_PREFIX}{i}"] = array[order]
+                run_path = spill_dir / f"run-{len(run_paths)}{columnar.SIDECAR_SUFFIX}"
+                columnar.write_dataframe(run, run_path)
+                run_paths.append(run_path)
+                rows_sorted += len(batch)
+                report_progress("sorting", rows_sorted, total_rows)
+            
+            block_rows = max(1000, run_rows // (2 * len(run_paths)))
+            return self.file_service.save_batches(
+                merge_runs(run_paths, n_keys, block_rows),
+                request.file_id,
+                total_rows
+            )
+        finally:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+    
+    def sort_dataframe(self, df: pd.DataFrame, request: SortDataRequest) -> pd.DataFrame:
+        """
+        Sort a loaded DataFrame by the requested keys.
+        
+        The sort is stable: rows with equal keys keep their order.
+        
+        Raises:
+            HTTPException: If a column does not exist
+        """
+        self._validate_columns(df.columns, request)
+        
+        keys = request.sort_keys
+        text_ranks = {
+            key.column: rank_text(df[key.column], request.collation.value)
+            for key in keys
+            if df[key.column].dtype == object
+        }
+        order = _lexsort(encode_sort_keys(df, keys, text_ranks))
+        return df.take(order)
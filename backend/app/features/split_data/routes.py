@@ -1,10 +1,20 @@
 """Split data feature."""
-from fastapi import APIRouter
+import re
+from typing import Iterator
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from enum import Enum
+import numpy as np
+import pandas as pd
 
 from app.shared.file_service import FileService
-from app.core.dependencies import FileServiceDep
+from app.shared.zip_stream import iter_zip
+from app.core.dependencies import FileServiceDep, AsyncJobDep
+from app.core.executor import executor
+from app.core.jobs import run_operation, ASYNC_JOB_RESPONSES
+from app.core.result_cache import memoize_result
 
 
 class SplitMethod(str, Enum):
@@ -21,54 +31,126 @@ class SplitDataRequest(BaseModel):
 
 class SplitDataResponse(BaseModel):
     file_ids: list[str] = Field(..., description="List of new file IDs")
+    labels: list[str] = Field(
+        default_factory=list,
+        description="Column value (BY_COLUMN) or 1-based row range (BY_ROW_COUNT) of each file"
+    )
     files_created: int
     message: str
 
 
+def group_rows(values: pd.Series) -> tuple[list, list[np.ndarray]]:
+    """
+    Row positions of each distinct value, as df.groupby(column) would group them.
+    
+    One factorize and one stable argsort replace per-group masking: groups
+    come out in sorted value order, rows keep their file order within a
+    group, and missing values are left out.
+    
+    Returns:
+        Tuple of (distinct values, row positions per value)
+    """
+    codes, uniques = pd.factorize(values, sort=True)
+    if not len(uniques):
+        return [], []
+    order = np.argsort(codes, kind="stable")
+    # Missing values (code -1) sort first
+    order = order[np.count_nonzero(codes < 0):]
+    bounds = np.cumsum(np.bincount(codes[codes >= 0], minlength=len(uniques)))[:-1]
+    return list(uniques), np.split(order, bounds)
+
+
 class SplitDataService:
     def __init__(self, file_service: FileService):
         self.file_service = file_service
     
+    @memoize_result("split")
     def split_data(self, request: SplitDataRequest) -> SplitDataResponse:
-        df = self.file_service.load_excel(request.file_id)
-        file_ids = []
+        """
+        Split a file into one file per column value or per row_count rows.
+        
+        Row positions of every part are computed first; the parts are then
+        written concurrently by the process pool, straight from the file's
+        sidecar (see FileService.save_row_subsets). Files Arrow cannot
+        store are split in memory and saved one part at a time.
+        """
+        streamable = self.file_service.can_stream(request.file_id)
+        df = None if streamable else self.file_service.load_excel(request.file_id)
         
         if request.method == SplitMethod.BY_COLUMN:
             # Split by unique values in column
             if not request.column:
                 raise ValueError("Column is required for BY_COLUMN method")
             
-            for value, group_df in df.groupby(request.column):
-                new_file_id = self.file_service.save_dataframe(group_df, request.file_id)
-                file_ids.append(new_file_id)
+            if streamable:
+                values = pd.concat(
+                    self.file_service.iter_batches(request.file_id, columns=[request.column]),
+                    ignore_index=True
+                )[request.column]
+            elif request.column in df.columns:
+                values = df[request.column]
+            else:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Columns not found in file: {request.column}"
+                )
+            uniques, subsets = group_rows(values)
+            labels = [str(value) for value in uniques]
         
         elif request.method == SplitMethod.BY_ROW_COUNT:
             # Split by row count
             if not request.row_count:
                 raise ValueError("Row count is required for BY_ROW_COUNT method")
             
-            num_chunks = len(df) // request.row_count + (1 if len(df) % request.row_count else 0)
-            
-            for i in range(num_chunks):
-                start_idx = i * request.row_count
-                end_idx = min((i + 1) * request.row_count, len(df))
-                chunk_df = df.iloc[start_idx:end_idx]
-                
-                new_file_id = self.file_service.save_dataframe(chunk_df, request.file_id)
-                file_ids.append(new_file_id)
+            total_rows = self.file_service.get_metadata(request.file_id)["rows"] if streamable else len(df)
+            subsets = [
+                slice(start, min(start + request.row_count, total_rows))
+                for start in range(0, total_rows, request.row_count)
+            ]
+            labels = [f"{rows.start + 1}-{rows.stop}" for rows in subsets]
+        
+        if streamable:
+            file_ids = self.file_service.save_row_subsets(request.file_id, subsets)
+        else:
+            file_ids = [
+                self.file_service.save_dataframe(df.iloc[rows], request.file_id)
+                for rows in subsets
+            ]
         
         return SplitDataResponse(
             file_ids=file_ids,
+            labels=labels,
             files_created=len(file_ids),
             message=f"Data split into {len(file_ids)} files"
         )
+    
+    def iter_zip(self, response: SplitDataResponse) -> Iterator[bytes]:
+        """
+        Stream the files of a split as one ZIP archive, named after their labels.
+        
+        Parts are rendered to Excel concurrently; each is added to the
+        archive as soon as it and the parts before it are ready.
+        """
+        paths = self.file_service.materialize_excels(response.file_ids)
+        names = [
+            f"{index:0{len(str(response.files_created))}d}_{_safe_filename(label)}"
+            for index, label in enumerate(response.labels, start=1)
+        ]
+        yield from iter_zip(
+            (f"{name}{path.suffix}", path) for name, path in zip(names, paths)
+        )
+
+
+def _safe_filename(label: str) -> str:
+    """Reduce a label to characters safe in a file name inside a ZIP archive."""
+    return re.sub(r'[\\/:*?"<>|\x00-\x1f]+', "_", label).strip(" .")[:100] or "part"
 
 
 router = APIRouter(prefix="/api", tags=["Split Data"])
 
 
-@router.post("/split", response_model=SplitDataResponse)
-async def split_data(request: SplitDataRequest, file_service: FileServiceDep = None):
+@router.post("/split", response_model=SplitDataResponse, responses=ASYNC_JOB_RESPONSES)
+async def split_data(request: SplitDataRequest, file_service: FileServiceDep = None, run_async: AsyncJobDep = False):
     """
     Split one file into multiple files.
     
@@ -77,4 +159,22 @@ async def split_data(request: SplitDataRequest, file_service: FileServiceDep = N
     - BY_ROW_COUNT: Split into files with specified number of rows
     """
     service = SplitDataService(file_service)
-    return service.split_data(request)
+    return await run_operation("split", service.split_data, request, run_async=run_async)
+
+
+@router.post("/split/zip")
+async def split_data_zip(request: SplitDataRequest, file_service: FileServiceDep = None):
+    """
+    Split one file and download all parts as a single ZIP archive.
+    
+    Takes the same request as /split. The archive is streamed while the
+    parts are rendered, one XLSX per part, named after its column value
+    or row range.
+    """
+    service = SplitDataService(file_service)
+    response = await executor.run("split", service.split_data, request)
+    return StreamingResponse(
+        service.iter_zip(response),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{request.file_id}_split.zip"'}
+    )
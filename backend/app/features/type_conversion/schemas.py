@@ -0,0 +1,45 @@
+"""Pydantic schemas for type conversion feature."""
+from enum import Enum
+
+from pydantic import BaseModel, Field
+
+
+class DataType(str, Enum):
+    """Type a column is converted to."""
+    STRING = "string"
+    INTEGER = "integer"  # Nullable whole numbers; other values become empty
+    FLOAT = "float"
+    BOOLEAN = "boolean"  # true/false, yes/no, 1/0, بله/خیر, ...
+    DATETIME = "datetime"  # Date text, or Excel serial day numbers
+    AUTO = "auto"  # The type inferred for the column at upload
+
+
+class TypeConversionRequest(BaseModel):
+    """Request for converting column types."""
+    
+    file_id: str
+    conversions: dict[str, DataType] = Field(..., description="Map of column -> target_type")
+    compact: bool = Field(
+        default=True,
+        description="Store integers in the smallest nullable integer type (Int8 to Int64) holding "
+                    "them, and floats as float32 when no value changes"
+    )
+
+
+class ColumnConversion(BaseModel):
+    """Outcome of converting one column."""
+    
+    data_type: DataType = Field(..., description="Type converted to (the inferred type for auto)")
+    dtype: str = Field(..., description="Resulting pandas dtype")
+    failures: int = Field(default=0, description="Values that did not convert and are now empty")
+    bad_values: list[str] = Field(default_factory=list, description="First distinct values that did not convert")
+
+
+class TypeConversionResponse(BaseModel):
+    """Response after converting column types."""
+    
+    file_id: str
+    columns_converted: int
+    columns: dict[str, ColumnConversion] = Field(default_factory=dict)
+    failures: int = Field(default=0, description="Values that did not convert, over all columns")
+    message: str
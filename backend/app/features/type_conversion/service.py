@@ -0,0 +1,227 @@
+"""Service layer for type conversion operations."""
+from typing import Iterable
+
+import pandas as pd
+from fastapi import HTTPException
+
+from app.core.result_cache import memoize_result
+from app.shared import type_inference
+from app.shared.file_service import FileService
+from app.features.type_conversion.schemas import (
+    ColumnConversion,
+    DataType,
+    TypeConversionRequest,
+    TypeConversionResponse
+)
+
+
+def _merge(total: ColumnConversion, part: ColumnConversion) -> None:
+    """Add the failures of one batch's conversion to a column's total."""
+    total.failures += part.failures
+    for value in part.bad_values:
+        if len(total.bad_values) >= type_inference.MAX_BAD_VALUES:
+            break
+        if value not in total.bad_values:
+            total.bad_values.append(value)
+
+
+class TypeConversionService:
+    """Business logic for converting column types."""
+    
+    def __init__(self, file_service: FileService):
+        self.file_service = file_service
+    
+    @memoize_result("convert_types")
+    def convert_types(self, request: TypeConversionRequest) -> TypeConversionResponse:
+        """
+        Convert columns to the requested types, batch by batch.
+        
+        auto columns take the type inferred at upload. With compact, a
+        first pass over the converted number columns picks the dtype each
+        keeps in every batch.
+        
+        Args:
+            request: TypeConversionRequest
+            
+        Returns:
+            TypeConversionResponse with new file_id and per-column failures
+        """
+        metadata = self.file_service.get_metadata(request.file_id)
+        self._check_columns(metadata["columns"], request)
+        targets = self._resolve_targets(request, self._inferred_types(request, metadata))
+        
+        dtypes = {}
+        if request.compact:
+            numbers = {col: target for col, target in targets.items() if target in (DataType.INTEGER, DataType.FLOAT)}
+            if numbers:
+                dtypes = self._compact_dtypes(
+                    (
+                        self._convert_columns(batch, numbers)[0]
+                        for batch in self.file_service.iter_batches(request.file_id, columns=list(numbers))
+                    ),
+                    numbers
+                )
+        
+        columns: dict[str, ColumnConversion] = {}
+        
+        def convert_batch(batch: pd.DataFrame) -> pd.DataFrame:
+            batch, reports = self.convert_dataframe(batch, request, targets, dtypes)
+            for col, report in reports.items():
+                if col in columns:
+                    _merge(columns[col], report)
+                else:
+                    columns[col] = report
+            return batch
+        
+        new_file_id = self.file_service.map_batches(request.file_id, convert_batch)
+        failures = sum(report.failures for report in columns.values())
+        
+        return TypeConversionResponse(
+            file_id=new_file_id,
+            columns_converted=len(targets),
+            columns=columns,
+            failures=failures,
+            message=(
+                f"Type conversion completed ({failures} values could not be converted and were left empty)"
+                if failures else "Type conversion completed successfully"
+            )
+        )
+    
+    def _check_columns(self, columns: list[str], request: TypeConversionRequest):
+        """
+        Check that the columns to convert exist.
+        
+        Raises:
+            HTTPException: If a column to convert does not exist
+        """
+        missing_cols = set(request.conversions) - set(columns)
+        if missing_cols:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Columns not found: {missing_cols}"
+            )
+    
+    def _inferred_types(self, request: TypeConversionRequest, metadata: dict) -> dict[str, str]:
+        """Inferred types of the auto columns (sampled from the first batch for indexes without them)."""
+        auto_columns = [col for col, target in request.conversions.items() if target == DataType.AUTO]
+        inferred = metadata.get("inferred_types") or {}
+        unknown = [col for col in auto_columns if col not in inferred]
+        if unknown:
+            batch = next(self.file_service.iter_batches(request.file_id, columns=unknown))
+            inferred = {**inferred, **type_inference.infer_types(batch)}
+        return inferred
+    
+    def _resolve_targets(self, request: TypeConversionRequest, inferred_types: dict[str, str]) -> dict[str, DataType]:
+        """Target type of each column, with auto replaced by the inferred type."""
+        return {
+            col: DataType(inferred_types[col]) if target == DataType.AUTO else target
+            for col, target in request.conversions.items()
+        }
+    
+    def _convert_columns(
+        self,
+        df: pd.DataFrame,
+        targets: dict[str, DataType]
+    ) -> tuple[pd.DataFrame, dict[str, ColumnConversion]]:
+        """
+        Convert columns of a DataFrame in place.
+        
+        Returns:
+            Tuple of (DataFrame, conversion report by column)
+            
+        Raises:
+            HTTPException: If a column's values cannot be converted at all
+                (e.g. dates with mixed time zones)
+        """
+        reports = {}
+        for col, target in targets.items():
+            values = df[col]
+            try:
+                converted, failed = type_inference.convert(values, target.value)
+            except (ValueError, TypeError, OverflowError) as e:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Failed to convert column '{col}' to {target.value}: {e}"
+                )
+            df[col] = converted
+            reports[col] = ColumnConversion(
+                data_type=target,
+                dtype=str(converted.dtype),
+                failures=int(failed.sum()),
+                bad_values=type_inference.bad_values(values, failed)
+            )
+        return df, reports
+    
+    def _compact_dtypes(self, batches: Iterable[pd.DataFrame], targets: dict[str, DataType]) -> dict[str, str]:
+        """
+        Smallest dtype holding every value of each converted number column.
+        
+        Args:
+            batches: Converted DataFrames holding the columns of targets
+                (the whole data, in parts)
+            targets: Integer and float columns
+            
+        Returns:
+            "Int8", "Int16", "Int32" or "Int64" for integer columns and
+            "float32" for float columns float32 stores exactly
+        """
+        bounds: dict[str, tuple[int, int] | None] = dict.fromkeys(
+            [col for col, target in targets.items() if target == DataType.INTEGER]
+        )
+        float32_columns = {col for col, target in targets.items() if target == DataType.FLOAT}
+        for batch in batches:
+            for col in bounds:
+                values = batch[col].dropna()
+                if len(values):
+                    low, high = int(values.min()), int(values.max())
+                    if bounds[col] is not None:
+                        low, high = min(low, bounds[col][0]), max(high, bounds[col][1])
+                    bounds[col] = (low, high)
+            float32_columns = {col for col in float32_columns if type_inference.fits_float32(batch[col])}
+        
+        dtypes = {col: type_inference.integer_dtype(*(bound or (0, 0))) for col, bound in bounds.items()}
+        dtypes.update(dict.fromkeys(float32_columns, "float32"))
+        return dtypes
+    
+    def convert_dataframe(
+        self,
+        df: pd.DataFrame,
+        request: TypeConversionRequest,
+        targets: dict[str, DataType] | None = None,
+        dtypes: dict[str, str] | None = None
+    ) -> tuple[pd.DataFrame, dict[str, ColumnConversion]]:
+        """
+        Convert the columns of a loaded DataFrame.
+        
+        Values that do not convert become missing and are counted, never
+        replaced by a made-up value.
+        
+        Args:
+            df: Data to convert
+            request: TypeConversionRequest
+            targets: Target type by column, decided over the whole file;
+                auto columns are inferred from df when None
+            dtypes: Compact dtypes by column, decided over the whole file;
+                computed from df when None and request.compact is set
+                
+        Returns:
+            Tuple of (converted DataFrame, conversion report by column)
+            
+        Raises:
+            HTTPException: If a column does not exist or cannot be converted
+        """
+        self._check_columns(df.columns, request)
+        if targets is None:
+            auto_columns = [col for col, target in request.conversions.items() if target == DataType.AUTO]
+            targets = self._resolve_targets(request, type_inference.infer_types(df[auto_columns]))
+        
+        df, reports = self._convert_columns(df, targets)
+        
+        if request.compact:
+            if dtypes is None:
+                dtypes = self._compact_dtypes([df], targets)
+            for col, dtype in dtypes.items():
+                df[col] = df[col].astype(dtype)
+                reports[col].dtype = dtype
+        
+        return df, reports
@@ -1,8 +1,14 @@
 """FastAPI main application entry point."""
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.executor import executor
+from app.core.result_cache import result_cache
+from app.core.middleware import UploadSizeLimitMiddleware
+from app.shared.excel_renderer import renderer
 
 # Import feature routers
 from app.features.file_upload.routes import router as upload_router
@@ -18,6 +24,18 @@ from app.features.search_replace.routes import router as search_replace_router
 from app.features.type_conversion.routes import router as type_conversion_router
 from app.features.calculated_columns.routes import router as calculated_router
 from app.features.split_data.routes import router as split_router
+from app.features.jobs.routes import router as jobs_router
+from app.features.pipeline.routes import router as pipeline_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background workers with the application."""
+    if settings.excel_render_mode == "background":
+        renderer.start()
+    yield
+    renderer.stop()
+    executor.shutdown()
 
 
 # Create FastAPI app
@@ -27,7 +45,8 @@ app = FastAPI(
     description="A modular Excel processing API built with Feature-Sliced Design",
     openapi_url= f"/api/v1/openapi.json",
     docs_url= f"/api/v1/docs",
-    redoc_url= f"/api/v1/redoc"
+    redoc_url= f"/api/v1/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -37,8 +56,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Rows", "X-Offset"],  # Arrow responses carry paging here
 )
 
+# Enforce max_file_size_mb while upload bodies stream in
+app.add_middleware(UploadSizeLimitMiddleware)
+
 
 # Register all feature routers
 app.include_router(upload_router)
@@ -54,6 +77,8 @@ app.include_router(search_replace_router)
 app.include_router(type_conversion_router)
 app.include_router(calculated_router)
 app.include_router(split_router)
+app.include_router(jobs_router)
+app.include_router(pipeline_router)
 
 
 @app.get("/")
@@ -70,7 +95,11 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "executor": executor.stats(),
+        "result_cache": result_cache.stats()
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,160 @@
+"""Content-addressed storage: blobs keyed by sha256, file_ids as references."""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+# Guards adding references against garbage collection within this process
+_store_lock = threading.Lock()
+
+
+def hash_file(file_path: Path) -> str:
+    """Return the sha256 hex digest of a file, read in upload-sized chunks."""
+    hasher = hashlib.sha256()
+    with file_path.open("rb") as f:
+        for chunk in iter(lambda: f.read(settings.upload_chunk_size_kb * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class BlobStore:
+    """
+    Deduplicating file store under a root directory.
+
+    Every piece of content is stored once as ``blobs/{sha256}{suffix}``. The
+    same hash may have several representations next to each other (the
+    uploaded ``.xlsx``, its parsed ``.arrow`` sidecar, ...). A file_id is a
+    small JSON reference in ``refs/`` naming the blob hash and the Excel
+    extension the file is presented with, so identical uploads or derived
+    outputs share one copy on disk and one parsed sidecar.
+    """
+
+    def __init__(self, root: Path):
+        self.blob_dir = root / "blobs"
+        self.ref_dir = root / "refs"
+        self.staging_dir = self.blob_dir / "staging"
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        self.ref_dir.mkdir(parents=True, exist_ok=True)
+
+    def blob_path(self, content_hash: str, suffix: str) -> Path:
+        """Path of the ``suffix`` representation of a blob (may not exist yet)."""
+        return self.blob_dir / f"{content_hash}{suffix}"
+
+    def staging_path(self, suffix: str) -> Path:
+        """Unique scratch path to write new content to before add()."""
+        return self.staging_dir / f"{uuid.uuid4().hex}{suffix}"
+
+    def _ref_path(self, file_id: str) -> Path:
+        try:
+            uuid.UUID(file_id)
+        except ValueError:
+            raise HTTPException(status_code=404, detail=f"File with ID {file_id} not found")
+        return self.ref_dir / f"{file_id}.json"
+
+    def get_ref(self, file_id: str) -> dict:
+        """
+        Resolve a file_id to its reference ({"hash": ..., "extension": ...}).
+
+        Raises:
+            HTTPException: If the file_id does not exist
+        """
+        try:
+            return json.loads(self._ref_path(file_id).read_text())
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail=f"File with ID {file_id} not found")
+
+    def add(
+        self,
+        file_id: str,
+        src_path: Path,
+        suffix: str,
+        extension: str,
+        content_hash: str | None = None
+    ) -> Path:
+        """
+        Move a staged file into the store and point file_id at it.
+
+        If a blob with the same content already exists the staged copy is
+        discarded and the existing blob is shared.
+
+        Args:
+            file_id: New file identifier to create
+            src_path: Staged file (from staging_path) to take ownership of
+            suffix: Representation to store it as, e.g. ".xlsx" or ".arrow"
+            extension: Excel extension the file_id is presented with
+            content_hash: sha256 of src_path if already known
+
+        Returns:
+            Path of the stored blob
+        """
+        if content_hash is None:
+            content_hash = hash_file(src_path)
+        blob_path = self.blob_path(content_hash, suffix)
+
+        with _store_lock:
+            # Reference first, so a concurrent collection never sees the blob unreferenced
+            ref_path = self._ref_path(file_id)
+            tmp_ref = ref_path.with_name(f"{ref_path.name}.tmp")
+            tmp_ref.write_text(json.dumps({"hash": content_hash, "extension": extension}))
+            os.replace(tmp_ref, ref_path)
+
+            if blob_path.exists():
+                src_path.unlink(missing_ok=True)
+            else:
+                os.replace(src_path, blob_path)
+        return blob_path
+
+    def delete_ref(self, file_id: str) -> bool:
+        """
+        Remove a file_id and any blobs no other file_id references.
+
+        Returns:
+            True if the file_id existed
+        """
+        with _store_lock:
+            try:
+                ref = self.get_ref(file_id)
+            except HTTPException:
+                return False
+            self._ref_path(file_id).unlink(missing_ok=True)
+            if ref["hash"] not in self._referenced_hashes():
+                self._delete_blob(ref["hash"])
+        return True
+
+    def collect_garbage(self) -> int:
+        """
+        Delete blobs that no file_id references any more.
+
+        Returns:
+            Number of blob files removed
+        """
+        with _store_lock:
+            referenced = self._referenced_hashes()
+            removed = 0
+            for blob_path in self.blob_dir.iterdir():
+                if not blob_path.is_file() or blob_path.name.endswith(".tmp"):
+                    continue
+                if blob_path.name.split(".", 1)[0] not in referenced:
+                    blob_path.unlink(missing_ok=True)
+                    removed += 1
+            return removed
+
+    def _referenced_hashes(self) -> set[str]:
+        hashes = set()
+        for ref_path in self.ref_dir.glob("*.json"):
+            try:
+                hashes.add(json.loads(ref_path.read_text())["hash"])
+            except (OSError, ValueError, KeyError):
+                continue  # Removed or being replaced concurrently
+        return hashes
+
+    def _delete_blob(self, content_hash: str):
+        for blob_path in self.blob_dir.glob(f"{content_hash}.*"):
+            if not blob_path.name.endswith(".tmp"):
+                blob_path.unlink(missing_ok=True)
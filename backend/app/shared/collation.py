@@ -0,0 +1,51 @@
+"""Locale-aware ordering of text values."""
+from typing import Callable
+
+# Persian alphabet in dictionary order
+PERSIAN_ALPHABET = "آابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی"
+
+# Arabic code points and letter variants common in Persian text,
+# collated as the Persian letter they stand for
+_PERSIAN_EQUIVALENTS = {
+    "أ": "ا", "إ": "ا", "ٱ": "ا",
+    "ك": "ک", "ي": "ی", "ى": "ی", "ئ": "ی",
+    "ة": "ه", "ۀ": "ه", "ؤ": "و",
+}
+
+# Characters that do not affect Persian order: tatweel, zero-width
+# (non-)joiners and the Arabic diacritics (harakat)
+_PERSIAN_IGNORABLE = "ـ‌‍" + "".join(chr(code) for code in range(0x064B, 0x0653))
+
+# Letters are moved to a private-use range so they sort in alphabet order,
+# after Latin text; Persian digits sort as the ASCII digits
+_PERSIAN_SORT_TABLE = str.maketrans({
+    **{letter: chr(0xE000 + index) for index, letter in enumerate(PERSIAN_ALPHABET)},
+    **{variant: chr(0xE000 + PERSIAN_ALPHABET.index(letter)) for variant, letter in _PERSIAN_EQUIVALENTS.items()},
+    **{digit: str(value) for value, digit in enumerate("۰۱۲۳۴۵۶۷۸۹")},
+    **{digit: str(value) for value, digit in enumerate("٠١٢٣٤٥٦٧٨٩")},
+    **{char: None for char in _PERSIAN_IGNORABLE},
+})
+
+
+def persian_sort_key(text: str) -> tuple[str, str]:
+    """
+    Sort key ordering text by the Persian alphabet.
+
+    Arabic letter variants (ك, ي, ...) collate with their Persian
+    letters, Persian and Arabic-Indic digits with ASCII digits, and
+    diacritics, tatweel and ZWNJ are ignored; the text itself breaks
+    remaining ties so the order is total.
+    """
+    return text.translate(_PERSIAN_SORT_TABLE), text
+
+
+def binary_sort_key(text: str) -> str:
+    """Sort key ordering text by Unicode code point, as pandas does."""
+    return text
+
+
+# Sort key per collation name (see SortDataRequest.collation)
+COLLATIONS: dict[str, Callable[[str], object]] = {
+    "binary": binary_sort_key,
+    "persian": persian_sort_key,
+}
@@ -0,0 +1,558 @@
+"""Columnar (Arrow IPC) sidecar storage for intermediate DataFrames."""
+import bisect
+import datetime
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from app.core.progress import report_progress
+
+# File suffix for sidecars stored next to the Excel files
+SIDECAR_SUFFIX = ".arrow"
+
+# Rows per record batch written to a sidecar
+RECORD_BATCH_ROWS = 65536
+
+# Media type of the Arrow IPC streaming format, for HTTP responses
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# End-of-stream marker of the IPC streaming format (continuation token, zero length)
+IPC_STREAM_END = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+
+# Field metadata of a column stored as mixed values (see encode_mixed)
+MIXED_FIELD_METADATA = {b"mixed_values": b"1"}
+
+_ARROW_ERRORS = (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, ValueError)
+
+
+class SidecarUnsupportedError(Exception):
+    """Raised when a DataFrame cannot be represented as an Arrow table."""
+
+
+def _encode_mixed_value(value: Any) -> str | None:
+    if value is None or (not isinstance(value, str) and pd.api.types.is_scalar(value) and pd.isna(value)):
+        return None
+    if isinstance(value, str):
+        return "s" + value
+    if isinstance(value, (bool, np.bool_)):
+        return "b" + str(bool(value))
+    if isinstance(value, (int, np.integer)):
+        return "i" + str(int(value))
+    if isinstance(value, (float, np.floating)):
+        return "f" + repr(float(value))
+    if isinstance(value, (datetime.datetime, np.datetime64)):
+        return "d" + pd.Timestamp(value).isoformat()
+    if isinstance(value, datetime.date):
+        return "D" + value.isoformat()
+    if isinstance(value, datetime.time):
+        return "t" + value.isoformat()
+    if isinstance(value, (datetime.timedelta, np.timedelta64)):
+        return "T" + str(pd.Timedelta(value))
+    return "s" + str(value)
+
+
+# Type tag -> parser of the text after it
+_MIXED_DECODERS = {
+    "s": str,
+    "b": lambda text: text == "True",
+    "i": int,
+    "f": float,
+    "d": lambda text: pd.Timestamp(text).to_pydatetime(),  # As read_excel returns them
+    "D": datetime.date.fromisoformat,
+    "t": datetime.time.fromisoformat,
+    "T": pd.Timedelta,
+}
+
+
+def encode_mixed(values: pd.Series) -> pd.Series:
+    """
+    Encode an object column Arrow cannot type as tagged text.
+
+    Excel columns often mix numbers, text and dates. Each value is stored
+    as a one-character type tag followed by its text form, so decode_mixed
+    restores the same Python values; dropping the tag gives the value as
+    displayed text (see display_table).
+    """
+    return pd.Series([_encode_mixed_value(value) for value in values], index=values.index, name=values.name, dtype=object)
+
+
+def decode_mixed(values: pd.Series) -> pd.Series:
+    """Restore the values of a column encoded by encode_mixed (missing values as NaN)."""
+    codes, uniques = pd.factorize(values)
+    decoded = np.empty(len(uniques) + 1, dtype=object)
+    decoded[:-1] = [_MIXED_DECODERS[text[0]](text[1:]) for text in uniques]
+    decoded[-1] = np.nan  # Code -1: missing
+    return pd.Series(decoded[codes], index=values.index, name=values.name)
+
+
+def is_mixed(field: pa.Field) -> bool:
+    """Whether a sidecar column is stored as mixed values (see encode_mixed)."""
+    return bool(field.metadata) and field.metadata.items() >= MIXED_FIELD_METADATA.items()
+
+
+def _untypable_columns(df: pd.DataFrame) -> list[str]:
+    """Object columns whose values Arrow cannot give one type."""
+    columns = []
+    for col in df.columns[(df.dtypes == object).to_numpy()]:
+        try:
+            pa.array(df[col], from_pandas=True)
+        except _ARROW_ERRORS:
+            columns.append(col)
+    return columns
+
+
+def dataframe_to_table(
+    df: pd.DataFrame,
+    metadata: dict[bytes, bytes] | None = None,
+    mixed_columns: Iterable[str] = ()
+) -> pa.Table:
+    """
+    Convert a DataFrame to an Arrow table suitable for the sidecar.
+
+    Column names are stringified because API requests always address
+    columns by name. Object columns Arrow cannot type (e.g. a mix of
+    numbers and text), and mixed_columns, are stored as tagged text
+    (see encode_mixed) and marked with MIXED_FIELD_METADATA.
+
+    Raises:
+        SidecarUnsupportedError: If a column still cannot be stored
+    """
+    if not all(isinstance(col, str) for col in df.columns):
+        df = df.rename(columns=str)
+
+    mixed = set(mixed_columns)
+    table = None
+    if not mixed:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except _ARROW_ERRORS as e:
+            mixed = set(_untypable_columns(df)) if df.columns.is_unique else set()
+            if not mixed:
+                raise SidecarUnsupportedError(str(e)) from e
+    if table is None:
+        df = df.copy(deep=False)
+        for col in mixed:
+            df[col] = encode_mixed(df[col])
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except _ARROW_ERRORS as e:
+            raise SidecarUnsupportedError(str(e)) from e
+        table = table.cast(pa.schema(
+            [
+                pa.field(field.name, pa.string(), metadata=MIXED_FIELD_METADATA) if field.name in mixed else field
+                for field in table.schema
+            ],
+            metadata=table.schema.metadata
+        ))
+
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    return table
+
+
+def display_table(table: pa.Table) -> pa.Table:
+    """Table with mixed-value columns as plain text (their type tags dropped), for Arrow clients."""
+    for position, field in enumerate(table.schema):
+        if is_mixed(field):
+            table = table.set_column(
+                position,
+                pa.field(field.name, pa.string()),
+                pc.utf8_slice_codeunits(table.column(position), start=1)
+            )
+    return table
+
+
+def write_table(table: pa.Table, path: Path) -> None:
+    """
+    Atomically write an Arrow table to ``path`` in IPC file format.
+
+    The IPC file format is uncompressed and random-access, so readers can
+    memory-map it instead of parsing it. Rows are written in record batches
+    of RECORD_BATCH_ROWS, reporting "writing" progress after each one.
+    """
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                rows_written = 0
+                for batch in table.to_batches(max_chunksize=RECORD_BATCH_ROWS):
+                    writer.write_batch(batch)
+                    rows_written += batch.num_rows
+                    report_progress("writing", rows_written, table.num_rows)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def write_dataframe(df: pd.DataFrame, path: Path, metadata: dict[bytes, bytes] | None = None) -> None:
+    """Convert ``df`` to Arrow and write it as a sidecar file."""
+    write_table(dataframe_to_table(df, metadata), path)
+
+
+def _writable_schema(schema: pa.Schema) -> pa.Schema:
+    """Schema of a sidecar started with a batch of this schema: all-empty columns become text."""
+    return pa.schema(
+        [field.with_type(pa.string()) if pa.types.is_null(field.type) else field for field in schema],
+        metadata=schema.metadata
+    )
+
+
+def _castable(source: pa.DataType, target: pa.DataType) -> bool:
+    """Whether values of source fit a column of target without changing kind (e.g. int to float)."""
+    if source == target or pa.types.is_null(source):
+        return True
+    numeric = (pa.types.is_integer, pa.types.is_floating)
+    if any(is_kind(source) for is_kind in numeric) and any(is_kind(target) for is_kind in numeric):
+        return True
+    return pa.types.is_timestamp(source) and pa.types.is_timestamp(target)
+
+
+class SidecarWriter:
+    """
+    Incrementally write DataFrame batches to one sidecar file.
+
+    The schema is taken from the first batch; text columns that are empty
+    there are typed as strings so later batches with values still fit.
+    A column whose values later change kind (numbers, then text) is
+    switched to mixed values (see encode_mixed), rewriting the rows
+    written so far. The file appears at ``path`` only once close()
+    succeeds.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.rows = 0
+        self._tmp_path = self._new_tmp_path()
+        self._sink = None
+        self._writer = None
+        self._schema = None
+        self._mixed: set[str] = set()
+
+    def _new_tmp_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.{uuid.uuid4().hex}.tmp")
+
+    def _open(self, schema: pa.Schema):
+        self._schema = schema
+        self._mixed = {field.name for field in schema if is_mixed(field)}
+        self._sink = pa.OSFile(str(self._tmp_path), "wb")
+        self._writer = pa.ipc.new_file(self._sink, schema)
+
+    def _write_table(self, table: pa.Table):
+        if not table.schema.equals(self._schema, check_metadata=True):
+            try:
+                table = table.cast(self._schema)
+            except _ARROW_ERRORS as e:
+                raise SidecarUnsupportedError(str(e)) from e
+        for batch in table.to_batches(max_chunksize=RECORD_BATCH_ROWS):
+            self._writer.write_batch(batch)
+
+    def _conflicting_columns(self, table: pa.Table) -> set[str]:
+        """Columns of a batch that only fit the schema as mixed values."""
+        if table.schema.names != self._schema.names or len(set(table.schema.names)) != len(table.schema):
+            return set()
+        return {
+            field.name for field in table.schema
+            if field.name not in self._mixed
+            and (is_mixed(field) or not _castable(field.type, self._schema.field(field.name).type))
+        }
+
+    def _store_as_mixed(self, columns: set[str]):
+        """Switch columns to mixed values, rewriting the rows written so far."""
+        self._writer.close()
+        self._sink.close()
+        self._writer = self._sink = None
+        old_path, self._tmp_path = self._tmp_path, self._new_tmp_path()
+        mixed = self._mixed | columns
+        try:
+            with pa.memory_map(str(old_path), "r") as source:
+                reader = pa.ipc.open_file(source)
+                for index in range(reader.num_record_batches):
+                    table = dataframe_to_table(to_dataframe(reader.get_batch(index)), mixed_columns=mixed)
+                    if self._writer is None:
+                        self._open(_writable_schema(table.schema))
+                    self._write_table(table)
+        finally:
+            old_path.unlink(missing_ok=True)
+        self._mixed = mixed
+
+    def write(self, df: pd.DataFrame):
+        """
+        Append a batch.
+
+        Raises:
+            SidecarUnsupportedError: If the batch cannot be typed or does not
+                fit the schema of the first one (e.g. different columns)
+        """
+        table = dataframe_to_table(df, mixed_columns=self._mixed)
+        if self._writer is not None:
+            conflicts = self._conflicting_columns(table)
+            if conflicts:
+                self._store_as_mixed(conflicts)
+                table = dataframe_to_table(df, mixed_columns=self._mixed)
+        if self._writer is None:
+            self._open(_writable_schema(table.schema))
+        self._write_table(table)
+        self.rows += table.num_rows
+
+    def close(self):
+        """Finish the file and move it into place."""
+        if self._writer is None:
+            self._open(pa.schema([]))
+        try:
+            self._writer.close()
+            self._sink.close()
+            os.replace(self._tmp_path, self.path)
+        finally:
+            self._writer = self._sink = None
+            self._tmp_path.unlink(missing_ok=True)
+
+    def abort(self):
+        """Discard everything written so far (a no-op after close)."""
+        try:
+            if self._writer is not None:
+                self._writer.close()
+                self._sink.close()
+        finally:
+            self._writer = self._sink = None
+            self._tmp_path.unlink(missing_ok=True)
+
+
+def write_dataframes(
+    batches: Iterable[pd.DataFrame],
+    path: Path,
+    total_rows: int | None = None
+) -> int:
+    """
+    Atomically write DataFrame batches to one sidecar without concatenating them.
+
+    See SidecarWriter for the schema rules.
+
+    Args:
+        batches: DataFrames to append in order
+        path: Sidecar path to write
+        total_rows: Expected row count, for "writing" progress
+
+    Returns:
+        Number of rows written
+
+    Raises:
+        SidecarUnsupportedError: If a batch cannot be typed or does not
+            fit the schema of the first one
+    """
+    writer = SidecarWriter(path)
+    try:
+        for df in batches:
+            writer.write(df)
+            report_progress("writing", writer.rows, total_rows)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    return writer.rows
+
+
+def to_dataframe(data: pa.Table | pa.RecordBatch) -> pd.DataFrame:
+    """
+    Convert Arrow data back to pandas as read_excel would have produced it.
+
+    Arrow returns None for nulls in text (object) columns, where read_excel
+    yields NaN; they are replaced so string operations behave the same
+    whether a frame was parsed or loaded from a sidecar. Mixed-value
+    columns are decoded (see encode_mixed).
+    """
+    df = data.to_pandas()
+    for position, dtype in enumerate(df.dtypes):
+        if is_mixed(data.schema.field(position)):
+            df.isetitem(position, decode_mixed(df.iloc[:, position]))
+        elif dtype == object:
+            column = df.iloc[:, position]
+            nulls = column.isna()
+            if nulls.any():
+                df.isetitem(position, column.where(~nulls, np.nan))
+    return df
+
+
+def read_table(path: Path) -> pa.Table:
+    """Memory-map a sidecar file and return it as an Arrow table."""
+    with pa.memory_map(str(path), "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def read_dataframe(path: Path) -> pd.DataFrame:
+    """Load a sidecar file into a pandas DataFrame."""
+    return to_dataframe(read_table(path))
+
+
+def iter_dataframes(
+    path: Path,
+    batch_rows: int = RECORD_BATCH_ROWS,
+    columns: list[str] | None = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a sidecar file as DataFrames of at most batch_rows rows.
+
+    Record batches are memory-mapped, so only the yielded batch (and only
+    the requested columns) is materialized in pandas. A sidecar without
+    rows yields one empty frame carrying its columns.
+    """
+    with pa.memory_map(str(path), "r") as source:
+        reader = pa.ipc.open_file(source)
+        yielded = False
+        for index in range(reader.num_record_batches):
+            table = pa.Table.from_batches([reader.get_batch(index)])
+            if columns is not None:
+                table = table.select(columns)
+            for offset in range(0, table.num_rows, batch_rows):
+                yield to_dataframe(table.slice(offset, batch_rows))
+                yielded = True
+        if not yielded:
+            table = reader.schema.empty_table()
+            yield to_dataframe(table.select(columns) if columns is not None else table)
+
+
+def read_row_table(
+    path: Path,
+    offset: int,
+    limit: int,
+    columns: list[str] | None = None,
+    batch_row_offsets: list[int] | None = None
+) -> pa.Table:
+    """
+    Read rows [offset, offset + limit) of a sidecar file as an Arrow table.
+
+    Only the record batches overlapping the range are touched, located
+    with batch_row_offsets (see read_index), so reading a page deep into
+    the file costs the same as reading the first one. The table refers to
+    the memory-mapped file without copying.
+
+    Args:
+        path: Sidecar path
+        offset: First row to return
+        limit: Maximum rows to return
+        columns: Only these columns, in this order (default all)
+        batch_row_offsets: First row of each record batch; read from the
+            batch headers when not given
+    """
+    with pa.memory_map(str(path), "r") as source:
+        reader = pa.ipc.open_file(source)
+        if batch_row_offsets is None:
+            batch_row_offsets = read_index(path)["batch_row_offsets"]
+
+        first = max(bisect.bisect_right(batch_row_offsets, offset) - 1, 0)
+        position = offset - batch_row_offsets[first] if batch_row_offsets else 0
+        batches = []
+        for index in range(first, reader.num_record_batches):
+            if limit <= 0:
+                break
+            batch = reader.get_batch(index).slice(position, limit)
+            position = 0
+            batches.append(batch)
+            limit -= batch.num_rows
+
+        table = pa.Table.from_batches(batches, schema=reader.schema)
+        if columns is not None:
+            table = table.select(columns)
+        return table
+
+
+def read_rows(
+    path: Path,
+    offset: int,
+    limit: int,
+    columns: list[str] | None = None,
+    batch_row_offsets: list[int] | None = None
+) -> pd.DataFrame:
+    """Read rows [offset, offset + limit) of a sidecar file (see read_row_table)."""
+    return to_dataframe(read_row_table(path, offset, limit, columns, batch_row_offsets))
+
+
+def read_sample(path: Path, rows: int) -> pd.DataFrame:
+    """
+    Read up to rows rows spread evenly over a sidecar file.
+
+    Rows are taken from the memory-mapped file, so only the sample is
+    materialized however large the file.
+    """
+    table = read_table(path)
+    if table.num_rows > rows:
+        table = table.take(pa.array(np.linspace(0, table.num_rows - 1, rows).astype(np.int64)))
+    return to_dataframe(table)
+
+
+def table_to_ipc_stream(table: pa.Table) -> bytes:
+    """Serialize a table in the Arrow IPC streaming format."""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def iter_ipc_stream(path: Path, columns: list[str] | None = None) -> Iterator[bytes]:
+    """
+    Stream a sidecar file in the Arrow IPC streaming format, one record batch per chunk.
+
+    Batches are copied straight from the memory-mapped file, without going
+    through pandas, so only one batch is held in memory. Mixed-value
+    columns are sent as plain text (see display_table).
+    """
+    with pa.memory_map(str(path), "r") as source:
+        reader = pa.ipc.open_file(source)
+        names = columns if columns is not None else reader.schema.names
+        schema = display_table(reader.schema.empty_table().select(names)).schema
+        yield schema.serialize().to_pybytes()
+        for index in range(reader.num_record_batches):
+            table = display_table(pa.Table.from_batches([reader.get_batch(index)]).select(names))
+            for batch in table.to_batches():
+                yield batch.serialize().to_pybytes()
+    yield IPC_STREAM_END
+
+
+def read_columns(path: Path) -> list[str]:
+    """Column names of a sidecar file, read from its schema."""
+    with pa.memory_map(str(path), "r") as source:
+        return pa.ipc.open_file(source).schema.names
+
+
+def count_rows(path: Path) -> int:
+    """Number of rows in a sidecar file, read from its record batch headers."""
+    with pa.memory_map(str(path), "r") as source:
+        reader = pa.ipc.open_file(source)
+        return sum(reader.get_batch(index).num_rows for index in range(reader.num_record_batches))
+
+
+def read_index(path: Path) -> dict:
+    """
+    Summarize a sidecar from its schema and record batch headers.
+
+    Returns:
+        Dict with "rows", "columns", "dtypes" (pandas dtype names, as
+        to_dataframe returns them) and "batch_row_offsets" (first row of
+        each record batch, for seeking to a row without scanning)
+    """
+    with pa.memory_map(str(path), "r") as source:
+        reader = pa.ipc.open_file(source)
+        batch_row_offsets = []
+        rows = 0
+        for index in range(reader.num_record_batches):
+            batch_row_offsets.append(rows)
+            rows += reader.get_batch(index).num_rows
+        dtypes = to_dataframe(reader.schema.empty_table()).dtypes
+    return {
+        "rows": rows,
+        "columns": dtypes.index.tolist(),
+        "dtypes": {name: str(dtype) for name, dtype in dtypes.items()},
+        "batch_row_offsets": batch_row_offsets
+    }
+
+
+def read_metadata(path: Path) -> dict[bytes, bytes]:
+    """Read only the schema metadata of a sidecar file."""
+    with pa.memory_map(str(path), "r") as source:
+        return pa.ipc.open_file(source).schema.metadata or {}
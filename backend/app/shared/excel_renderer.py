@@ -0,0 +1,108 @@
+"""Background pre-rendering of Excel files from columnar sidecars."""
+import os
+import queue
+import threading
+import logging
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-output locks so a download and the background worker never render the same file twice
+_render_locks: dict[str, threading.Lock] = {}
+_render_locks_guard = threading.Lock()
+
+
+def get_render_lock(key: str) -> threading.Lock:
+    """Get the lock guarding XLSX materialization of an output file (by blob name)."""
+    with _render_locks_guard:
+        lock = _render_locks.get(key)
+        if lock is None:
+            lock = _render_locks[key] = threading.Lock()
+        return lock
+
+
+def release_render_lock(key: str) -> None:
+    """Forget a render lock once it is no longer needed."""
+    with _render_locks_guard:
+        _render_locks.pop(key, None)
+
+
+def cpu_is_idle() -> bool:
+    """
+    Check whether the machine has spare CPU for speculative rendering.
+
+    Uses the 1-minute load average per core; platforms without load
+    averages are always treated as idle.
+    """
+    try:
+        load_1m, _, _ = os.getloadavg()
+    except (AttributeError, OSError):
+        return True
+    return load_1m / (os.cpu_count() or 1) < settings.background_render_max_load
+
+
+class BackgroundRenderer:
+    """Daemon worker that renders queued file_ids to XLSX while the CPU is idle."""
+
+    def __init__(self):
+        self._queue: queue.Queue[str] = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        """Start the worker thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="excel-renderer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the worker thread; queued files stay renderable on download."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def enqueue(self, file_id: str):
+        """Schedule a file_id for speculative XLSX rendering."""
+        self._queue.put(file_id)
+
+    def _run(self):
+        # Imported lazily to avoid a circular import with file_service
+        from app.shared.file_service import FileService
+
+        file_service = FileService()
+        while not self._stop.is_set():
+            try:
+                file_id = self._queue.get(timeout=settings.background_render_poll_seconds)
+            except queue.Empty:
+                continue
+
+            # Wait for idle CPU; downloads can still render the file on demand meanwhile
+            while not cpu_is_idle() and not self._stop.is_set():
+                self._stop.wait(settings.background_render_poll_seconds)
+            if self._stop.is_set():
+                break
+
+            try:
+                if file_service.file_exists(file_id):
+                    file_service.materialize_excel(
+                        file_id,
+                        compression_level=settings.background_render_compression_level
+                    )
+            except HTTPException as e:
+                logger.warning("Background render of %s failed: %s", file_id, e.detail)
+            except Exception:
+                logger.exception("Background render of %s failed", file_id)
+
+
+renderer = BackgroundRenderer()
+
+
+def enqueue_render(file_id: str):
+    """Queue a file_id on the application's renderer (picklable entry point)."""
+    renderer.enqueue(file_id)
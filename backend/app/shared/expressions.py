@@ -0,0 +1,1126 @@
+"""
+Formula language for calculated columns.
+
+Formulas are parsed into an AST, type-checked against the file's column
+dtypes and evaluated with vectorized pandas / NumPy operations over whole
+columns (or batches of them). Syntax:
+
+- Columns: ``Price``, or ``[Unit Price]`` (also in backticks) for names
+  with spaces or symbols
+- Literals: ``12``, ``1.5``, ``'text'`` / ``"text"``, ``TRUE``, ``FALSE``, ``NULL``
+- Arithmetic: ``+ - * / // % ^`` (``**`` also works; ``//`` is floor
+  division); dates ``+``/``-`` days, date ``-`` date gives days; text
+  ``+`` text concatenates
+- Comparison: ``= == != <> < <= > >=``, chained as in ``1 < [a] < 5``;
+  ``[a] IN (1, 2)`` or ``[a] NOT IN ['x', 'y']``; dates compare with
+  ``'2024-01-31'``
+- Logic: ``AND OR NOT`` (or ``& | ~``); ``&`` concatenates when either side is text
+- Conditionals: ``IF(cond, then, else)``,
+  ``CASE WHEN cond THEN value ... ELSE value END``
+- Functions: see FUNCTIONS
+
+Missing values propagate through arithmetic and functions (dividing by
+zero with ``/``, ``//``, ``%`` or ``^`` also gives a missing value), comparisons
+with a missing value are false, and text concatenation treats them as
+empty text. Identical subexpressions, also across formulas compiled
+together, are evaluated once; formulas compiled together may use each
+other's results by name.
+"""
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+class ExpressionError(Exception):
+    """Raised when a formula cannot be parsed or type-checked."""
+
+    def __init__(self, message: str, position: int | None = None):
+        if position is not None:
+            message = f"{message} (at position {position + 1})"
+        super().__init__(message)
+
+
+# ============= Types =============
+
+INT = "int"
+FLOAT = "float"
+BOOL = "bool"
+TEXT = "text"
+DATE = "date"
+NULL = "null"  # Type of the NULL literal, compatible with every other type
+
+NUMERIC = (INT, FLOAT, BOOL)
+
+
+class ExprType(NamedTuple):
+    """Static type of an expression: its kind and whether it may be missing."""
+    kind: str
+    nullable: bool
+
+
+def type_of_dtype(dtype: Any) -> ExprType:
+    """
+    Formula type of a column with a pandas dtype.
+
+    Raises:
+        ExpressionError: For dtypes formulas cannot use (e.g. timedeltas)
+    """
+    dtype = pd.api.types.pandas_dtype(dtype)
+    kind = dtype.kind
+    # Nullable integer and boolean dtypes (Int8, ..., boolean) may hold missing values
+    nullable = isinstance(dtype, pd.api.extensions.ExtensionDtype)
+    if kind in "iu":
+        return ExprType(INT, nullable)
+    if kind == "f":
+        return ExprType(FLOAT, True)
+    if kind == "b":
+        return ExprType(BOOL, nullable)
+    if kind == "M":
+        return ExprType(DATE, True)
+    if kind == "O":
+        return ExprType(TEXT, True)
+    raise ExpressionError(f"Columns of type {dtype} cannot be used in formulas")
+
+
+def _unify(a: ExprType, b: ExprType, position: int | None) -> ExprType:
+    """Common type of two branches (IF, CASE, COALESCE, MIN, ...)."""
+    nullable = a.nullable or b.nullable
+    if a.kind == NULL:
+        return ExprType(b.kind, True)
+    if b.kind == NULL:
+        return ExprType(a.kind, True)
+    if a.kind == b.kind:
+        return ExprType(a.kind, nullable)
+    if a.kind in NUMERIC and b.kind in NUMERIC:
+        return ExprType(FLOAT if FLOAT in (a.kind, b.kind) else INT, nullable)
+    raise ExpressionError(f"Incompatible types {a.kind} and {b.kind}", position)
+
+
+# ============= Syntax tree =============
+# Nodes compare and hash by structure (not position), so identical
+# subexpressions share one evaluation.
+
+@dataclass(frozen=True)
+class Literal:
+    value: Any
+    kind: str
+    position: int = field(default=0, compare=False)
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    position: int = field(default=0, compare=False)
+
+
+@dataclass(frozen=True)
+class Unary:
+    op: str
+    operand: Any
+    position: int = field(default=0, compare=False)
+
+
+@dataclass(frozen=True)
+class Binary:
+    op: str
+    left: Any
+    right: Any
+    position: int = field(default=0, compare=False)
+
+
+@dataclass(frozen=True)
+class Call:
+    name: str
+    args: tuple
+    position: int = field(default=0, compare=False)
+
+
+@dataclass(frozen=True)
+class Case:
+    whens: tuple  # ((condition, value), ...)
+    default: Any
+    position: int = field(default=0, compare=False)
+
+
+# ============= Parser =============
+
+_TOKEN_RE = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<string>'(?:[^']|'')*'|"(?:[^"]|"")*")
+  | (?P<bracket>\[[^\]]+\]|`[^`]+`)
+  | (?P<name>[^\W\d][\w‌]*)
+  | (?P<op>\*\*|//|<=|>=|<>|!=|==|[-+*/%^&|~()<>=,])
+""", re.VERBOSE)
+
+_KEYWORDS = {"AND", "OR", "NOT", "IN", "TRUE", "FALSE", "NULL", "CASE", "WHEN", "THEN", "ELSE", "END"}
+
+_COMPARISONS = {"=": "==", "==": "==", "!=": "!=", "<>": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+
+class _Token(NamedTuple):
+    kind: str  # number, string, column, name, keyword, op, end
+    value: Any
+    position: int
+
+
+def _tokenize(text: str, offset: int = 0) -> list[_Token]:
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if not match:
+            raise ExpressionError(f"Unexpected character {text[position]!r}", offset + position)
+        kind = match.lastgroup
+        raw = match.group()
+        if kind == "number":
+            value = float(raw) if any(c in raw for c in ".eE") else int(raw)
+            tokens.append(_Token("number", value, offset + position))
+        elif kind == "string":
+            quote = raw[0]
+            tokens.append(_Token("string", raw[1:-1].replace(quote * 2, quote), offset + position))
+        elif kind == "bracket":
+            tokens.append(_Token("column", raw[1:-1], offset + position))
+        elif kind == "name":
+            if raw.upper() in _KEYWORDS:
+                tokens.append(_Token("keyword", raw.upper(), offset + position))
+            else:
+                tokens.append(_Token("name", raw, offset + position))
+        elif kind == "op":
+            tokens.append(_Token("op", raw, offset + position))
+        position = match.end()
+    tokens.append(_Token("end", None, offset + len(text)))
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser; one method per precedence level, loosest first."""
+
+    def __init__(self, text: str, offset: int = 0):
+        self.text = text
+        self.offset = offset
+        self.tokens = _tokenize(text, offset)
+        self.index = 0
+
+    @property
+    def token(self) -> _Token:
+        return self.tokens[self.index]
+
+    def _accept(self, kind: str, *values) -> _Token | None:
+        token = self.token
+        if token.kind == kind and (not values or token.value in values):
+            self.index += 1
+            return token
+        return None
+
+    def _expect(self, kind: str, value: str) -> _Token:
+        token = self._accept(kind, value)
+        if token is None:
+            found = "end of formula" if self.token.kind == "end" else repr(str(self.token.value))
+            raise ExpressionError(f"Expected {value!r} but found {found}", self.token.position)
+        return token
+
+    def parse(self):
+        node = self._or()
+        if self.token.kind != "end":
+            raise ExpressionError(f"Unexpected {str(self.token.value)!r}", self.token.position)
+        return node
+
+    def _or(self):
+        node = self._and()
+        while token := (self._accept("keyword", "OR") or self._accept("op", "|")):
+            node = Binary("OR", node, self._and(), token.position)
+        return node
+
+    def _and(self):
+        node = self._not()
+        while True:
+            if token := self._accept("keyword", "AND"):
+                node = Binary("AND", node, self._not(), token.position)
+            elif token := self._accept("op", "&"):
+                # Logical AND, or text concatenation (decided by the type checker)
+                node = Binary("&", node, self._not(), token.position)
+            else:
+                return node
+
+    def _not(self):
+        if token := (self._accept("keyword", "NOT") or self._accept("op", "~")):
+            return Unary("NOT", self._not(), token.position)
+        return self._comparison()
+
+    def _comparison(self):
+        node = self._additive()
+        if token := self._accept("keyword", "IN"):
+            return self._in(node, token)
+        if self.token.kind == "keyword" and self.token.value == "NOT" and self.tokens[self.index + 1].value == "IN":
+            token = self._accept("keyword", "NOT")
+            return Unary("NOT", self._in(node, self._accept("keyword", "IN")), token.position)
+        
+        # Chained comparisons (1 < [a] < 5) hold when every adjacent pair does
+        comparisons = []
+        while token := self._accept("op", *_COMPARISONS):
+            right = self._additive()
+            comparisons.append(Binary(_COMPARISONS[token.value], node, right, token.position))
+            node = right
+        if not comparisons:
+            return node
+        node = comparisons[0]
+        for comparison in comparisons[1:]:
+            node = Binary("AND", node, comparison, comparison.position)
+        return node
+    
+    def _in(self, operand, in_token: _Token):
+        """operand IN (values) or IN [values], as an OR of equality tests."""
+        bracket = self.token
+        if bracket.kind == "column" and self.text[bracket.position - self.offset] == "[":
+            # A list here, not a column name; its items are formulas again
+            self._accept("column")
+            parser = _Parser(bracket.value, bracket.position + 1)
+            values = parser._values()
+            if parser.token.kind != "end":
+                raise ExpressionError(f"Unexpected {str(parser.token.value)!r}", parser.token.position)
+        else:
+            self._expect("op", "(")
+            if self.token.kind == "op" and self.token.value == ")":
+                raise ExpressionError("IN needs at least one value", self.token.position)
+            values = self._values()
+            self._expect("op", ")")
+        return _any_of([Binary("==", operand, value, in_token.position) for value in values])
+    
+    def _values(self) -> list:
+        values = [self._or()]
+        while self._accept("op", ","):
+            values.append(self._or())
+        return values
+
+    def _additive(self):
+        node = self._multiplicative()
+        while token := self._accept("op", "+", "-"):
+            node = Binary(token.value, node, self._multiplicative(), token.position)
+        return node
+
+    def _multiplicative(self):
+        node = self._unary()
+        while token := self._accept("op", "*", "/", "//", "%"):
+            node = Binary(token.value, node, self._unary(), token.position)
+        return node
+
+    def _unary(self):
+        if token := self._accept("op", "-"):
+            return Unary("-", self._unary(), token.position)
+        if self._accept("op", "+"):
+            return self._unary()
+        return self._power()
+
+    def _power(self):
+        node = self._primary()
+        if token := self._accept("op", "^", "**"):
+            # Right-associative, and binds tighter than a unary minus on its left
+            node = Binary("^", node, self._unary(), token.position)
+        return node
+
+    def _primary(self):
+        token = self.token
+        if self._accept("number"):
+            return Literal(token.value, INT if isinstance(token.value, int) else FLOAT, token.position)
+        if self._accept("string"):
+            return Literal(token.value, TEXT, token.position)
+        if self._accept("column"):
+            return Column(token.value, token.position)
+        if self._accept("keyword", "TRUE", "FALSE"):
+            return Literal(token.value == "TRUE", BOOL, token.position)
+        if self._accept("keyword", "NULL"):
+            return Literal(None, NULL, token.position)
+        if self._accept("keyword", "CASE"):
+            return self._case(token)
+        if self._accept("op", "("):
+            node = self._or()
+            self._expect("op", ")")
+            return node
+        if self._accept("name"):
+            if self._accept("op", "("):
+                return self._call(token)
+            return Column(token.value, token.position)
+        if token.kind == "end":
+            raise ExpressionError("Unexpected end of formula", token.position)
+        raise ExpressionError(f"Unexpected {str(token.value)!r}", token.position)
+
+    def _call(self, name_token: _Token):
+        args = []
+        if not self._accept("op", ")"):
+            args.append(self._or())
+            while self._accept("op", ","):
+                args.append(self._or())
+            self._expect("op", ")")
+        return Call(name_token.value.upper(), tuple(args), name_token.position)
+
+    def _case(self, case_token: _Token):
+        whens = []
+        while self._accept("keyword", "WHEN"):
+            condition = self._or()
+            self._expect("keyword", "THEN")
+            whens.append((condition, self._or()))
+        if not whens:
+            raise ExpressionError("CASE needs at least one WHEN", self.token.position)
+        default = self._or() if self._accept("keyword", "ELSE") else Literal(None, NULL, self.token.position)
+        self._expect("keyword", "END")
+        return Case(tuple(whens), default, case_token.position)
+
+
+def _any_of(conditions: list):
+    """OR of conditions, as a balanced tree so long IN lists stay shallow."""
+    if len(conditions) == 1:
+        return conditions[0]
+    middle = len(conditions) // 2
+    return Binary("OR", _any_of(conditions[:middle]), _any_of(conditions[middle:]), conditions[middle].position)
+
+
+@lru_cache(maxsize=1024)
+def parse(text: str):
+    """
+    Parse a formula into its syntax tree (cached by text).
+
+    Raises:
+        ExpressionError: If the formula is not valid syntax
+    """
+    return _Parser(text).parse()
+
+
+def referenced_columns(node) -> set[str]:
+    """Names of the columns a syntax tree reads."""
+    if isinstance(node, Column):
+        return {node.name}
+    if isinstance(node, (Unary,)):
+        return referenced_columns(node.operand)
+    if isinstance(node, Binary):
+        return referenced_columns(node.left) | referenced_columns(node.right)
+    if isinstance(node, Call):
+        return set().union(*(referenced_columns(arg) for arg in node.args))
+    if isinstance(node, Case):
+        parts = [referenced_columns(part) for when in node.whens for part in when]
+        return set().union(referenced_columns(node.default), *parts)
+    return set()
+
+
+# ============= Missing values and conversions =============
+
+def _missing(index: pd.Index, kind: str) -> pd.Series:
+    """All-missing Series of a kind."""
+    if kind in (INT, FLOAT):
+        return pd.Series(np.nan, index=index, dtype=np.float64)
+    if kind == DATE:
+        return pd.Series(pd.NaT, index=index, dtype="datetime64[ns]")
+    return pd.Series(None, index=index, dtype=object)
+
+
+def _series(value, index: pd.Index) -> pd.Series:
+    """Broadcast a constant to a Series (Series pass through)."""
+    if isinstance(value, pd.Series):
+        return value
+    if value is None:
+        return pd.Series(None, index=index, dtype=object)
+    return pd.Series([value] * len(index), index=index)
+
+
+def _to_text(value, index: pd.Index) -> pd.Series:
+    """Text form of values; missing stays missing, whole floats lose their .0."""
+    values = _series(value, index)
+    if values.dtype.kind == "f":
+        text = values.map(lambda x: str(int(x)) if x.is_integer() else str(x), na_action="ignore")
+    elif values.dtype.kind == "M":
+        text = values.dt.strftime("%Y-%m-%d").where(values.notna())
+        text = text.where(values.dt.normalize() == values, values.astype(str))
+    elif values.dtype.kind == "b":
+        text = values.map({True: "TRUE", False: "FALSE"})
+    else:
+        text = values.map(lambda x: x if isinstance(x, str) else str(x), na_action="ignore")
+    return text.astype(object).where(values.notna(), None)
+
+
+def _column_values(values: pd.Series) -> pd.Series:
+    """
+    Column in the NumPy dtype formulas compute with.
+
+    Compact and nullable dtypes are widened so arithmetic cannot overflow
+    (Int8, float32) and missing values are NaN or None like elsewhere.
+    """
+    kind = values.dtype.kind
+    if kind in "iu" and isinstance(values.dtype, pd.api.extensions.ExtensionDtype):
+        return values.astype(np.float64)
+    if kind in "iu":
+        return values.astype(np.int64)
+    if kind == "f":
+        return values.astype(np.float64)
+    if kind == "b" and isinstance(values.dtype, pd.api.extensions.ExtensionDtype):
+        return values.astype(object).where(values.notna(), None)
+    if kind == "O" and values.dtype != object:
+        return values.astype(object).where(values.notna(), None)
+    return values
+
+
+def _is_true(value, index: pd.Index) -> pd.Series:
+    """Condition as a plain boolean Series (missing counts as false)."""
+    values = _series(value, index)
+    if values.dtype == bool:
+        return values
+    return values.fillna(False).astype(bool)
+
+
+def _finalize(value, etype: ExprType, index: pd.Index) -> pd.Series:
+    """Result column with the dtype its static type promises (the same for every batch)."""
+    if etype.kind == NULL:
+        return _missing(index, TEXT)
+    values = _series(value, index)
+    if etype.kind == INT:
+        return values.astype(np.float64 if etype.nullable else np.int64)
+    if etype.kind == FLOAT:
+        return values.astype(np.float64)
+    if etype.kind == BOOL:
+        return values.astype(object if etype.nullable else bool)
+    if etype.kind == DATE:
+        return pd.to_datetime(values)
+    return values.astype(object).where(values.notna(), None)
+
+
+# ============= Type checker =============
+
+def _constant(node, kind: str, name: str):
+    """Value of a literal argument that has to be constant."""
+    if not isinstance(node, Literal) or node.kind not in ((kind,) if kind != FLOAT else (INT, FLOAT)):
+        raise ExpressionError(f"{name} needs a constant {kind} here", node.position)
+    return node.value
+
+
+@dataclass
+class _FunctionSpec:
+    min_args: int
+    max_args: int | None  # None: any number
+    check: Callable  # (arg types, call node) -> result ExprType
+    evaluate: Callable  # (evaluated args, call node, index) -> value
+
+
+def _check_numeric(etype: ExprType, node) -> None:
+    if etype.kind not in NUMERIC + (NULL,):
+        raise ExpressionError(f"Expected a number, got {etype.kind}", node.position)
+
+
+def _check_kind(etype: ExprType, kinds: tuple, node) -> None:
+    if etype.kind not in kinds + (NULL,):
+        raise ExpressionError(f"Expected {' or '.join(kinds)}, got {etype.kind}", node.position)
+
+
+def _nullable(*types: ExprType) -> bool:
+    return any(t.nullable or t.kind == NULL for t in types)
+
+
+class _Checker:
+    """Infers the ExprType of every node of one or more formulas."""
+
+    def __init__(self, column_types: dict[str, ExprType]):
+        self.column_types = column_types
+        self.types: dict[Any, ExprType] = {}
+
+    def check(self, node) -> ExprType:
+        if node not in self.types:
+            self.types[node] = self._infer(node)
+        return self.types[node]
+
+    def _infer(self, node) -> ExprType:
+        if isinstance(node, Literal):
+            return ExprType(node.kind, node.kind == NULL)
+        if isinstance(node, Column):
+            if node.name not in self.column_types:
+                raise ExpressionError(f"Unknown column {node.name!r}", node.position)
+            return self.column_types[node.name]
+        if isinstance(node, Unary):
+            operand = self.check(node.operand)
+            if node.op == "NOT":
+                _check_kind(operand, (BOOL,), node.operand)
+                return ExprType(BOOL, False)
+            _check_numeric(operand, node.operand)
+            return ExprType(FLOAT if operand.kind == FLOAT else INT, _nullable(operand))
+        if isinstance(node, Binary):
+            return self._binary(node, self.check(node.left), self.check(node.right))
+        if isinstance(node, Case):
+            result = ExprType(NULL, True)
+            for condition, value in node.whens:
+                _check_kind(self.check(condition), (BOOL,), condition)
+                result = _unify(result, self.check(value), value.position)
+            return _unify(result, self.check(node.default), node.default.position)
+        if isinstance(node, Call):
+            spec = FUNCTIONS.get(node.name)
+            if spec is None:
+                raise ExpressionError(f"Unknown function {node.name}", node.position)
+            count = len(node.args)
+            if count < spec.min_args or (spec.max_args is not None and count > spec.max_args):
+                raise ExpressionError(f"Wrong number of arguments for {node.name}", node.position)
+            return spec.check([self.check(arg) for arg in node.args], node)
+        raise ExpressionError("Unsupported expression")
+
+    def _binary(self, node: Binary, left: ExprType, right: ExprType) -> ExprType:
+        op = node.op
+        nullable = _nullable(left, right)
+        if op == "&" and TEXT in (left.kind, right.kind):
+            return ExprType(TEXT, False)
+        if op in ("AND", "OR", "&"):
+            _check_kind(left, (BOOL,), node.left)
+            _check_kind(right, (BOOL,), node.right)
+            return ExprType(BOOL, False)
+        if op in _COMPARISONS.values():
+            kinds = {left.kind, right.kind} - {NULL}
+            comparable = (
+                len(kinds) <= 1
+                or kinds <= set(NUMERIC)
+                or (kinds == {DATE, TEXT} and isinstance(node.right if right.kind == TEXT else node.left, Literal))
+            )
+            if not comparable:
+                raise ExpressionError(f"Cannot compare {left.kind} with {right.kind}", node.position)
+            if kinds == {DATE, TEXT}:
+                literal = node.right if right.kind == TEXT else node.left
+                try:
+                    pd.Timestamp(literal.value)
+                except ValueError:
+                    raise ExpressionError(f"Invalid date {literal.value!r}", literal.position)
+            return ExprType(BOOL, False)
+        if op == "+" and left.kind == TEXT and right.kind in (TEXT, NULL):
+            return ExprType(TEXT, nullable)
+        if op in ("+", "-") and left.kind == DATE and right.kind in NUMERIC + (NULL,):
+            return ExprType(DATE, True)
+        if op == "+" and right.kind == DATE and left.kind in NUMERIC + (NULL,):
+            return ExprType(DATE, True)
+        if op == "-" and left.kind == DATE and right.kind == DATE:
+            return ExprType(FLOAT, True)
+        _check_numeric(left, node.left)
+        _check_numeric(right, node.right)
+        # Division by zero gives a missing value, so only a nonzero constant divisor keeps nulls out;
+        # powers may divide by zero (0 ^ -1), overflow or have no real value (-8 ^ 0.5)
+        nullable = nullable or op == "^" or (
+            op in ("/", "//", "%") and not (isinstance(node.right, Literal) and node.right.value)
+        )
+        if op in ("/", "^") or FLOAT in (left.kind, right.kind):
+            return ExprType(FLOAT, nullable)
+        return ExprType(INT, nullable)
+
+
+# ============= Evaluation =============
+
+def _compare(op: str, left, right, left_type: ExprType, right_type: ExprType, index: pd.Index):
+    if left_type.kind == DATE and right_type.kind == TEXT:
+        right = pd.Timestamp(right)
+    elif right_type.kind == DATE and left_type.kind == TEXT:
+        left = pd.Timestamp(left)
+    if left is None or right is None:
+        return pd.Series(False, index=index)
+    left = _series(left, index)
+    result = {
+        "==": lambda: left == right,
+        "!=": lambda: left != right,
+        "<": lambda: left < right,
+        "<=": lambda: left <= right,
+        ">": lambda: left > right,
+        ">=": lambda: left >= right,
+    }[op]()
+    # Comparisons with a missing value are false
+    missing = left.isna()
+    if isinstance(right, pd.Series):
+        missing |= right.isna()
+    return result & ~missing
+
+
+def _arithmetic(op: str, left, right, result_type: ExprType, index: pd.Index):
+    if left is None or right is None:
+        return _missing(index, result_type.kind)
+    if result_type.kind == DATE:
+        if isinstance(_series(left, index).dtype, np.dtype) and _series(left, index).dtype.kind != "M":
+            left, right = right, left
+        days = pd.to_timedelta(_series(right, index).astype(np.float64), unit="D")
+        return _series(left, index) + days if op == "+" else _series(left, index) - days
+    if op == "-" and result_type.kind == FLOAT and _series(left, index).dtype.kind == "M":
+        return (_series(left, index) - _series(right, index)) / pd.Timedelta(days=1)
+    if result_type.kind == TEXT:
+        return _series(left, index) + right
+    if isinstance(left, pd.Series) and left.dtype == bool:
+        left = left.astype(np.int64)
+    if isinstance(right, pd.Series) and right.dtype == bool:
+        right = right.astype(np.int64)
+    left = _series(left, index)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if op == "+":
+            return left + right
+        if op == "-":
+            return left - right
+        if op == "*":
+            return left * right
+        if op == "/":
+            return (left / right).replace([np.inf, -np.inf], np.nan)
+        if op == "//":
+            return (left.astype(np.float64) // right).where(_series(right, index) != 0)
+        if op == "%":
+            return (left.astype(np.float64) % right).where(_series(right, index) != 0)
+        # 0 ^ -1 divides by zero: missing, like /
+        return (left.astype(np.float64) ** right).replace([np.inf, -np.inf], np.nan)
+
+
+def _concat_text(args: list, index: pd.Index) -> pd.Series:
+    """Concatenate values as text; missing values count as empty text."""
+    result = pd.Series("", index=index, dtype=object)
+    for arg in args:
+        result = result + _to_text(arg, index).fillna("")
+    return result
+
+
+def _substitute(node, replace: Callable[[Column], Any]):
+    """Copy of a syntax tree with its Column nodes passed through replace."""
+    if isinstance(node, Column):
+        return replace(node)
+    if isinstance(node, Unary):
+        return Unary(node.op, _substitute(node.operand, replace), node.position)
+    if isinstance(node, Binary):
+        return Binary(node.op, _substitute(node.left, replace), _substitute(node.right, replace), node.position)
+    if isinstance(node, Call):
+        return Call(node.name, tuple(_substitute(arg, replace) for arg in node.args), node.position)
+    if isinstance(node, Case):
+        whens = tuple(
+            (_substitute(condition, replace), _substitute(value, replace))
+            for condition, value in node.whens
+        )
+        return Case(whens, _substitute(node.default, replace), node.position)
+    return node
+
+
+# Threads shared by all evaluations, created on first use. Separate from
+# the operation thread pool, whose threads call evaluate and would wait on
+# their own queue.
+_evaluation_pool: ThreadPoolExecutor | None = None
+_evaluation_pool_lock = threading.Lock()
+
+
+def _get_evaluation_pool(workers: int) -> ThreadPoolExecutor:
+    global _evaluation_pool
+    with _evaluation_pool_lock:
+        if _evaluation_pool is None:
+            _evaluation_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="formula")
+        return _evaluation_pool
+
+
+class _Memo:
+    """Values of evaluated nodes, each computed once even when formulas are evaluated on several threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.futures: dict[Any, Future] = {}
+
+
+class CompiledFormulas:
+    """
+    Formulas type-checked against a file's columns, ready to evaluate on its batches.
+
+    A formula may reference the result of another formula by name (its
+    own name still means the existing column). References are resolved
+    by inlining the referenced formula's tree, so the formulas form one
+    DAG of shared nodes over the file's columns.
+    """
+
+    def __init__(self, formulas: dict[str, str], column_types: dict[str, ExprType]):
+        parsed = {name: parse(text) for name, text in formulas.items()}
+        checker = _Checker(column_types)
+        roots = {}
+        resolving = []
+
+        def resolve(name: str):
+            if name in roots:
+                return roots[name]
+            if name in resolving:
+                cycle = " -> ".join(resolving[resolving.index(name):] + [name])
+                error = ExpressionError(f"Circular reference between formulas: {cycle}")
+                error.formula = name
+                raise error
+            resolving.append(name)
+            try:
+                root = _substitute(parsed[name], lambda column: (
+                    resolve(column.name) if column.name in parsed and column.name != name else column
+                ))
+                checker.check(root)
+            except ExpressionError as e:
+                # Name the formula the error is in (once, at the innermost formula)
+                if len(parsed) > 1 and not getattr(e, "formula", None):
+                    e = ExpressionError(f"{name}: {e}")
+                    e.formula = name
+                raise e
+            resolving.pop()
+            roots[name] = root
+            return root
+
+        self.roots = {name: resolve(name) for name in parsed}
+        self.output_types = {name: checker.types[root] for name, root in self.roots.items()}
+        self._types = checker.types
+        self.columns = set().union(*(referenced_columns(root) for root in self.roots.values()))
+
+    def evaluate(self, df: pd.DataFrame, workers: int = 1) -> dict[str, pd.Series]:
+        """
+        Evaluate every formula on a DataFrame in one pass.
+
+        Args:
+            df: Rows with the columns the formulas were compiled against
+            workers: Threads to evaluate formulas on concurrently (the
+                size of the pool shared by all calls, set by the first
+                call); shared subexpressions are still computed once
+
+        Returns:
+            Result column by formula name; dtypes depend only on the
+            column types the formulas were compiled with
+        """
+        memo = _Memo()
+        roots = list(self.roots.values())
+        if workers > 1 and len(roots) > 1:
+            pool = _get_evaluation_pool(workers)
+            values = list(pool.map(lambda root: self._evaluate(root, df, memo), roots))
+        else:
+            values = [self._evaluate(root, df, memo) for root in roots]
+        return {
+            name: _finalize(value, self.output_types[name], df.index)
+            for name, value in zip(self.roots, values)
+        }
+
+    def _evaluate(self, node, df: pd.DataFrame, memo: _Memo):
+        with memo.lock:
+            future = memo.futures.get(node)
+            owner = future is None
+            if owner:
+                future = memo.futures[node] = Future()
+        if owner:
+            # Another thread needing this node waits for it; the tree is
+            # acyclic, so whoever computes it never waits on the waiter
+            try:
+                future.set_result(self._compute(node, df, memo))
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+        return future.result()
+
+    def _compute(self, node, df: pd.DataFrame, memo: _Memo):
+        index = df.index
+        etype = self._types[node]
+        if isinstance(node, Literal):
+            return node.value
+        if isinstance(node, Column):
+            return _column_values(df[node.name])
+        if isinstance(node, Unary):
+            operand = self._evaluate(node.operand, df, memo)
+            if node.op == "NOT":
+                return ~_is_true(operand, index)
+            if operand is None:
+                return _missing(index, etype.kind)
+            if isinstance(operand, pd.Series) and operand.dtype == bool:
+                operand = operand.astype(np.int64)
+            return -operand
+        if isinstance(node, Binary):
+            left = self._evaluate(node.left, df, memo)
+            right = self._evaluate(node.right, df, memo)
+            left_type, right_type = self._types[node.left], self._types[node.right]
+            if node.op in ("AND", "OR", "&") and etype.kind == BOOL:
+                left, right = _is_true(left, index), _is_true(right, index)
+                return left | right if node.op == "OR" else left & right
+            if etype.kind == TEXT and node.op == "&":
+                return _concat_text([left, right], index)
+            if node.op in _COMPARISONS.values():
+                return _compare(node.op, left, right, left_type, right_type, index)
+            return _arithmetic(node.op, left, right, etype, index)
+        if isinstance(node, Case):
+            result = _finalize(self._evaluate(node.default, df, memo), etype, index)
+            decided = pd.Series(False, index=index)
+            branches = []
+            for condition, value in node.whens:
+                holds = _is_true(self._evaluate(condition, df, memo), index) & ~decided
+                branches.append((holds, value))
+                decided |= holds
+            # Apply in reverse so the first matching WHEN wins
+            for holds, value in reversed(branches):
+                if holds.any():
+                    result = _finalize(self._evaluate(value, df, memo), etype, index).where(holds, result)
+            return result
+        if isinstance(node, Call):
+            spec = FUNCTIONS[node.name]
+            args = [self._evaluate(arg, df, memo) for arg in node.args]
+            return spec.evaluate(args, node, index, etype, [self._types[arg] for arg in node.args])
+        raise ExpressionError("Unsupported expression")
+
+
+@lru_cache(maxsize=256)
+def _compile_cached(formulas: tuple, column_types: tuple) -> CompiledFormulas:
+    return CompiledFormulas(dict(formulas), dict(column_types))
+
+
+def compile_formulas(formulas: dict[str, str], dtypes: dict[str, Any]) -> CompiledFormulas:
+    """
+    Parse and type-check formulas against column dtypes.
+
+    Formulas may reference each other's results by name (see
+    CompiledFormulas). Compiled plans are cached by formula text and the dtypes of the
+    columns they read, so repeated requests skip parsing and checking.
+
+    Args:
+        formulas: Formula text by result name
+        dtypes: pandas dtype (or its name) by column name
+
+    Returns:
+        CompiledFormulas whose evaluate() computes all results in one pass
+
+    Raises:
+        ExpressionError: If a formula is invalid, names an unknown
+            column or function, mixes incompatible types, or formulas
+            reference each other in a cycle
+    """
+    used = set()
+    for text in formulas.values():
+        used |= referenced_columns(parse(text))
+    column_types = tuple(sorted(
+        (name, type_of_dtype(dtype)) for name, dtype in dtypes.items() if name in used
+    ))
+    return _compile_cached(tuple(formulas.items()), column_types)
+
+
+# ============= Functions =============
+
+def _same_as_first(types, node):
+    result = types[0]
+    for etype, arg in zip(types[1:], node.args[1:]):
+        result = _unify(result, etype, arg.position)
+    return result
+
+
+def _extreme_check(types, node):
+    # Evaluated on float64 (or datetime) arrays; MIN/MAX of text or booleans is not defined
+    for etype, arg in zip(types, node.args):
+        _check_kind(etype, (INT, FLOAT, DATE), arg)
+    return _same_as_first(types, node)
+
+
+def _numeric_result(kind: str | None = None):
+    def check(types, node):
+        for etype, arg in zip(types, node.args):
+            _check_numeric(etype, arg)
+        result_kind = kind or (FLOAT if any(t.kind == FLOAT for t in types) else INT)
+        return ExprType(result_kind, _nullable(*types) or result_kind == FLOAT and kind is not None)
+    return check
+
+
+def _text_function(result_kind: str, constant_args: tuple = ()):
+    def check(types, node):
+        _check_kind(types[0], (TEXT,), node.args[0])
+        for arg, kind in zip(node.args[1:], constant_args):
+            _constant(arg, kind, node.name)
+        return ExprType(result_kind, result_kind != BOOL and _nullable(types[0]))
+    return check
+
+
+def _date_part(types, node):
+    _check_kind(types[0], (DATE,), node.args[0])
+    return ExprType(INT, _nullable(types[0]))
+
+
+def _date_args(*kinds):
+    def check(types, node):
+        for etype, arg, kind in zip(types, node.args, kinds):
+            _check_kind(etype, kind, arg)
+        return ExprType(DATE, True)
+    return check
+
+
+def _str(args, index):
+    return _series(args[0], index).astype(object)
+
+
+def _text_method(method: Callable[[pd.Series], pd.Series]):
+    def evaluate(args, node, index, etype, types):
+        values = _str(args, index)
+        if types[0].kind == NULL:
+            return _missing(index, etype.kind)
+        result = method(values.str, *[arg.value for arg in node.args[1:]])
+        return result.fillna(False) if etype.kind == BOOL else result
+    return evaluate
+
+
+def _if(args, node, index, etype, types):
+    condition = _is_true(args[0], index)
+    then = _finalize(args[1], etype, index)
+    otherwise = _finalize(args[2] if len(args) > 2 else None, etype, index)
+    return then.where(condition, otherwise)
+
+
+def _coalesce(args, node, index, etype, types):
+    result = _finalize(args[0], etype, index)
+    for arg in args[1:]:
+        result = result.where(result.notna(), _finalize(arg, etype, index))
+    return result
+
+
+def _nullif(args, node, index, etype, types):
+    value = _finalize(args[0], etype, index)
+    return value.where(~_compare("==", args[0], args[1], types[0], types[1], index))
+
+
+def _row_extreme(reducer):
+    def evaluate(args, node, index, etype, types):
+        values = [_finalize(arg, etype, index) for arg in args]
+        if etype.kind == DATE:
+            frame = pd.concat(values, axis=1)
+            return frame.min(axis=1) if reducer is np.fmin else frame.max(axis=1)
+        result = values[0].to_numpy(dtype=np.float64)
+        for value in values[1:]:
+            result = reducer(result, value.to_numpy(dtype=np.float64))
+        return pd.Series(result, index=index)
+    return evaluate
+
+
+def _round(args, node, index, etype, types):
+    digits = node.args[1].value if len(args) > 1 else 0
+    return _series(args[0], index).astype(np.float64).round(digits)
+
+
+def _numpy_unary(func):
+    def evaluate(args, node, index, etype, types):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = func(_series(args[0], index).astype(np.float64))
+        return pd.Series(result, index=index).replace([np.inf, -np.inf], np.nan)
+    return evaluate
+
+
+def _log(args, node, index, etype, types):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.log(_series(args[0], index).astype(np.float64))
+        if len(args) > 1:
+            result = result / np.log(_series(args[1], index).astype(np.float64))
+    return pd.Series(result, index=index).replace([np.inf, -np.inf], np.nan)
+
+
+def _substring(values, start, length=None):
+    begin = max(int(start) - 1, 0)
+    return values[begin:] if length is None else values[begin:begin + int(length)]
+
+
+def _right(values, count):
+    return values[-int(count):] if count > 0 else values[:0]
+
+
+def _date(args, node, index, etype, types):
+    parts = pd.DataFrame({
+        "year": _series(args[0], index),
+        "month": _series(args[1], index),
+        "day": _series(args[2], index),
+    })
+    return pd.to_datetime(parts, errors="coerce")
+
+
+def _to_date(args, node, index, etype, types):
+    date_format = node.args[1].value if len(args) > 1 else None
+    return pd.to_datetime(_series(args[0], index), format=date_format, errors="coerce")
+
+
+def _date_field(name):
+    def evaluate(args, node, index, etype, types):
+        values = pd.to_datetime(_series(args[0], index))
+        if name == "weekday":
+            return values.dt.weekday + 1
+        return getattr(values.dt, name)
+    return evaluate
+
+
+def _add_months(args, node, index, etype, types):
+    months = node.args[1].value
+    return pd.to_datetime(_series(args[0], index)) + pd.DateOffset(months=months)
+
+
+def _datediff(args, node, index, etype, types):
+    end = pd.to_datetime(_series(args[0], index))
+    start = pd.to_datetime(_series(args[1], index))
+    return (end - start) / pd.Timedelta(days=1)
+
+
+def _if_check(types, node):
+    _check_kind(types[0], (BOOL,), node.args[0])
+    else_type = types[2] if len(types) > 2 else ExprType(NULL, True)
+    return _unify(types[1], else_type, node.position)
+
+
+def _nullif_check(types, node):
+    _unify(types[0], types[1], node.position)
+    return ExprType(types[0].kind, True)
+
+
+def _text_result(types, node):
+    # CONCAT treats missing values as empty text; TEXT keeps them missing
+    return ExprType(TEXT, node.name == "TEXT" and _nullable(*types))
+
+
+def _to_number(args, node, index, etype, types):
+    return pd.to_numeric(_series(args[0], index), errors="coerce").astype(np.float64)
+
+
+def _to_date_check(types, node):
+    _check_kind(types[0], (TEXT, DATE), node.args[0])
+    if len(node.args) > 1:
+        _constant(node.args[1], TEXT, node.name)
+    return ExprType(DATE, True)
+
+
+# Function name -> signature, type rule and vectorized implementation
+FUNCTIONS: dict[str, _FunctionSpec] = {
+    # Conditionals and missing values
+    "IF": _FunctionSpec(2, 3, _if_check, _if),
+    "COALESCE": _FunctionSpec(1, None, lambda types, node: _same_as_first(types, node)._replace(
+        nullable=all(t.nullable or t.kind == NULL for t in types)), _coalesce),
+    "NULLIF": _FunctionSpec(2, 2, _nullif_check, _nullif),
+    "ISNULL": _FunctionSpec(1, 1, lambda types, node: ExprType(BOOL, False),
+                            lambda args, node, index, etype, types: _series(args[0], index).isna()),
+    # Numbers
+    "ABS": _FunctionSpec(1, 1, _numeric_result(), lambda args, node, index, etype, types: _series(args[0], index).abs()),
+    "ROUND": _FunctionSpec(1, 2, lambda types, node: (
+        _numeric_result(FLOAT)(types[:1], node), len(node.args) < 2 or _constant(node.args[1], INT, node.name)
+    )[0], _round),
+    "FLOOR": _FunctionSpec(1, 1, _numeric_result(FLOAT), _numpy_unary(np.floor)),
+    "CEIL": _FunctionSpec(1, 1, _numeric_result(FLOAT), _numpy_unary(np.ceil)),
+    "SQRT": _FunctionSpec(1, 1, _numeric_result(FLOAT), _numpy_unary(np.sqrt)),
+    "EXP": _FunctionSpec(1, 1, _numeric_result(FLOAT), _numpy_unary(np.exp)),
+    "LN": _FunctionSpec(1, 1, _numeric_result(FLOAT), _numpy_unary(np.log)),
+    "LOG": _FunctionSpec(1, 2, _numeric_result(FLOAT), _log),
+    "MIN": _FunctionSpec(1, None, _extreme_check, _row_extreme(np.fmin)),
+    "MAX": _FunctionSpec(1, None, _extreme_check, _row_extreme(np.fmax)),
+    "NUMBER": _FunctionSpec(1, 1, lambda types, node: ExprType(FLOAT, True), _to_number),
+    # Text
+    "LEN": _FunctionSpec(1, 1, _text_function(INT), _text_method(lambda s: s.len())),
+    "UPPER": _FunctionSpec(1, 1, _text_function(TEXT), _text_method(lambda s: s.upper())),
+    "LOWER": _FunctionSpec(1, 1, _text_function(TEXT), _text_method(lambda s: s.lower())),
+    "TRIM": _FunctionSpec(1, 1, _text_function(TEXT), _text_method(lambda s: s.strip())),
+    "LEFT": _FunctionSpec(2, 2, _text_function(TEXT, (INT,)), _text_method(lambda s, n: s[:int(n)])),
+    "RIGHT": _FunctionSpec(2, 2, _text_function(TEXT, (INT,)), _text_method(lambda s, n: _right(s, n))),
+    "MID": _FunctionSpec(2, 3, _text_function(TEXT, (INT, INT)),
+                         _text_method(lambda s, *args: _substring(s, *args))),
+    "REPLACE": _FunctionSpec(3, 3, _text_function(TEXT, (TEXT, TEXT)),
+                             _text_method(lambda s, old, new: s.replace(old, new, regex=False))),
+    "CONTAINS": _FunctionSpec(2, 2, _text_function(BOOL, (TEXT,)),
+                              _text_method(lambda s, part: s.contains(part, regex=False))),
+    "STARTSWITH": _FunctionSpec(2, 2, _text_function(BOOL, (TEXT,)), _text_method(lambda s, part: s.startswith(part))),
+    "ENDSWITH": _FunctionSpec(2, 2, _text_function(BOOL, (TEXT,)), _text_method(lambda s, part: s.endswith(part))),
+    "CONCAT": _FunctionSpec(1, None, _text_result, lambda args, node, index, etype, types: _concat_text(args, index)),
+    "TEXT": _FunctionSpec(1, 1, _text_result, lambda args, node, index, etype, types: _to_text(args[0], index)),
+    # Dates
+    "DATE": _FunctionSpec(3, 3, _date_args(NUMERIC, NUMERIC, NUMERIC), _date),
+    "TO_DATE": _FunctionSpec(1, 2, _to_date_check, _to_date),
+    "YEAR": _FunctionSpec(1, 1, _date_part, _date_field("year")),
+    "MONTH": _FunctionSpec(1, 1, _date_part, _date_field("month")),
+    "DAY": _FunctionSpec(1, 1, _date_part, _date_field("day")),
+    "WEEKDAY": _FunctionSpec(1, 1, _date_part, _date_field("weekday")),
+    "ADD_MONTHS": _FunctionSpec(2, 2, lambda types, node: (
+        _date_args((DATE,))(types[:1], node), _constant(node.args[1], INT, node.name)
+    )[0], _add_months),
+    "DATEDIFF": _FunctionSpec(2, 2, lambda types, node: (
+        _date_args((DATE,), (DATE,))(types, node)
+    )._replace(kind=FLOAT), _datediff),
+}
@@ -1,60 +1,360 @@
 """Generic FileService for handling file uploads and storage by ID."""
+import hashlib
+import json
 import uuid
-import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import BinaryIO
+from typing import AsyncIterator, BinaryIO, Callable, Iterable, Iterator
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 from fastapi import UploadFile, HTTPException
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
+from app.core.executor import executor, call_in_parent
+from app.core.progress import report_progress
+from app.shared import columnar, type_inference, xlsx_reader, xlsx_writer
+from app.shared.blob_store import BlobStore, hash_file
+from app.shared.excel_renderer import enqueue_render, get_render_lock, release_render_lock
+
+# Blob representation holding a file's metadata index (see FileService.get_metadata)
+METADATA_SUFFIX = ".meta.json"
+
+
+def _write_sidecar(df: pd.DataFrame, sidecar_path: Path) -> bool:
+    """
+    Persist a DataFrame as a columnar sidecar.
+    
+    Returns:
+        True if written, False if the data cannot be stored in Arrow
+    """
+    try:
+        columnar.write_dataframe(df, sidecar_path)
+        return True
+    except columnar.SidecarUnsupportedError:
+        return False
+
+
+def _parse_excel_to_sidecar(file_path: Path, sidecar_path: Path, spill_path: Path) -> pd.DataFrame | None:
+    """
+    Parse an Excel file and write its sidecar (process pool task).
+    
+    Rows are streamed into the sidecar batch by batch with the dtypes
+    read_excel would infer, so memory does not grow with the sheet.
+    
+    Returns:
+        None once the sidecar is written (the caller memory-maps it), or the
+        DataFrame itself when it cannot be stored in Arrow
+    """
+    try:
+        columnar.write_dataframes(
+            xlsx_reader.iter_typed_dataframes(file_path, settings.stream_batch_rows, spill_path),
+            sidecar_path
+        )
+        return None
+    except columnar.SidecarUnsupportedError:
+        pass
+    # Batches that do not fit one schema: convert the whole sheet at once
+    # so the parse is still cached, unless even that cannot be stored
+    df = xlsx_reader.read_excel(file_path)
+    return None if _write_sidecar(df, sidecar_path) else df
+
+
+def _select_rows(
+    batches: Iterator[pd.DataFrame],
+    mask_func: Callable[[pd.DataFrame], pd.Series],
+    rows_total: int | None = None
+) -> tuple[pd.DataFrame, int]:
+    """Keep the rows of each batch selected by mask_func; returns (rows, rows scanned)."""
+    selected = []
+    rows_scanned = 0
+    for batch in batches:
+        selected.append(batch[mask_func(batch)])
+        rows_scanned += len(batch)
+        report_progress("filtering", rows_scanned, rows_total)
+    
+    # Empty selections would only widen the concatenated dtypes
+    non_empty = [part for part in selected if len(part)] or selected[:1]
+    if not non_empty:
+        return pd.DataFrame(), rows_scanned
+    return pd.concat(non_empty, ignore_index=True), rows_scanned
+
+
+def _write_row_subset(sidecar_path: Path, rows: np.ndarray | slice, subset_path: Path) -> None:
+    """Write some rows of a sidecar to a new sidecar without converting to pandas (process pool task)."""
+    table = columnar.read_table(sidecar_path)
+    if isinstance(rows, slice):
+        subset = table.slice(rows.start, rows.stop - rows.start)
+    else:
+        subset = table.take(pa.array(rows))
+    columnar.write_table(subset, subset_path)
+
+
+def _render_excel(sidecar_path: Path, file_path: Path, compression_level: int | None = None) -> None:
+    """Stream a sidecar into an Excel file batch by batch (process pool task)."""
+    xlsx_writer.write_batches(
+        file_path,
+        columnar.iter_dataframes(sidecar_path),
+        total_rows=columnar.count_rows(sidecar_path),
+        compression_level=compression_level
+    )
+
+
+# Incremental sha256 of in-progress chunked uploads: upload_id -> (hashed bytes, hasher).
+# Lost on restart; complete_chunked_upload then re-hashes the assembled file.
+_upload_hashers: dict[str, tuple[int, "hashlib._Hash"]] = {}
+_upload_hashers_lock = threading.Lock()
+
+
+def _max_upload_bytes() -> int:
+    return settings.max_file_size_mb * 1024 * 1024
 
 
 class FileService:
-    """Service for managing temporary file storage and retrieval."""
+    """
+    Service for managing temporary file storage and retrieval.
+    
+    Content is deduplicated: files live in a BlobStore keyed by their
+    sha256 and every file_id is a reference to a blob, so re-uploading a
+    workbook (or producing an identical result) reuses the stored copy and
+    its parsed sidecar.
+    """
     
     def __init__(self):
         self.temp_dir = settings.temp_files_dir
         self.temp_dir.mkdir(parents=True, exist_ok=True)
+        self.store = BlobStore(self.temp_dir)
     
     def generate_file_id(self) -> str:
         """Generate a unique file ID."""
         return str(uuid.uuid4())
     
-    async def save_upload(self, upload_file: UploadFile) -> tuple[str, Path]:
+    def _validate_extension(self, filename: str) -> str:
+        """Return the lower-cased extension of filename, rejecting disallowed ones."""
+        file_ext = Path(filename).suffix.lower()
+        if file_ext not in settings.allowed_extensions:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File extension {file_ext} not allowed. Allowed: {settings.allowed_extensions}"
+            )
+        return file_ext
+    
+    async def _write_chunks(
+        self,
+        chunks: AsyncIterator[bytes],
+        buffer: BinaryIO,
+        hasher: "hashlib._Hash | None",
+        size: int = 0
+    ) -> int:
+        """
+        Write chunks to buffer as they arrive, hashing them on the fly.
+        
+        Args:
+            chunks: Async iterator of byte chunks
+            buffer: Open binary file to append to
+            hasher: Running hash to update, if any
+            size: Bytes already stored before these chunks
+            
+        Returns:
+            Total size in bytes
+            
+        Raises:
+            HTTPException: 413 as soon as the total exceeds max_file_size_mb
+        """
+        max_bytes = _max_upload_bytes()
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large. Maximum size: {settings.max_file_size_mb} MB"
+                )
+            if hasher is not None:
+                hasher.update(chunk)
+            await run_in_threadpool(buffer.write, chunk)
+        return size
+    
+    async def save_upload(self, upload_file: UploadFile) -> tuple[str, Path, str]:
         """
-        Save an uploaded file and return its file_id and path.
+        Save an uploaded file and return its file_id, path and content hash.
+        
+        The file is copied to disk in fixed-size chunks while its sha256 is
+        computed, aborting as soon as max_file_size_mb is exceeded. If the
+        same content was uploaded before, the new file_id shares that blob
+        and its already parsed sidecar.
         
         Args:
             upload_file: The uploaded file from FastAPI
             
         Returns:
-            Tuple of (file_id, file_path)
+            Tuple of (file_id, stored file path, sha256 hex digest)
             
         Raises:
             HTTPException: If file extension is not allowed or file is too large
         """
         # Validate file extension
-        file_ext = Path(upload_file.filename).suffix.lower()
-        if file_ext not in settings.allowed_extensions:
+        file_ext = self._validate_extension(upload_file.filename)
+        
+        if upload_file.size is not None and upload_file.size > _max_upload_bytes():
             raise HTTPException(
-                status_code=400,
-                detail=f"File extension {file_ext} not allowed. Allowed: {settings.allowed_extensions}"
+                status_code=413,
+                detail=f"File too large. Maximum size: {settings.max_file_size_mb} MB"
             )
         
         # Generate unique file ID
         file_id = self.generate_file_id()
-        file_path = self.temp_dir / f"{file_id}{file_ext}"
+        file_path = self.store.staging_path(file_ext)
+        
+        chunk_size = settings.upload_chunk_size_kb * 1024
+        
+        async def chunks() -> AsyncIterator[bytes]:
+            while chunk := await upload_file.read(chunk_size):
+                yield chunk
         
         # Save file
+        hasher = hashlib.sha256()
         try:
             with file_path.open("wb") as buffer:
-                shutil.copyfileobj(upload_file.file, buffer)
+                await self._write_chunks(chunks(), buffer, hasher)
+        except HTTPException:
+            file_path.unlink(missing_ok=True)
+            raise
         except Exception as e:
+            file_path.unlink(missing_ok=True)
             raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
         
-        return file_id, file_path
+        content_hash = hasher.hexdigest()
+        file_path = self.store.add(file_id, file_path, file_ext, file_ext, content_hash)
+        return file_id, file_path, content_hash
+    
+    # Chunked (resumable) uploads
+    
+    def _upload_dir(self) -> Path:
+        upload_dir = self.temp_dir / "uploads"
+        upload_dir.mkdir(exist_ok=True)
+        return upload_dir
+    
+    def _upload_state(self, upload_id: str) -> tuple[Path, dict]:
+        """Return the partial data path and metadata of a chunked upload."""
+        try:
+            uuid.UUID(upload_id)
+        except ValueError:
+            raise HTTPException(status_code=404, detail=f"Upload with ID {upload_id} not found")
+        meta_path = self._upload_dir() / f"{upload_id}.json"
+        if not meta_path.exists():
+            raise HTTPException(status_code=404, detail=f"Upload with ID {upload_id} not found")
+        return self._upload_dir() / f"{upload_id}.part", json.loads(meta_path.read_text())
+    
+    def init_chunked_upload(self, filename: str, total_size: int | None = None) -> str:
+        """
+        Start a chunked upload and return its upload_id.
+        
+        Raises:
+            HTTPException: If the extension is not allowed or total_size is too large
+        """
+        file_ext = self._validate_extension(filename)
+        if total_size is not None and total_size > _max_upload_bytes():
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size: {settings.max_file_size_mb} MB"
+            )
+        
+        upload_id = self.generate_file_id()
+        (self._upload_dir() / f"{upload_id}.part").touch()
+        (self._upload_dir() / f"{upload_id}.json").write_text(
+            json.dumps({"filename": filename, "extension": file_ext, "total_size": total_size})
+        )
+        with _upload_hashers_lock:
+            _upload_hashers[upload_id] = (0, hashlib.sha256())
+        return upload_id
+    
+    def get_upload_offset(self, upload_id: str) -> int:
+        """Bytes received so far for a chunked upload (where the next part starts)."""
+        part_path, _ = self._upload_state(upload_id)
+        return part_path.stat().st_size
+    
+    async def append_upload_part(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> int:
+        """
+        Append a part to a chunked upload, streaming it to disk as it arrives.
+        
+        Args:
+            upload_id: The chunked upload identifier
+            offset: Byte offset the part starts at; must equal the bytes received
+            chunks: Async iterator over the part's bytes
+            
+        Returns:
+            Bytes received so far
+            
+        Raises:
+            HTTPException: 409 if offset does not match (resume from the
+                current offset), 413 if the upload grows too large
+        """
+        part_path, _ = self._upload_state(upload_id)
+        current = part_path.stat().st_size
+        if offset != current:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Part offset {offset} does not match received bytes {current}"
+            )
+        
+        with _upload_hashers_lock:
+            hashed, hasher = _upload_hashers.get(upload_id, (-1, None))
+        if hashed != current:
+            hasher = None  # Hash state lost; re-hashed on completion
+        
+        try:
+            with part_path.open("ab") as buffer:
+                size = await self._write_chunks(chunks, buffer, hasher, current)
+        except BaseException:
+            # Drop the partial part so the client can retry from the same offset
+            with part_path.open("r+b") as buffer:
+                buffer.truncate(current)
+            with _upload_hashers_lock:
+                _upload_hashers.pop(upload_id, None)
+            raise
+        
+        if hasher is not None:
+            with _upload_hashers_lock:
+                _upload_hashers[upload_id] = (size, hasher)
+        return size
+    
+    def complete_chunked_upload(self, upload_id: str) -> tuple[str, Path, str, str]:
+        """
+        Finish a chunked upload and store it as a regular file.
+        
+        Returns:
+            Tuple of (file_id, file_path, sha256 hex digest, original filename)
+            
+        Raises:
+            HTTPException: If the upload is unknown, empty or incomplete
+        """
+        part_path, meta = self._upload_state(upload_id)
+        size = part_path.stat().st_size
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Upload is empty")
+        if meta.get("total_size") is not None and size != meta["total_size"]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Upload incomplete: received {size} of {meta['total_size']} bytes"
+            )
+        
+        with _upload_hashers_lock:
+            hashed, hasher = _upload_hashers.pop(upload_id, (-1, None))
+        content_hash = hasher.hexdigest() if hashed == size else hash_file(part_path)
+        
+        file_id = self.generate_file_id()
+        file_path = self.store.add(
+            file_id, part_path, meta["extension"], meta["extension"], content_hash
+        )
+        (self._upload_dir() / f"{upload_id}.json").unlink(missing_ok=True)
+        
+        return file_id, file_path, content_hash, meta["filename"]
     
     def get_file_path(self, file_id: str) -> Path:
         """
@@ -69,18 +369,162 @@ class FileService:
         Raises:
             HTTPException: If file not found
         """
-        # Search for file with any allowed extension
-        for ext in settings.allowed_extensions:
-            file_path = self.temp_dir / f"{file_id}{ext}"
-            if file_path.exists():
-                return file_path
+        ref = self.store.get_ref(file_id)
+        file_path = self.store.blob_path(ref["hash"], ref["extension"])
+        if file_path.exists():
+            return file_path
         
         raise HTTPException(status_code=404, detail=f"File with ID {file_id} not found")
     
+    def get_sidecar_path(self, file_id: str) -> Path:
+        """
+        Get the path of the columnar (Arrow IPC) sidecar for a file_id.
+        
+        Raises:
+            HTTPException: If file not found
+        """
+        ref = self.store.get_ref(file_id)
+        return self.store.blob_path(ref["hash"], columnar.SIDECAR_SUFFIX)
+    
+    def get_content_hash(self, file_id: str) -> str:
+        """
+        Get the sha256 of the blob a file_id refers to.
+        
+        Raises:
+            HTTPException: If file not found
+        """
+        return self.store.get_ref(file_id)["hash"]
+    
+    def file_exists(self, file_id: str) -> bool:
+        """Check whether a file_id has either a sidecar or an Excel file."""
+        try:
+            ref = self.store.get_ref(file_id)
+        except HTTPException:
+            return False
+        return (
+            self.store.blob_path(ref["hash"], columnar.SIDECAR_SUFFIX).exists()
+            or self.store.blob_path(ref["hash"], ref["extension"]).exists()
+        )
+    
+    def get_file_extension(self, file_id: str) -> str:
+        """
+        Get the Excel extension a file_id is (or will be) materialized with.
+        
+        Raises:
+            HTTPException: If file not found
+        """
+        return self.store.get_ref(file_id)["extension"]
+    
+    def materialize_excel(self, file_id: str, compression_level: int | None = None) -> Path:
+        """
+        Return the Excel file for a file_id, rendering it from the sidecar if needed.
+        
+        Derived files are stored only as columnar sidecars; the XLSX is
+        written the first time it is requested, either by a download or by
+        the background renderer. Concurrent callers share a single render,
+        also across file_ids referring to the same content. The XLSX is
+        streamed from the sidecar with a flat memory profile.
+        
+        Args:
+            file_id: The unique file identifier
+            compression_level: zlib level for the XLSX (default
+                settings.xlsx_compression_level)
+            
+        Returns:
+            Path to the Excel file
+            
+        Raises:
+            HTTPException: If file not found or cannot be written
+        """
+        try:
+            return self.get_file_path(file_id)
+        except HTTPException:
+            if not self.get_sidecar_path(file_id).exists():
+                raise
+        
+        ref = self.store.get_ref(file_id)
+        file_path = self.store.blob_path(ref["hash"], ref["extension"])
+        lock_key = file_path.name
+        try:
+            with get_render_lock(lock_key):
+                # Another caller may have rendered it while we waited for the lock
+                if file_path.exists():
+                    return file_path
+                
+                tmp_path = self.store.staging_path(file_path.suffix)
+                try:
+                    sidecar_path = self.get_sidecar_path(file_id)
+                    if settings.process_pool_io:
+                        executor.run_in_process(_render_excel, sidecar_path, tmp_path, compression_level)
+                    else:
+                        _render_excel(sidecar_path, tmp_path, compression_level)
+                    tmp_path.replace(file_path)
+                except HTTPException:
+                    raise
+                except Exception as e:
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"Failed to save Excel file: {str(e)}"
+                    )
+                finally:
+                    tmp_path.unlink(missing_ok=True)
+        finally:
+            # Also when the file was rendered meanwhile or rendering failed
+            release_render_lock(lock_key)
+        return file_path
+    
+    def materialize_excels(self, file_ids: list[str]) -> Iterator[Path]:
+        """
+        materialize_excel for several file_ids, rendering them concurrently.
+        
+        Renders run on the process pool (settings.process_pool_io), at
+        most one per worker at a time.
+        
+        Yields:
+            Path to each Excel file, in file_ids order, as soon as it and
+            all before it are ready
+        """
+        with ThreadPoolExecutor(max_workers=settings.process_pool_workers) as pool:
+            yield from pool.map(self.materialize_excel, file_ids)
+    
+    def _ensure_sidecar(self, file_id: str) -> pd.DataFrame | None:
+        """
+        Parse file_id into its columnar sidecar unless already done.
+        
+        Returns:
+            None when the sidecar exists, or the parsed DataFrame when its
+            data cannot be stored in Arrow
+            
+        Raises:
+            HTTPException: If file not found or cannot be parsed
+        """
+        sidecar_path = self.get_sidecar_path(file_id)
+        if sidecar_path.exists():
+            return None
+        
+        file_path = self.get_file_path(file_id)
+        spill_path = self.store.staging_path(".rows")
+        try:
+            if settings.process_pool_io:
+                # Parse in a worker process; only paths cross the process boundary
+                return executor.run_in_process(_parse_excel_to_sidecar, file_path, sidecar_path, spill_path)
+            return _parse_excel_to_sidecar(file_path, sidecar_path, spill_path)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to load Excel file: {str(e)}"
+            )
+    
     def load_excel(self, file_id: str) -> pd.DataFrame:
         """
         Load an Excel file into a pandas DataFrame.
         
+        The columnar sidecar is used when present. Otherwise the Excel file
+        is parsed once and a sidecar is written so later operations on the
+        same content, under any file_id, skip the parse.
+        
         Args:
             file_id: The unique file identifier
             
@@ -90,58 +534,368 @@ class FileService:
         Raises:
             HTTPException: If file not found or cannot be loaded
         """
-        file_path = self.get_file_path(file_id)
+        df = self._ensure_sidecar(file_id)
+        if df is not None:
+            return df
         
         try:
-            # Read Excel file
-            df = pd.read_excel(file_path, engine='openpyxl')
-            return df
+            return columnar.read_dataframe(self.get_sidecar_path(file_id))
         except Exception as e:
             raise HTTPException(
                 status_code=500,
-                detail=f"Failed to load Excel file: {str(e)}"
+                detail=f"Failed to load cached file: {str(e)}"
             )
     
+    def iter_batches(
+        self,
+        file_id: str,
+        batch_rows: int | None = None,
+        columns: list[str] | None = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream a file as DataFrames of at most batch_rows rows.
+        
+        Every batch has the columns and dtypes load_excel would return, so
+        per-batch results concatenate to the whole-file result. An Excel
+        file without a sidecar is first streamed into one out of openpyxl
+        read-only mode; batches are then memory-mapped from it, so only
+        one batch is held in memory at a time. A file without rows yields
+        one empty batch carrying its columns.
+        
+        Args:
+            file_id: The unique file identifier
+            batch_rows: Rows per batch (default settings.stream_batch_rows)
+            columns: Only these columns, in this order (default all)
+            
+        Yields:
+            DataFrame batches
+            
+        Raises:
+            HTTPException: If file not found, cannot be read, or a requested
+                column does not exist
+        """
+        batch_rows = batch_rows or settings.stream_batch_rows
+        df = self._ensure_sidecar(file_id)
+        sidecar_path = self.get_sidecar_path(file_id)
+        available = list(df.columns) if df is not None else columnar.read_columns(sidecar_path)
+        
+        if columns is not None:
+            missing = [col for col in columns if col not in available]
+            if missing:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Columns not found in file: {', '.join(missing)}"
+                )
+        
+        if df is not None:
+            # Not representable in Arrow: slice the parsed frame instead
+            if columns is not None:
+                df = df[columns]
+            for offset in range(0, max(len(df), 1), batch_rows):
+                yield df.iloc[offset:offset + batch_rows].copy()
+            return
+        
+        yield from columnar.iter_dataframes(sidecar_path, batch_rows, columns)
+    
+    def can_stream(self, file_id: str) -> bool:
+        """
+        Whether iter_batches streams file_id from a columnar sidecar.
+        
+        False for files whose data Arrow cannot store; iter_batches then
+        slices the fully loaded DataFrame, and derived batches cannot be
+        saved with save_batches.
+        """
+        return self._ensure_sidecar(file_id) is None
     
-    def get_excel_preview(self, file_id: str, max_rows: int = 50) -> tuple[pd.DataFrame, int]:
+    def prepare_files(self, file_ids: list[str]) -> list[dict]:
         """
-        Get preview DataFrame and total row count efficiently.
+        Parse several files in parallel and return their metadata.
+        
+        Files without a sidecar are parsed concurrently on the process pool,
+        one workbook per worker; files with identical content are parsed
+        once. Afterwards iter_batches and load_excel on these files only
+        read sidecars, except for files Arrow cannot store.
+        
+        Args:
+            file_ids: The file identifiers
+            
+        Returns:
+            Metadata of each file (see get_metadata), in file_ids order
+            
+        Raises:
+            HTTPException: If a file is not found or cannot be parsed
+        """
+        pending: dict[Path, str] = {}
+        for file_id in file_ids:
+            sidecar_path = self.get_sidecar_path(file_id)
+            if not sidecar_path.exists() and sidecar_path not in pending:
+                pending[sidecar_path] = file_id
+        
+        if pending:
+            tasks = [
+                (self.get_file_path(file_id), sidecar_path, self.store.staging_path(".rows"))
+                for sidecar_path, file_id in pending.items()
+            ]
+            try:
+                if settings.process_pool_io:
+                    results = executor.map_in_process(_parse_excel_to_sidecar, tasks)
+                else:
+                    results = [_parse_excel_to_sidecar(*task) for task in tasks]
+            except HTTPException:
+                raise
+            except Exception as e:
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Failed to load Excel file: {str(e)}"
+                )
+            for file_id, df in zip(pending.values(), results):
+                if df is not None:
+                    self._write_metadata(file_id, df)  # No sidecar to index later
+        
+        return [self.get_metadata(file_id) for file_id in file_ids]
+    
+    def select_rows(
+        self,
+        file_id: str,
+        mask_func: Callable[[pd.DataFrame], pd.Series],
+        batch_rows: int | None = None
+    ) -> tuple[pd.DataFrame, int]:
+        """
+        Stream a file in batches and keep only the rows mask_func selects.
+        
+        Peak memory is one batch plus the selected rows, however large the
+        file (see iter_batches).
         
         Args:
             file_id: The unique file identifier
-            max_rows: Maximum rows to read
+            mask_func: Returns a boolean mask for a batch DataFrame
+            batch_rows: Rows per batch (default settings.stream_batch_rows)
             
         Returns:
-            Tuple of (preview_df, total_rows)
+            Tuple of (selected rows, total rows scanned)
+            
+        Raises:
+            HTTPException: If file not found or cannot be read
         """
-        file_path = self.get_file_path(file_id)
+        try:
+            return _select_rows(self.iter_batches(file_id, batch_rows), mask_func)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to filter Excel file: {str(e)}"
+            )
+    
+    def _metadata_path(self, file_id: str) -> Path:
+        return self.store.blob_path(self.get_content_hash(file_id), METADATA_SUFFIX)
+    
+    def _write_metadata(self, file_id: str, df: pd.DataFrame | None = None) -> dict:
+        """Build and persist the metadata index of file_id (from df when it has no sidecar)."""
+        if df is None:
+            sidecar_path = self.get_sidecar_path(file_id)
+            metadata = columnar.read_index(sidecar_path)
+            sample = columnar.read_sample(sidecar_path, type_inference.SAMPLE_ROWS)
+        else:
+            metadata = {
+                "rows": int(len(df)),
+                "columns": [str(col) for col in df.columns],
+                "dtypes": {str(col): str(dtype) for col, dtype in df.dtypes.items()},
+                "batch_row_offsets": []
+            }
+            sample = type_inference.sample_rows(df)
+        metadata["inferred_types"] = type_inference.infer_types(sample)
+        
+        content_hash = self.get_content_hash(file_id)
+        excel_path = self.store.blob_path(content_hash, self.get_file_extension(file_id))
+        metadata["sheets"] = (
+            xlsx_reader.sheet_names(excel_path) if excel_path.exists() else [xlsx_writer.SHEET_NAME]
+        )
+        
+        metadata_path = self.store.blob_path(content_hash, METADATA_SUFFIX)
+        tmp_path = metadata_path.with_name(f"{metadata_path.name}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(json.dumps(metadata))
+        tmp_path.replace(metadata_path)
+        return metadata
+    
+    def index_file(self, file_id: str) -> dict:
+        """
+        Parse a file once and persist its metadata index next to its blob.
+        
+        Called at upload time; derived files are indexed when saved.
         
+        Returns:
+            The metadata (see get_metadata)
+            
+        Raises:
+            HTTPException: If file not found or cannot be parsed
+        """
+        df = self._ensure_sidecar(file_id)
         try:
-            # 1. Get total rows efficiently using openpyxl read-only mode
-            import openpyxl
-            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-            ws = wb.active
-            # max_row in read_only might be None if not valid metadata, but usually fine for saved files
-            total_rows = ws.max_row if ws.max_row is not None else 0
-            # Adjust for header row (assuming 1 header row)
-            total_rows = max(0, total_rows - 1)
-            wb.close()
+            return self._write_metadata(file_id, df)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to index Excel file: {str(e)}"
+            )
+    
+    def get_metadata(self, file_id: str) -> dict:
+        """
+        Get the metadata index of a file, building it if missing.
+        
+        The index is stored per content hash, so it is shared by all
+        file_ids with the same data and read without opening the workbook.
+        
+        Args:
+            file_id: The unique file identifier
             
-            # 2. Read only preview rows using pandas
-            df = pd.read_excel(file_path, engine='openpyxl', nrows=max_rows)
+        Returns:
+            Dict with the exact "rows" count (header excluded), "columns",
+            pandas "dtypes" by column, worksheet names ("sheets", data is
+            read from the first), "batch_row_offsets", the first row of
+            each record batch of the sidecar (empty when there is none),
+            and "inferred_types", the type each column's values suggest
+            (see type_inference.infer_type, from a sample of rows; missing
+            in indexes written before it existed)
             
-            return df, total_rows
+        Raises:
+            HTTPException: If file not found or cannot be parsed
+        """
+        try:
+            return json.loads(self._metadata_path(file_id).read_text())
+        except FileNotFoundError:
+            return self.index_file(file_id)
+    
+    def _get_page_metadata(self, file_id: str, columns: list[str] | None) -> dict:
+        """Metadata of file_id, checking that the requested columns exist."""
+        metadata = self.get_metadata(file_id)
+        if columns is not None:
+            missing = [col for col in columns if col not in metadata["columns"]]
+            if missing:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Columns not found in file: {', '.join(missing)}"
+                )
+        return metadata
+    
+    def get_excel_preview(
+        self,
+        file_id: str,
+        max_rows: int = 50,
+        offset: int = 0,
+        columns: list[str] | None = None
+    ) -> tuple[pd.DataFrame, int]:
+        """
+        Get a page of rows and the total row count efficiently.
+        
+        The row count comes from the metadata index and the rows from the
+        record batches of the memory-mapped sidecar that hold the page, so
+        the workbook is not opened and any page costs the same.
+        
+        Args:
+            file_id: The unique file identifier
+            max_rows: Maximum rows to read
+            offset: First row to read
+            columns: Only these columns, in this order (default all)
             
+        Returns:
+            Tuple of (preview_df, total_rows)
+            
+        Raises:
+            HTTPException: If file not found, cannot be read, or a requested
+                column does not exist
+        """
+        metadata = self._get_page_metadata(file_id, columns)
+        
+        try:
+            sidecar_path = self.get_sidecar_path(file_id)
+            if sidecar_path.exists():
+                df = columnar.read_rows(
+                    sidecar_path, offset, max_rows, columns, metadata["batch_row_offsets"]
+                )
+            else:
+                df = self.load_excel(file_id).iloc[offset:offset + max_rows]
+                if columns is not None:
+                    df = df[columns]
+            return df, metadata["rows"]
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to load Excel preview: {str(e)}"
             )
-
+    
+    def get_preview_table(
+        self,
+        file_id: str,
+        max_rows: int = 50,
+        offset: int = 0,
+        columns: list[str] | None = None
+    ) -> tuple[pa.Table, int]:
+        """
+        Get a page of rows as an Arrow table, without converting it to pandas.
+        
+        Same paging as get_excel_preview; the table refers to the
+        memory-mapped sidecar.
+        
+        Returns:
+            Tuple of (page table, total_rows)
+            
+        Raises:
+            HTTPException: 406 if the file's data cannot be represented in
+                Arrow, 400 if a requested column does not exist
+        """
+        metadata = self._get_page_metadata(file_id, columns)
+        if not self.can_stream(file_id):
+            raise HTTPException(
+                status_code=406,
+                detail="File data cannot be represented in Arrow; request JSON instead"
+            )
+        
+        try:
+            table = columnar.read_row_table(
+                self.get_sidecar_path(file_id), offset, max_rows, columns, metadata["batch_row_offsets"]
+            )
+            return columnar.display_table(table), metadata["rows"]
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to load Excel preview: {str(e)}"
+            )
+    
+    def _output_extension(self, original_file_id: str | None) -> str:
+        """Extension of a derived file: the original's, or .xlsx by default."""
+        if original_file_id:
+            try:
+                return self.get_file_extension(original_file_id)
+            except:
+                pass  # Use default .xlsx
+        return ".xlsx"
+    
+    def _add_sidecar(self, new_file_id: str, sidecar_path: Path, file_ext: str, render: bool = True):
+        """Store a staged sidecar under new_file_id and (unless render is False) schedule its Excel rendering."""
+        self.store.add(new_file_id, sidecar_path, columnar.SIDECAR_SUFFIX, file_ext)
+        self._write_metadata(new_file_id)
+        if not render:
+            return
+        if settings.excel_render_mode == "eager":
+            self.materialize_excel(new_file_id)
+        elif settings.excel_render_mode == "background":
+            call_in_parent(enqueue_render, new_file_id)
+    
     def save_dataframe(self, df: pd.DataFrame, original_file_id: str | None = None) -> str:
 
         """
-        Save a pandas DataFrame to a new Excel file and return new file_id.
+        Save a pandas DataFrame under a new file_id.
+        
+        The DataFrame is stored as a columnar sidecar and the new file_id is
+        returned right away. When the Excel file is written depends on
+        settings.excel_render_mode: "eager" writes it now, "background"
+        queues it for the idle-time renderer and "lazy" waits for the first
+        download (see materialize_excel). DataFrames that Arrow cannot
+        represent are always written to Excel immediately. A result
+        identical to an existing one is stored only once.
         
         Args:
             df: The DataFrame to save
@@ -155,22 +909,22 @@ class FileService:
         """
         # Generate new file ID
         new_file_id = self.generate_file_id()
+        file_ext = self._output_extension(original_file_id)
         
-        # Use .xlsx as default extension
-        file_ext = ".xlsx"
-        if original_file_id:
-            try:
-                original_path = self.get_file_path(original_file_id)
-                file_ext = original_path.suffix
-            except:
-                pass  # Use default .xlsx
+        sidecar_path = self.store.staging_path(columnar.SIDECAR_SUFFIX)
+        if _write_sidecar(df, sidecar_path):
+            self._add_sidecar(new_file_id, sidecar_path, file_ext)
+            return new_file_id
         
-        file_path = self.temp_dir / f"{new_file_id}{file_ext}"
+        file_path = self.store.staging_path(file_ext)
         
         # Save DataFrame to Excel
         try:
-            df.to_excel(file_path, index=False, engine='openpyxl')
+            xlsx_writer.write_excel(df, file_path)
+            self.store.add(new_file_id, file_path, file_ext, file_ext)
+            self._write_metadata(new_file_id, df)
         except Exception as e:
+            file_path.unlink(missing_ok=True)
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to save Excel file: {str(e)}"
@@ -178,9 +932,118 @@ class FileService:
         
         return new_file_id
     
+    def save_batches(
+        self,
+        batches: Iterable[pd.DataFrame],
+        original_file_id: str | None = None,
+        total_rows: int | None = None
+    ) -> str:
+        """
+        Save DataFrame batches under a new file_id without concatenating them.
+        
+        The batches are streamed into a columnar sidecar, then handled like
+        save_dataframe. They must share columns and dtypes.
+        
+        Args:
+            batches: DataFrames to save, in row order
+            original_file_id: Optional original file ID to determine file extension
+            total_rows: Expected row count, for "writing" progress
+            
+        Returns:
+            new file_id for the saved file
+            
+        Raises:
+            HTTPException: If the batches cannot be stored
+        """
+        new_file_id = self.generate_file_id()
+        file_ext = self._output_extension(original_file_id)
+        
+        sidecar_path = self.store.staging_path(columnar.SIDECAR_SUFFIX)
+        try:
+            columnar.write_dataframes(batches, sidecar_path, total_rows)
+        except columnar.SidecarUnsupportedError as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to save Excel file: {str(e)}"
+            )
+        self._add_sidecar(new_file_id, sidecar_path, file_ext)
+        return new_file_id
+    
+    def save_row_subsets(self, file_id: str, subsets: list[np.ndarray | slice]) -> list[str]:
+        """
+        Save subsets of a file's rows as new files, written concurrently.
+        
+        Each subset is copied from the file's sidecar straight into its
+        own sidecar on the process pool, without a round trip through
+        pandas. Only for files iter_batches can stream (see can_stream).
+        
+        Args:
+            file_id: The unique file identifier
+            subsets: Row positions (in the order to keep) or a slice of rows, per new file
+            
+        Returns:
+            new file_id of each subset, in order
+            
+        Raises:
+            HTTPException: If a subset cannot be written
+        """
+        sidecar_path = self.get_sidecar_path(file_id)
+        file_ext = self._output_extension(file_id)
+        tasks = [
+            (sidecar_path, rows, self.store.staging_path(columnar.SIDECAR_SUFFIX))
+            for rows in subsets
+        ]
+        try:
+            if settings.process_pool_io:
+                executor.map_in_process(_write_row_subset, tasks)
+            else:
+                for task in tasks:
+                    _write_row_subset(*task)
+        except Exception as e:
+            for _, _, subset_path in tasks:
+                subset_path.unlink(missing_ok=True)
+            if isinstance(e, HTTPException):
+                raise
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to save Excel file: {str(e)}"
+            )
+        
+        new_file_ids = [self.generate_file_id() for _ in tasks]
+        for new_file_id, (_, _, subset_path) in zip(new_file_ids, tasks):
+            self._add_sidecar(new_file_id, subset_path, file_ext, render=False)
+        if settings.excel_render_mode == "eager":
+            for _ in self.materialize_excels(new_file_ids):
+                pass
+        elif settings.excel_render_mode == "background":
+            for new_file_id in new_file_ids:
+                call_in_parent(enqueue_render, new_file_id)
+        return new_file_ids
+    
+    def map_batches(self, file_id: str, func: Callable[[pd.DataFrame], pd.DataFrame]) -> str:
+        """
+        Apply a row-wise transformation to a file batch by batch and save the result.
+        
+        func must give the same result per batch as on the whole file (no
+        cross-row state) and keep dtypes consistent between batches. Files
+        whose data cannot be stored in Arrow are transformed whole.
+        
+        Args:
+            file_id: The unique file identifier
+            func: Transformation of one DataFrame batch
+            
+        Returns:
+            new file_id of the transformed file
+        """
+        df = self._ensure_sidecar(file_id)
+        if df is not None:
+            return self.save_dataframe(func(df), file_id)
+        return self.save_batches((func(batch) for batch in self.iter_batches(file_id)), file_id)
+    
     def cleanup_old_files(self, hours: int | None = None):
         """
-        Remove files older than specified hours.
+        Remove file_ids older than specified hours, then any blobs no
+        remaining file_id refers to.
         
         Args:
             hours: Number of hours to retain files (default from settings)
@@ -190,28 +1053,29 @@ class FileService:
         
         cutoff_time = datetime.now() - timedelta(hours=hours)
         
-        for file_path in self.temp_dir.iterdir():
-            if file_path.is_file():
+        # Expire references and abandoned chunked uploads / staging files;
+        # blobs are shared, so they go only once unreferenced
+        for file_path in self.temp_dir.rglob("*"):
+            if file_path.is_file() and file_path.parent != self.store.blob_dir:
                 file_modified = datetime.fromtimestamp(file_path.stat().st_mtime)
                 if file_modified < cutoff_time:
                     try:
                         file_path.unlink()
                     except Exception:
                         pass  # Ignore cleanup errors
+        
+        self.store.collect_garbage()
     
     def delete_file(self, file_id: str) -> bool:
         """
         Delete a specific file by file_id.
         
+        The underlying blob is removed only if no other file_id shares it.
+        
         Args:
             file_id: The file identifier to delete
             
         Returns:
             True if deleted, False if not found
         """
-        try:
-            file_path = self.get_file_path(file_id)
-            file_path.unlink()
-            return True
-        except HTTPException:
-            return False
+        return self.store.delete_ref(file_id)
@@ -26,3 +26,12 @@ class PreviewData(BaseModel):
     data: list[dict[str, Any]] = Field(..., description="Row data as list of dictionaries")
     total_rows: int = Field(..., description="Total number of rows in the file")
     preview_rows: int = Field(..., description="Number of rows in this preview")
+
+
+class JobSubmittedResponse(BaseModel):
+    """Response for an operation accepted as an async job (?async=true)."""
+    
+    job_id: str = Field(..., description="Job identifier")
+    operation: str = Field(..., description="Operation being run")
+    status: str = Field(..., description="Initial job status")
+    status_url: str = Field(..., description="URL to poll for job status")
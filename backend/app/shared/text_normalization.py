@@ -0,0 +1,196 @@
+"""
+Vectorized normalization of Persian and Arabic text.
+
+A column's strings are handled as one array of code points (taken from
+their Arrow buffer) instead of cell by cell: characters are mapped
+through a lookup table, removed or rewritten by their neighbours with
+NumPy operations, and the result is cut back into cells by offsets.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+PERSIAN_DIGITS = "۰۱۲۳۴۵۶۷۸۹"
+ARABIC_DIGITS = "٠١٢٣٤٥٦٧٨٩"
+ASCII_DIGITS = "0123456789"
+
+ARABIC_DECIMAL_SEPARATOR = "٫"
+ARABIC_THOUSANDS_SEPARATOR = "٬"
+
+ZWNJ = "‌"
+
+# Arabic letters typed on Persian text in place of the Persian ones
+ARABIC_LETTER_VARIANTS = {"ي": "ی", "ى": "ی", "ك": "ک"}
+
+# Code points at or above this are left as they are
+_TABLE_SIZE = 0x10000
+
+# A number once thousands separators and surrounding spaces are removed
+_NUMBER_PATTERN = r"^[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?$"
+
+
+@dataclass(frozen=True)
+class NormalizationRules:
+    """
+    What a normalization pass changes.
+
+    Attributes:
+        mapping: (character, replacement character) pairs
+        delete: Characters removed
+        tidy_zwnj: Drop repeated ZWNJs and ZWNJs at the start or end of a
+            cell or next to a space
+        digit_separators: (character, replacement character) pairs applied
+            only between two digits (after mapping), e.g. "," in "1,250"
+    """
+    mapping: tuple[tuple[str, str], ...] = ()
+    delete: str = ""
+    tidy_zwnj: bool = False
+    digit_separators: tuple[tuple[str, str], ...] = ()
+
+
+@lru_cache(maxsize=64)
+def _lookup_tables(rules: NormalizationRules) -> tuple[np.ndarray, np.ndarray]:
+    """Code point translation table and deletion mask of a rule set."""
+    table = np.arange(_TABLE_SIZE, dtype=np.uint32)
+    for char, replacement in rules.mapping:
+        table[ord(char)] = ord(replacement)
+    deleted = np.zeros(_TABLE_SIZE, dtype=bool)
+    for char in rules.delete:
+        deleted[ord(char)] = True
+    return table, deleted
+
+
+def _utf8_lengths(code_points: np.ndarray) -> np.ndarray:
+    """Bytes per code point in UTF-8."""
+    return (
+        1
+        + (code_points >= 0x80).astype(np.int64)
+        + (code_points >= 0x800)
+        + (code_points >= 0x10000)
+    )
+
+
+def _normalize_string_array(array: pa.Array, rules: NormalizationRules) -> pa.Array:
+    """Apply rules to an Arrow large_string array in one vectorized pass."""
+    if len(array) == 0 or array.buffers()[2] is None:
+        return array
+    offsets = np.frombuffer(array.buffers()[1], dtype=np.int64)[array.offset:array.offset + len(array) + 1]
+    data = np.frombuffer(array.buffers()[2], dtype=np.uint8)[offsets[0]:offsets[-1]]
+    byte_offsets = offsets - offsets[0]
+
+    # Cell boundaries in code points: count the bytes that start a character
+    starts = (data & 0xC0) != 0x80
+    char_offsets = np.concatenate([[0], np.cumsum(starts)])[byte_offsets]
+    code_points = np.frombuffer(data.tobytes().decode("utf-8").encode("utf-32-le"), dtype=np.uint32)
+
+    table, deleted = _lookup_tables(rules)
+    in_table = code_points < _TABLE_SIZE
+    clipped = np.where(in_table, code_points, 0)
+    code_points = np.where(in_table, table[clipped], code_points)
+    keep = ~(in_table & deleted[clipped])
+
+    n = len(code_points)
+    if rules.digit_separators or rules.tidy_zwnj:
+        first = np.zeros(n, dtype=bool)
+        last = np.zeros(n, dtype=bool)
+        non_empty = char_offsets[1:] > char_offsets[:-1]
+        first[char_offsets[:-1][non_empty]] = True
+        last[char_offsets[1:][non_empty] - 1] = True
+
+    if rules.digit_separators:
+        is_digit = (code_points >= ord("0")) & (code_points <= ord("9"))
+        for digits in (PERSIAN_DIGITS, ARABIC_DIGITS):
+            is_digit |= (code_points >= ord(digits[0])) & (code_points <= ord(digits[-1]))
+        between_digits = np.zeros(n, dtype=bool)
+        between_digits[1:-1] = is_digit[:-2] & is_digit[2:] & ~first[1:-1] & ~last[1:-1]
+        for char, replacement in rules.digit_separators:
+            code_points = np.where(between_digits & (code_points == ord(char)), ord(replacement), code_points)
+
+    if rules.tidy_zwnj:
+        zwnj = code_points == ord(ZWNJ)
+        space = code_points == ord(" ")
+        after_gap = np.ones(n, dtype=bool)  # previous character is a ZWNJ or space, or none
+        after_gap[1:] = zwnj[:-1] | space[:-1]
+        before_space = np.zeros(n, dtype=bool)
+        before_space[:-1] = space[1:]
+        keep &= ~(zwnj & (after_gap | first | before_space | last))
+
+    if not keep.all():
+        kept_before = np.concatenate([[0], np.cumsum(keep)])
+        char_offsets = kept_before[char_offsets]
+        code_points = code_points[keep]
+
+    text = code_points.astype(np.uint32).tobytes().decode("utf-32-le").encode("utf-8")
+    new_offsets = np.concatenate([[0], np.cumsum(_utf8_lengths(code_points))])[char_offsets]
+    return pa.LargeStringArray.from_buffers(
+        len(array),
+        pa.py_buffer(new_offsets.astype(np.int64)),
+        pa.py_buffer(text),
+        array.buffers()[0],
+        array.null_count,
+        0
+    )
+
+
+def normalize_text(values: pd.Series, rules: NormalizationRules) -> pd.Series:
+    """
+    Normalize the strings of a column; other values are kept as they are.
+
+    Args:
+        values: Column of strings, possibly with missing values or (in
+            mixed columns) numbers and dates
+        rules: NormalizationRules to apply
+
+    Returns:
+        Normalized column with the same index
+    """
+    objects = values.to_numpy(dtype=object)
+    try:
+        array = pa.array(objects, type=pa.large_string(), from_pandas=True)
+        if array.null_count == len(array):
+            return values
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        # Mixed column: normalize only its strings
+        is_string = np.fromiter((isinstance(value, str) for value in objects), dtype=bool, count=len(objects))
+        normalized = objects.copy()
+        strings = pa.array(objects[is_string], type=pa.large_string())
+        normalized[is_string] = _normalize_string_array(strings, rules).to_numpy(zero_copy_only=False)
+    else:
+        normalized = _normalize_string_array(array, rules).to_numpy(zero_copy_only=False)
+    return pd.Series(normalized, index=values.index, name=values.name, dtype=object)
+
+
+def parse_numbers(values: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Parse normalized text (ASCII digits, "." decimals, "," thousands) as numbers.
+
+    Empty text counts as missing; numbers already stored as numbers (in
+    mixed columns) are kept. Columns of text are parsed with Arrow
+    kernels instead of cell by cell.
+
+    Returns:
+        Tuple of (float64 numbers, mask of values that are not numbers)
+    """
+    try:
+        array = pa.array(values.to_numpy(dtype=object), type=pa.large_string(), from_pandas=True)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        pass
+    else:
+        cleaned = pc.utf8_trim_whitespace(pc.replace_substring(array, ",", ""))
+        is_number = pc.match_substring_regex(cleaned, _NUMBER_PATTERN)
+        numbers = pc.cast(pc.if_else(is_number, cleaned, None), pa.float64())
+        not_numbers = pc.fill_null(pc.and_not(pc.not_equal(cleaned, ""), is_number), False)
+        return (
+            pd.Series(numbers.to_numpy(zero_copy_only=False), index=values.index, name=values.name),
+            pd.Series(not_numbers.to_numpy(zero_copy_only=False), index=values.index)
+        )
+
+    # Mixed column: numbers stored as numbers pass through to_numeric
+    cleaned = values.str.replace(",", "", regex=False).str.strip()
+    cleaned = cleaned.where(cleaned.notna(), values).replace("", None)
+    numbers = pd.to_numeric(cleaned, errors="coerce").astype(np.float64)
+    return numbers, numbers.isna() & cleaned.notna()
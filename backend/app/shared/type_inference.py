@@ -0,0 +1,426 @@
+"""
+Column type inference and conversion.
+
+Conversions are vectorized over a whole column and never invent values:
+cells that do not convert become missing and are reported as failures
+instead of turning into 0 or True. Results use nullable dtypes (Int64,
+boolean) so missing values survive, and can be narrowed to compact
+dtypes (Int8/Int16/Int32, float32) when no value changes.
+
+Types are named as the type conversion API names them: "string",
+"integer", "float", "boolean" and "datetime".
+"""
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from app.shared.text_normalization import (
+    ARABIC_DECIMAL_SEPARATOR,
+    ARABIC_DIGITS,
+    ARABIC_THOUSANDS_SEPARATOR,
+    ASCII_DIGITS,
+    PERSIAN_DIGITS,
+    NormalizationRules,
+    normalize_text,
+    parse_numbers
+)
+
+STRING = "string"
+INTEGER = "integer"
+FLOAT = "float"
+BOOLEAN = "boolean"
+DATETIME = "datetime"
+
+# Rows inferred from; spread over the whole column
+SAMPLE_ROWS = 1000
+
+# Distinct failing values reported per column
+MAX_BAD_VALUES = 5
+
+# Text accepted as booleans (compared stripped and lower-cased)
+TRUE_TOKENS = frozenset({"true", "t", "yes", "y", "on", "1", "بله", "بلی", "آری", "درست", "صحیح"})
+FALSE_TOKENS = frozenset({"false", "f", "no", "n", "off", "0", "خیر", "نه", "نادرست", "غلط"})
+
+# Nullable integer dtypes, smallest first
+INTEGER_DTYPES = ("Int8", "Int16", "Int32", "Int64")
+
+# Largest magnitude a float64 holds exactly as an integer
+MAX_EXACT_INTEGER = 2 ** 53
+
+# Day zero of Excel serial dates, and the serial of 9999-12-31
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+MAX_EXCEL_SERIAL = 2958465
+
+# Persian and Arabic-Indic digits and separators as ASCII, so "۱۲٬۵۰۰" parses
+_DIGIT_RULES = NormalizationRules(mapping=tuple(zip(
+    PERSIAN_DIGITS + ARABIC_DIGITS + ARABIC_DECIMAL_SEPARATOR + ARABIC_THOUSANDS_SEPARATOR,
+    ASCII_DIGITS * 2 + ".,"
+)))
+_DIGIT_TABLE = str.maketrans(dict(_DIGIT_RULES.mapping))
+
+# Text that is a whole number without a sign, exponent or decimals
+_INTEGER_TEXT = re.compile(r"[+-]?\d+")
+
+# Whole numbers written with a leading zero (phone numbers, codes): text, not numbers
+_LEADING_ZERO = re.compile(r"0\d")
+
+
+def _floats(values: pd.Series) -> pd.Series:
+    """Numeric or boolean column as float64 (missing as NaN)."""
+    return pd.Series(
+        values.to_numpy(dtype=np.float64, na_value=np.nan),
+        index=values.index,
+        name=values.name
+    )
+
+
+def _strings(values: pd.Series) -> np.ndarray:
+    """Mask of the cells holding text."""
+    objects = values.to_numpy(dtype=object)
+    return np.fromiter((isinstance(value, str) for value in objects), dtype=bool, count=len(objects))
+
+
+def _all_strings(values: pd.Series) -> bool:
+    """Whether every present value of an object column is text."""
+    return values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty")
+
+
+def _parse_numbers(values: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Numbers of a column of any dtype.
+
+    Text may use Persian or Arabic-Indic digits and thousands
+    separators; booleans count as 1 and 0, dates are not numbers.
+
+    Returns:
+        Tuple of (float64 numbers, mask of values that are not numbers)
+    """
+    kind = values.dtype.kind
+    if kind in "iufb":
+        return _floats(values), pd.Series(False, index=values.index)
+    if kind in "mM":
+        return pd.Series(np.nan, index=values.index, name=values.name), values.notna()
+    if _all_strings(values):
+        return parse_numbers(normalize_text(values, _DIGIT_RULES))
+    objects = values.to_numpy(dtype=object)
+    is_string = _strings(values)
+    # Dates and other objects in mixed columns are not numbers
+    other = ~is_string & values.notna().to_numpy() & np.fromiter(
+        (not isinstance(value, (int, float, np.number)) for value in objects), dtype=bool, count=len(objects)
+    )
+    values = values.astype(object).where(~other, None)
+    if is_string.any():
+        numbers, not_numbers = parse_numbers(normalize_text(values, _DIGIT_RULES))
+    else:
+        numbers = pd.to_numeric(values, errors="coerce").astype(np.float64)
+        not_numbers = numbers.isna() & values.notna()
+    return numbers, not_numbers | other
+
+
+def to_string(values: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Text of every value; missing values stay missing.
+
+    Whole floats lose their ".0", dates at midnight show only the date.
+    Never fails.
+    """
+    if _all_strings(values):
+        return values, pd.Series(False, index=values.index)
+
+    codes, uniques = pd.factorize(values)
+    texts = np.empty(len(uniques), dtype=object)
+    for i, value in enumerate(uniques):
+        if isinstance(value, (float, np.floating)) and float(value).is_integer():
+            texts[i] = str(int(value))
+        elif isinstance(value, pd.Timestamp):
+            texts[i] = value.date().isoformat() if value == value.normalize() else str(value)
+        else:
+            texts[i] = str(value)
+    converted = np.full(len(values), np.nan, dtype=object)
+    present = codes >= 0
+    converted[present] = texts[codes[present]]
+    return (
+        pd.Series(converted, index=values.index, name=values.name, dtype=object),
+        pd.Series(False, index=values.index)
+    )
+
+
+def to_integer(values: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Whole numbers as nullable Int64.
+
+    Values that are not numbers, have a fractional part or do not fit
+    in 64 bits fail and become missing. Long integers written as text
+    are parsed exactly, not through float64.
+
+    Returns:
+        Tuple of (converted column, mask of failed values)
+    """
+    if values.dtype.kind in "iu" and not (values.dtype.kind == "u" and values.dtype.itemsize == 8):
+        return values.astype("Int64"), pd.Series(False, index=values.index)
+
+    numbers, failed = _parse_numbers(values)
+    # 2**63 itself may be rounded text of a number that fits
+    whole = numbers.notna() & (numbers % 1 == 0) & (numbers.abs() <= 2 ** 63)
+    fits = whole & (numbers.abs() < 2 ** 63)
+    converted = numbers.where(fits).astype("Int64")
+
+    if values.dtype == object:
+        # From 2**53 on float64 rounds (2**53 + 1 parses as 2**53); parse those from their text instead
+        inexact = whole & (numbers.abs() >= MAX_EXACT_INTEGER)
+        for label in values.index[inexact.to_numpy()]:
+            text = str(values[label]).translate(_DIGIT_TABLE).replace(",", "").strip()
+            if _INTEGER_TEXT.fullmatch(text) and -2 ** 63 <= int(text) < 2 ** 63:
+                converted[label] = int(text)
+                fits[label] = True
+    return converted, failed | (numbers.notna() & ~fits)
+
+
+def to_float(values: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Numbers as float64; values that are not numbers fail and become missing.
+
+    Returns:
+        Tuple of (converted column, mask of failed values)
+    """
+    numbers, failed = _parse_numbers(values)
+    return numbers, failed
+
+
+def _boolean_of(value) -> bool | None:
+    """Boolean a single value stands for, or None if it stands for none."""
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, str):
+        token = value.translate(_DIGIT_TABLE).strip().lower()
+        if token in TRUE_TOKENS:
+            return True
+        if token in FALSE_TOKENS:
+            return False
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)) and value in (0, 1):
+        return bool(value)
+    return None
+
+
+def to_boolean(values: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Booleans as nullable boolean.
+
+    Accepts booleans, the numbers 1 and 0, and TRUE_TOKENS/FALSE_TOKENS
+    in any case. Anything else fails and becomes missing; empty text is
+    missing, not a failure.
+
+    Returns:
+        Tuple of (converted column, mask of failed values)
+    """
+    if values.dtype.kind == "b":
+        return values.astype("boolean"), pd.Series(False, index=values.index)
+
+    codes, uniques = pd.factorize(values)
+    mapped = np.array([_boolean_of(value) for value in uniques], dtype=object)
+    blank = np.array([isinstance(value, str) and not value.strip() for value in uniques], dtype=bool)
+
+    present = codes >= 0
+    converted = np.full(len(values), None, dtype=object)
+    converted[present] = mapped[codes[present]]
+    failed = np.zeros(len(values), dtype=bool)
+    failed[present] = pd.isna(mapped)[codes[present]] & ~blank[codes[present]]
+    return (
+        pd.Series(converted, index=values.index, name=values.name).astype("boolean"),
+        pd.Series(failed, index=values.index)
+    )
+
+
+def _from_serials(numbers: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """Excel serial day numbers as dates; (dates, mask of numbers out of range)."""
+    in_range = (numbers >= 0) & (numbers <= MAX_EXCEL_SERIAL)
+    dates = EXCEL_EPOCH + pd.to_timedelta(numbers.where(in_range), unit="D")
+    return dates.dt.round("ms"), numbers.notna() & ~in_range
+
+
+def _parse_dates(text: pd.Series) -> pd.Series:
+    """
+    Parse date text, each distinct text once.
+
+    The format of the first text is tried on all of them, then each
+    remaining text is parsed in its own format. Plain numbers and text
+    without digits are not dates in any format and skip the parse.
+    """
+    codes, uniques = pd.factorize(text)
+    uniques = pd.Series(uniques, dtype=object)
+    candidates = uniques[
+        uniques.str.contains(r"\d").astype(bool) & ~uniques.str.fullmatch(r"[+-]?[\d.,]+").astype(bool)
+    ]
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype="datetime64[ns]")
+    with warnings.catch_warnings():
+        # "Could not infer format": the per-text parse covers it
+        warnings.simplefilter("ignore", UserWarning)
+        parsed[candidates.index] = pd.to_datetime(candidates, errors="coerce").to_numpy()
+        retry = candidates[parsed[candidates.index].isna().to_numpy()]
+        if len(retry):
+            parsed[retry.index] = pd.to_datetime(retry, errors="coerce", format="mixed").to_numpy()
+    dates = np.full(len(text), np.datetime64("NaT"), dtype="datetime64[ns]")
+    present = codes >= 0
+    dates[present] = parsed.to_numpy()[codes[present]]
+    return pd.Series(dates, index=text.index, name=text.name)
+
+
+def to_datetime(values: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Dates and times as datetime64[ns].
+
+    Text is parsed with the format of its first value and, for the rest,
+    each value's own format; numbers are Excel serial day numbers.
+    Values that are not dates (or are out of range) fail and become
+    missing; empty text is missing, not a failure.
+
+    Returns:
+        Tuple of (converted column, mask of failed values)
+    """
+    kind = values.dtype.kind
+    if kind == "M":
+        return values, pd.Series(False, index=values.index)
+    if kind in "iuf":
+        return _from_serials(_floats(values))
+    if kind == "b":
+        return pd.Series(pd.NaT, index=values.index, name=values.name, dtype="datetime64[ns]"), values.notna()
+
+    converted = pd.Series(pd.NaT, index=values.index, name=values.name, dtype="datetime64[ns]")
+    is_string = _strings(values)
+    if is_string.any():
+        text = normalize_text(values[is_string], _DIGIT_RULES).str.strip().replace("", None)
+        converted[is_string] = _parse_dates(text).to_numpy()
+    others = ~is_string & values.notna().to_numpy()
+    if others.any():
+        rest = values[others]
+        numbers, _ = _parse_numbers(rest)
+        is_number = numbers.notna() & ~rest.map(lambda value: isinstance(value, (bool, np.bool_)))
+        serials, _ = _from_serials(numbers[is_number])
+        converted[rest.index[is_number.to_numpy()]] = serials.to_numpy()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            converted[rest.index[~is_number.to_numpy()]] = pd.to_datetime(
+                rest[~is_number], errors="coerce", format="mixed"
+            ).to_numpy()
+    blank = np.zeros(len(values), dtype=bool)
+    blank[is_string] = values[is_string].str.strip().eq("").to_numpy(dtype=bool)
+    return converted, converted.isna() & values.notna() & ~blank
+
+
+CONVERTERS = {
+    STRING: to_string,
+    INTEGER: to_integer,
+    FLOAT: to_float,
+    BOOLEAN: to_boolean,
+    DATETIME: to_datetime
+}
+
+
+def convert(values: pd.Series, data_type: str) -> tuple[pd.Series, pd.Series]:
+    """
+    Convert a column to a type.
+
+    Args:
+        values: Column of any dtype
+        data_type: Target type name (see CONVERTERS)
+
+    Returns:
+        Tuple of (converted column, mask of values that failed and are
+        now missing)
+    """
+    converted, failed = CONVERTERS[data_type](values)
+    converted.name = values.name
+    return converted, failed
+
+
+def bad_values(values: pd.Series, failed: pd.Series, limit: int = MAX_BAD_VALUES) -> list[str]:
+    """The first distinct values of a column that failed to convert, as text."""
+    if not failed.any():
+        return []
+    samples = []
+    for value in values[failed.to_numpy()]:
+        text = str(value)
+        if text not in samples:
+            samples.append(text)
+            if len(samples) == limit:
+                break
+    return samples
+
+
+def integer_dtype(minimum: int, maximum: int) -> str:
+    """Smallest nullable integer dtype holding minimum..maximum."""
+    for dtype in INTEGER_DTYPES:
+        info = np.iinfo(dtype.lower())
+        if info.min <= minimum and maximum <= info.max:
+            return dtype
+    return INTEGER_DTYPES[-1]
+
+
+def fits_float32(values: pd.Series) -> bool:
+    """Whether every float64 value of a column is stored exactly as float32."""
+    numbers = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(over="ignore"):
+        narrowed = numbers.astype(np.float32).astype(np.float64)
+    return bool(((narrowed == numbers) | np.isnan(numbers)).all())
+
+
+def sample_rows(df: pd.DataFrame, rows: int = SAMPLE_ROWS) -> pd.DataFrame:
+    """Up to rows rows spread evenly over df."""
+    if len(df) <= rows:
+        return df
+    return df.iloc[np.linspace(0, len(df) - 1, rows).astype(np.int64)]
+
+
+def infer_type(values: pd.Series) -> str:
+    """
+    Type a column's values are best stored as.
+
+    Number, boolean and date columns keep their kind, except floats that
+    are all whole numbers (integers with missing values, as read from
+    Excel). Text is inferred as the narrowest type every non-empty value
+    converts to; whole numbers written with a leading zero stay text.
+
+    Args:
+        values: The column, or a sample of it (see sample_rows)
+    """
+    kind = values.dtype.kind
+    if kind == "b":
+        return BOOLEAN
+    if kind == "M":
+        return DATETIME
+    if kind in "iu":
+        return INTEGER
+    if kind == "f":
+        numbers = values.dropna()
+        whole = len(numbers) and (numbers % 1 == 0).all() and (numbers.abs() <= MAX_EXACT_INTEGER).all()
+        return INTEGER if whole else FLOAT
+
+    present = values[values.notna().to_numpy()]
+    is_string = _strings(present)
+    if is_string.any():
+        text = present[is_string].str.strip()
+        present = pd.concat([text[text.ne("")], present[~is_string]])
+    if not len(present):
+        return STRING
+    try:
+        numbers, not_numbers = _parse_numbers(present)
+        if not not_numbers.any():
+            text = present[_strings(present)].str.translate(_DIGIT_TABLE).str.lstrip("+-")
+            if text.str.match(_LEADING_ZERO).any():
+                return STRING
+            return INTEGER if infer_type(numbers) == INTEGER else FLOAT
+        for data_type in (BOOLEAN, DATETIME):
+            if not convert(present, data_type)[1].any():
+                return data_type
+    except (ValueError, TypeError, OverflowError):
+        pass
+    return STRING
+
+
+def infer_types(df: pd.DataFrame) -> dict[str, str]:
+    """Inferred type of each column of df, from a sample of its rows."""
+    sample = sample_rows(df)
+    return {str(col): infer_type(sample.iloc[:, position]) for position, col in enumerate(df.columns)}
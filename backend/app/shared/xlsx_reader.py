@@ -0,0 +1,239 @@
+"""Row-by-row XLSX reading with progress reporting."""
+import pickle
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+
+from app.core.progress import report_progress
+
+# Report progress every this many rows
+PROGRESS_INTERVAL_ROWS = 5000
+
+
+def convert_cell(cell) -> Any:
+    """Convert an openpyxl cell the same way pandas.read_excel does."""
+    if cell.value is None:
+        return ""
+    elif cell.data_type == TYPE_ERROR:
+        return np.nan
+    elif cell.data_type == TYPE_NUMERIC:
+        val = int(cell.value)
+        if val == cell.value:
+            return val
+        return float(cell.value)
+    return cell.value
+
+
+def sheet_names(file_path: Path) -> list[str]:
+    """Worksheet names of a workbook, in order, read without loading any cells."""
+    wb = load_workbook(file_path, read_only=True, keep_links=False)
+    try:
+        return wb.sheetnames
+    finally:
+        wb.close()
+
+
+def iter_sheet_rows(file_path: Path) -> Iterator[list[Any]]:
+    """
+    Stream converted rows of the first worksheet, header row included.
+
+    Trailing empty cells are trimmed from each row; callers handle
+    trailing empty rows and padding. Reports "reading" progress (data rows,
+    header excluded) against the possibly stale sheet dimensions.
+    """
+    wb = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[0]
+        rows_total = ws.max_row - 1 if ws.max_row else None
+        ws.reset_dimensions()
+        for row_number, row in enumerate(ws.rows, start=1):
+            converted_row = [convert_cell(cell) for cell in row]
+            while converted_row and converted_row[-1] == "":
+                converted_row.pop()
+            yield converted_row
+            if row_number % PROGRESS_INTERVAL_ROWS == 0:
+                report_progress("reading", row_number - 1, rows_total)
+    finally:
+        wb.close()
+
+
+def _parse_rows(
+    header: list[Any],
+    rows: list[list[Any]],
+    min_width: int = 0,
+    dtype: Any = None
+) -> pd.DataFrame:
+    """Parse converted rows under a header row the way read_excel does."""
+    width = max(min_width, len(header), max((len(row) for row in rows), default=0))
+    data = [row + [""] * (width - len(row)) for row in [header, *rows]]
+    try:
+        return TextParser(data, header=0, skip_blank_lines=False, dtype=dtype).read()
+    except EmptyDataError:
+        return pd.DataFrame()
+
+
+def _iter_row_batches(file_path: Path, batch_rows: int) -> Iterator[tuple[list[Any], list[list[Any]]]]:
+    """
+    Stream (header, rows) batches of the first worksheet.
+
+    Blank rows are kept only when followed by data (read_excel drops
+    trailing ones). At least one, possibly empty, batch is yielded for a
+    non-empty sheet so callers always see the columns.
+    """
+    rows = iter_sheet_rows(file_path)
+    header = next(rows, None)
+    if header is None:
+        return
+
+    batch: list[list[Any]] = []
+    pending_blank_rows = 0
+    yielded = False
+    for row in rows:
+        if not row:
+            pending_blank_rows += 1
+            continue
+        batch.extend([] for _ in range(pending_blank_rows))
+        pending_blank_rows = 0
+        batch.append(row)
+        if len(batch) >= batch_rows:
+            yield header, batch
+            yielded = True
+            batch = []
+
+    if batch or not yielded:
+        yield header, batch
+
+
+def iter_dataframes(file_path: Path, batch_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Stream the first worksheet as DataFrames of up to batch_rows rows.
+
+    Each batch is parsed with the header row like read_excel, so column
+    names match; dtypes are inferred per batch (see iter_typed_dataframes
+    for dtypes that agree across batches).
+    """
+    for header, rows in _iter_row_batches(file_path, batch_rows):
+        yield _parse_rows(header, rows)
+
+
+# Dtype of each column kind once batches are combined
+_KIND_DTYPES = {"i": "int64", "f": "float64", "b": "bool", "M": "datetime64[ns]"}
+
+
+def _column_kinds(df: pd.DataFrame) -> list[str]:
+    """
+    Classify each parsed column as "i", "f", "b", "M", "O" (object) or "N".
+
+    "N" marks a column without values (parsed as all-NaN float), which
+    adopts the kind of the rest of the column.
+    """
+    kinds = []
+    for position, dtype in enumerate(df.dtypes):
+        kind = "i" if dtype.kind == "u" else dtype.kind
+        if kind == "f" and df.iloc[:, position].isna().all():
+            kinds.append("N")
+        else:
+            kinds.append(kind if kind in _KIND_DTYPES else "O")
+    return kinds
+
+
+def _combine_kinds(kinds: set[str]) -> str:
+    """
+    Kind read_excel infers for a whole column from the kinds of its batches.
+
+    Booleans count as numbers: next to numbers or blanks they parse as
+    1/0 like read_excel does.
+    """
+    has_blanks = "N" in kinds
+    kinds = kinds - {"N"}
+    if not kinds:
+        return "f"
+    if kinds == {"M"}:
+        return "M"
+    if kinds == {"b"} and not has_blanks:
+        return "b"
+    if kinds <= {"b", "i"} and not has_blanks:
+        return "i"
+    if kinds <= {"b", "i", "f"}:
+        return "f"
+    return "O"
+
+
+def iter_typed_dataframes(file_path: Path, batch_rows: int, spill_path: Path) -> Iterator[pd.DataFrame]:
+    """
+    Stream the first worksheet as DataFrames whose dtypes agree across batches.
+
+    Every column gets the dtype read_excel infers for the whole sheet, so
+    concatenating the batches gives the same frame as read_excel. The
+    workbook is read once: converted rows are spilled to spill_path while
+    each batch's dtypes are recorded, then the spilled batches are parsed
+    again and cast to their column's overall dtype. Memory use is bounded
+    by the batch size.
+
+    Args:
+        file_path: Path to the Excel file
+        batch_rows: Maximum rows per batch
+        spill_path: Scratch file for converted rows; removed afterwards
+    """
+    header: list[Any] | None = None
+    batch_kinds: list[list[str]] = []
+    width = 0
+    try:
+        with spill_path.open("wb") as spill:
+            for header, rows in _iter_row_batches(file_path, batch_rows):
+                pickle.dump(rows, spill, protocol=pickle.HIGHEST_PROTOCOL)
+                df = _parse_rows(header, rows)
+                batch_kinds.append(_column_kinds(df))
+                width = max(width, df.shape[1])
+        if header is None:
+            return
+
+        column_kinds = [
+            _combine_kinds({kinds[position] if position < len(kinds) else "N" for kinds in batch_kinds})
+            for position in range(width)
+        ]
+        with spill_path.open("rb") as spill:
+            for kinds in batch_kinds:
+                rows = pickle.load(spill)
+                df = _parse_rows(header, rows, width)
+                raw = None
+                for position, final_kind in enumerate(column_kinds):
+                    kind = kinds[position] if position < len(kinds) else "N"
+                    if final_kind == "O":
+                        if kind != "O":
+                            # Re-parse without inference to keep the cells' own values
+                            if raw is None:
+                                raw = _parse_rows(header, rows, width, dtype=object)
+                            df.isetitem(position, raw.iloc[:, position])
+                    elif df.dtypes.iloc[position] != _KIND_DTYPES[final_kind]:
+                        df.isetitem(position, df.iloc[:, position].astype(_KIND_DTYPES[final_kind]))
+                yield df
+    finally:
+        spill_path.unlink(missing_ok=True)
+
+
+def read_excel(file_path: Path) -> pd.DataFrame:
+    """
+    Read the first worksheet into a DataFrame, reporting progress per row batch.
+
+    Produces the same frame as pd.read_excel(file_path, engine="openpyxl").
+    """
+    data: list[list[Any]] = []
+    last_row_with_data = -1
+    for row_number, row in enumerate(iter_sheet_rows(file_path)):
+        if row:
+            last_row_with_data = row_number
+        data.append(row)
+
+    # Trim trailing empty rows
+    data = data[: last_row_with_data + 1]
+    report_progress("reading", max(0, len(data) - 1), max(0, len(data) - 1))
+    if not data:
+        return pd.DataFrame()
+    return _parse_rows(data[0], data[1:])
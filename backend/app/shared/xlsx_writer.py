@@ -0,0 +1,313 @@
+"""Write-only streaming XLSX writer."""
+import datetime
+import re
+import zipfile
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.datetime import to_excel as to_excel_serial
+
+from app.core.config import settings
+from app.core.progress import report_progress
+
+# Rows serialized per write to the worksheet stream
+CHUNK_ROWS = 10000
+
+# Name of the single worksheet written
+SHEET_NAME = "Sheet1"
+
+# Cell style indexes into the cellXfs of STYLES_XML below
+STYLE_DATETIME = 1
+STYLE_DATE = 2
+STYLE_TIME = 3
+STYLE_HEADER = 4
+
+# Most characters (UTF-16 code units) Excel allows in a cell; longer text
+# makes it report the workbook as corrupt
+MAX_CELL_CHARS = 32767
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '<Override PartName="/xl/sharedStrings.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+    '</Types>'
+)
+
+ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<Relationships xmlns="{_PKG_REL_NS}">'
+    f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+WORKBOOK_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+    f'<sheets><sheet name="{SHEET_NAME}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<Relationships xmlns="{_PKG_REL_NS}">'
+    f'<Relationship Id="rId1" Type="{_REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+    f'<Relationship Id="rId2" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+    f'<Relationship Id="rId3" Type="{_REL_NS}/sharedStrings" Target="sharedStrings.xml"/>'
+    '</Relationships>'
+)
+
+# Same number formats pandas/openpyxl use for datetimes, dates and times
+STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<styleSheet xmlns="{_MAIN_NS}">'
+    '<numFmts count="2">'
+    '<numFmt numFmtId="164" formatCode="yyyy-mm-dd h:mm:ss"/>'
+    '<numFmt numFmtId="165" formatCode="yyyy-mm-dd"/>'
+    '</numFmts>'
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '</fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="5">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="21" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+# Characters XML 1.0 cannot represent
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_EXCEL_EPOCH = np.datetime64("1899-12-30T00:00:00", "ns")
+_NANOSECONDS_PER_DAY = 86400 * 10**9
+
+
+def _escape(text: str) -> str:
+    text = _ILLEGAL_XML_CHARS.sub("", text)
+    if len(text) > MAX_CELL_CHARS // 2:
+        # Truncated to the cell limit; a surrogate pair cut in half is dropped
+        text = text.encode("utf-16-le")[:2 * MAX_CELL_CHARS].decode("utf-16-le", errors="ignore")
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+class SharedStrings:
+    """Shared-strings table built incrementally while the sheet is written."""
+
+    def __init__(self):
+        self._index: dict[str, int] = {}
+        self.references = 0
+
+    def add(self, text: str) -> int:
+        """Return the index of text, adding it on first use."""
+        self.references += 1
+        index = self._index.get(text)
+        if index is None:
+            index = self._index[text] = len(self._index)
+        return index
+
+    def write(self, stream, chunk_size: int = CHUNK_ROWS):
+        """Write the sharedStrings part, in insertion (index) order."""
+        stream.write((
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<sst xmlns="{_MAIN_NS}" count="{self.references}" uniqueCount="{len(self._index)}">'
+        ).encode())
+        items = []
+        for text in self._index:
+            escaped = _escape(text)
+            if escaped != escaped.strip():
+                items.append(f'<si><t xml:space="preserve">{escaped}</t></si>')
+            else:
+                items.append(f"<si><t>{escaped}</t></si>")
+            if len(items) >= chunk_size:
+                stream.write("".join(items).encode())
+                items = []
+        stream.write(("".join(items) + "</sst>").encode())
+
+
+def _string_cell(ref: str, text: str, strings: SharedStrings, style: int = 0) -> str:
+    style_attr = f' s="{style}"' if style else ""
+    return f'<c r="{ref}"{style_attr} t="s"><v>{strings.add(text)}</v></c>'
+
+
+def _float_cell(ref: str, value: float, strings: SharedStrings, style: int = 0) -> str:
+    if value != value:
+        return ""
+    if value in (np.inf, -np.inf):
+        # Excel has no infinity; written as text like DataFrame.to_excel
+        return _string_cell(ref, "inf" if value > 0 else "-inf", strings, style)
+    style_attr = f' s="{style}"' if style else ""
+    return f'<c r="{ref}"{style_attr}><v>{value!r}</v></c>'
+
+
+def _value_cell(ref: str, value: Any, strings: SharedStrings, style: int = 0) -> str:
+    """Serialize one cell of arbitrary type ("" for empty cells)."""
+    if value is None or value is pd.NA or value is pd.NaT:
+        return ""
+    if isinstance(value, str):
+        return _string_cell(ref, value, strings, style)
+    style_attr = f' s="{style}"' if style else ""
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{ref}"{style_attr} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, np.integer)):
+        return f'<c r="{ref}"{style_attr}><v>{int(value)}</v></c>'
+    if isinstance(value, (float, np.floating)):
+        return _float_cell(ref, float(value), strings, style)
+    if isinstance(value, np.datetime64):
+        value = pd.Timestamp(value)
+        if value is pd.NaT:
+            return ""
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.replace(tzinfo=None)
+        return _float_cell(ref, float(to_excel_serial(value)), strings, style or STYLE_DATETIME)
+    if isinstance(value, datetime.date):
+        return _float_cell(ref, float(to_excel_serial(value)), strings, style or STYLE_DATE)
+    if isinstance(value, datetime.time):
+        return _float_cell(ref, float(to_excel_serial(value)), strings, style or STYLE_TIME)
+    if isinstance(value, (datetime.timedelta, np.timedelta64)):
+        return _float_cell(ref, pd.Timedelta(value).total_seconds() / 86400, strings, style)
+    return _string_cell(ref, str(value), strings, style)
+
+
+def _datetime_serials(column: pd.Series) -> list[float]:
+    """Excel serials of a datetime64 column (NaN for NaT), vectorized."""
+    if getattr(column.dtype, "tz", None) is not None:
+        column = column.dt.tz_localize(None)
+    values = column.to_numpy(dtype="datetime64[ns]")
+    nanoseconds = (values - _EXCEL_EPOCH).astype(np.int64)
+    serials = nanoseconds / _NANOSECONDS_PER_DAY
+    # Excel's fictitious 1900-02-29: serials up to 60 are shifted by one day
+    serials = np.where((serials >= 1) & (serials < 61), serials - 1, serials)
+    serials[np.isnat(values)] = np.nan
+    return serials.tolist()
+
+
+def _column_cells(column: pd.Series, letter: str, first_row: int, strings: SharedStrings) -> list[str]:
+    """Serialize one column of a chunk to cell XML ("" for empty cells)."""
+    rows = range(first_row, first_row + len(column))
+    dtype = column.dtype
+    # Nullable extension dtypes (Int64, boolean, ...) hold pd.NA; use the generic path
+    numpy_backed = isinstance(dtype, np.dtype)
+
+    if numpy_backed and dtype.kind in "iu":
+        return [f'<c r="{letter}{row}"><v>{value}</v></c>' for row, value in zip(rows, column.tolist())]
+    if numpy_backed and dtype.kind == "f":
+        return [
+            _float_cell(f"{letter}{row}", value, strings)
+            for row, value in zip(rows, column.tolist())
+        ]
+    if numpy_backed and dtype.kind == "b":
+        return [f'<c r="{letter}{row}" t="b"><v>{int(value)}</v></c>' for row, value in zip(rows, column.tolist())]
+    if dtype.kind == "M":
+        return [
+            _float_cell(f"{letter}{row}", value, strings, STYLE_DATETIME)
+            for row, value in zip(rows, _datetime_serials(column))
+        ]
+    return [
+        _value_cell(f"{letter}{row}", value, strings)
+        for row, value in zip(rows, column.to_numpy(dtype=object).tolist())
+    ]
+
+
+def write_batches(
+    file_path: Path,
+    batches: Iterable[pd.DataFrame],
+    total_rows: int | None = None,
+    compression_level: int | None = None
+) -> None:
+    """
+    Stream DataFrame batches into a single-sheet XLSX file.
+
+    Rows are serialized CHUNK_ROWS at a time straight into the compressed
+    worksheet entry, so memory stays flat regardless of the row count; only
+    the shared-strings table (one entry per distinct text) grows. The
+    header comes from the first batch's columns and the index is not
+    written, like ``DataFrame.to_excel(index=False)``. Reports "writing"
+    progress.
+
+    Args:
+        file_path: Destination path
+        batches: DataFrames with the same columns, in row order
+        total_rows: Total data rows, if known (for the sheet dimension and progress)
+        compression_level: zlib level 0-9 (default settings.xlsx_compression_level)
+    """
+    if compression_level is None:
+        compression_level = settings.xlsx_compression_level
+    strings = SharedStrings()
+
+    with zipfile.ZipFile(
+        file_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compression_level
+    ) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES_XML)
+        archive.writestr("_rels/.rels", ROOT_RELS_XML)
+        archive.writestr("xl/workbook.xml", WORKBOOK_XML)
+        archive.writestr("xl/_rels/workbook.xml.rels", WORKBOOK_RELS_XML)
+        archive.writestr("xl/styles.xml", STYLES_XML)
+
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<worksheet xmlns="{_MAIN_NS}">'.encode())
+            letters: list[str] | None = None
+            rows_written = 0
+            for batch in batches:
+                if letters is None:
+                    letters = [get_column_letter(i + 1) for i in range(len(batch.columns))]
+                    if letters and total_rows is not None:
+                        sheet.write(f'<dimension ref="A1:{letters[-1]}{total_rows + 1}"/>'.encode())
+                    sheet.write(b"<sheetData>")
+                    if letters:
+                        header = "".join(
+                            _value_cell(f"{letter}1", name, strings, STYLE_HEADER)
+                            for letter, name in zip(letters, batch.columns)
+                        )
+                        sheet.write(f'<row r="1">{header}</row>'.encode())
+
+                for start in range(0, len(batch), CHUNK_ROWS):
+                    chunk = batch.iloc[start:start + CHUNK_ROWS]
+                    first_row = rows_written + 2
+                    columns = [
+                        _column_cells(chunk.iloc[:, position], letter, first_row, strings)
+                        for position, letter in enumerate(letters)
+                    ]
+                    xml = "".join(
+                        f'<row r="{row}">{"".join(cells)}</row>'
+                        for row, cells in zip(range(first_row, first_row + len(chunk)), zip(*columns))
+                    )
+                    sheet.write(xml.encode())
+                    rows_written += len(chunk)
+                    report_progress("writing", rows_written, total_rows)
+
+            if letters is None:
+                sheet.write(b"<sheetData>")
+            sheet.write(b"</sheetData></worksheet>")
+
+        with archive.open("xl/sharedStrings.xml", "w", force_zip64=True) as shared_strings:
+            strings.write(shared_strings)
+
+
+def write_excel(df: pd.DataFrame, file_path: Path, compression_level: int | None = None) -> None:
+    """Write a DataFrame to XLSX like ``df.to_excel(file_path, index=False)``, streaming."""
+    write_batches(file_path, [df], total_rows=len(df), compression_level=compression_level)
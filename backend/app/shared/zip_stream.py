@@ -0,0 +1,52 @@
+"""Streaming ZIP archives for multi-file downloads."""
+import io
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator
+
+# Bytes read from an entry's file per step
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable buffer that hands out what was written so far."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        yield from chunks
+
+
+def iter_zip(entries: Iterable[tuple[str, Path]]) -> Iterator[bytes]:
+    """
+    Stream a ZIP archive of files as it is written.
+
+    Entries are stored without recompression (XLSX files are already
+    deflated) and sizes follow each entry in a data descriptor, so
+    nothing is buffered beyond one read chunk. entries is consumed
+    lazily: an entry's file only has to exist once the archive reaches it.
+
+    Args:
+        entries: (name in the archive, path of the file) pairs
+
+    Yields:
+        Bytes of the archive
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for name, path in entries:
+            with archive.open(name, "w", force_zip64=True) as dest, open(path, "rb") as source:
+                while chunk := source.read(READ_CHUNK_SIZE):
+                    dest.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    yield from sink.drain()
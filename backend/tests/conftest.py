@@ -0,0 +1,30 @@
+"""Shared fixtures: the app on a temporary storage directory."""
+import io
+import os
+import tempfile
+
+os.environ.setdefault("TEMP_FILES_DIR", tempfile.mkdtemp())
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    return TestClient(app)
+
+
+@pytest.fixture
+def upload(client):
+    """Upload a DataFrame as an .xlsx file and return its file_id."""
+    def upload(df: pd.DataFrame) -> str:
+        buffer = io.BytesIO()
+        df.to_excel(buffer, index=False)
+        buffer.seek(0)
+        response = client.post("/api/upload", files={"file": ("data.xlsx", buffer, "application/octet-stream")})
+        assert response.status_code == 200, response.text
+        return response.json()["file_id"]
+    return upload
@@ -0,0 +1,60 @@
+"""Tests for adding several calculated columns in one request."""
+import pandas as pd
+
+
+def test_columns_may_reference_each_other(client, upload):
+    file_id = upload(pd.DataFrame({"price": [10, 20], "quantity": [3, 1]}))
+    response = client.post("/api/calculated-column", json={
+        "file_id": file_id,
+        "columns": [
+            {"new_column_name": "with_tax", "formula": "total * 1.5"},
+            {"new_column_name": "total", "formula": "price * quantity"},
+            {"new_column_name": "big", "formula": "with_tax > 40"},
+        ]
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["new_columns"] == ["with_tax", "total", "big"]
+    assert body["message"] == "3 calculated columns created successfully"
+
+    preview = client.get(f"/api/preview/{body['file_id']}").json()
+    assert preview["columns"] == ["price", "quantity", "with_tax", "total", "big"]
+    assert [row["total"] for row in preview["data"]] == [30, 20]
+    assert [row["with_tax"] for row in preview["data"]] == [45.0, 30.0]
+    assert [row["big"] for row in preview["data"]] == [True, False]
+
+
+def test_single_column_request_still_works(client, upload):
+    file_id = upload(pd.DataFrame({"price": [10, 20]}))
+    response = client.post("/api/calculated-column", json={
+        "file_id": file_id, "new_column_name": "half", "formula": "price / 2"
+    })
+    assert response.status_code == 200, response.text
+    assert response.json()["new_column"] == "half"
+    assert response.json()["message"] == "Calculated column created successfully"
+
+
+def test_duplicate_names_are_rejected(client, upload):
+    file_id = upload(pd.DataFrame({"price": [10, 20]}))
+    response = client.post("/api/calculated-column", json={
+        "file_id": file_id,
+        "columns": [
+            {"new_column_name": "x", "formula": "price + 1"},
+            {"new_column_name": "x", "formula": "price + 2"},
+        ]
+    })
+    assert response.status_code == 422
+    assert "Duplicate new column names: x" in response.text
+
+
+def test_circular_columns_are_rejected(client, upload):
+    file_id = upload(pd.DataFrame({"price": [10, 20]}))
+    response = client.post("/api/calculated-column", json={
+        "file_id": file_id,
+        "columns": [
+            {"new_column_name": "x", "formula": "y + 1"},
+            {"new_column_name": "y", "formula": "x + price"},
+        ]
+    })
+    assert response.status_code == 400
+    assert "Circular reference between formulas" in response.json()["detail"]
@@ -0,0 +1,113 @@
+"""Tests for the calculated-column formula language."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.shared.expressions import ExpressionError, compile_formulas
+
+DF = pd.DataFrame({
+    "a": [7, -7, 5, None],
+    "b": [2, 2, 0, 1],
+    "name": ["x", "y", None, "z"],
+    "Unit Price": [1.5, 2.0, 3.0, 4.0],
+    "d": pd.to_datetime(["2024-01-01", "2024-02-01", None, "2024-03-01"]),
+})
+
+
+def evaluate(formula: str) -> list:
+    return compile_formulas({"result": formula}, DF.dtypes.to_dict()).evaluate(DF)["result"].tolist()
+
+
+def assert_values(actual: list, expected: list):
+    assert len(actual) == len(expected)
+    for value, wanted in zip(actual, expected):
+        if wanted is None or pd.isna(wanted):
+            assert pd.isna(value)
+        else:
+            assert value == wanted
+
+
+@pytest.mark.parametrize("formula, expected", [
+    ("1 + 2 * 3 ^ 2", 19),
+    ("-2 ^ 2", -4),
+    ("2 ^ 3 ^ 2", 512),
+    ("10 - 4 - 3", 3),
+    ("(1 + 2) * 3", 9),
+    ("7 // 2", 3),
+    ("-7 // 2", -4),
+    ("7 % 3", 1),
+    ("1 + 2 = 3 AND NOT 1 > 2", True),
+])
+def test_operator_precedence(formula, expected):
+    assert evaluate(formula) == [expected] * len(DF)
+
+
+@pytest.mark.parametrize("formula", ["a / b", "a // b", "a % b", "b ^ -1 * 0 ^ -1"])
+def test_division_by_zero_gives_missing(formula):
+    values = evaluate(formula)
+    assert pd.isna(values[2])
+    assert not np.isinf([value for value in values if not pd.isna(value)]).any()
+
+
+def test_missing_values():
+    assert_values(evaluate("a + 1"), [8, -6, 6, None])
+    assert evaluate("a > 0") == [True, False, True, False]
+    assert evaluate("name & '!'") == ["x!", "y!", "!", "z!"]
+    assert evaluate("COALESCE(a, 0)") == [7, -7, 5, 0]
+
+
+def test_chained_comparisons_and_in_lists():
+    assert evaluate("0 < b <= 2") == [True, True, False, True]
+    assert evaluate("name IN ('x', 'z')") == [True, False, False, True]
+    assert evaluate("name NOT IN ['x']") == [False, True, True, True]
+    assert evaluate("b IN [1 + 1]") == [True, True, False, False]
+
+
+def test_columns_dates_and_functions():
+    assert evaluate("[Unit Price] * 2") == [3.0, 4.0, 6.0, 8.0]
+    assert evaluate("IF(a > 0, 'pos', 'neg')") == ["pos", "neg", "pos", "neg"]
+    assert evaluate("CASE WHEN b = 0 THEN 'zero' WHEN b = 1 THEN 'one' ELSE 'many' END") == ["many", "many", "zero", "one"]
+    assert_values(evaluate("MAX(a, b)"), [7, 2, 5, 1])
+    assert_values(evaluate("YEAR(d + 365)"), [2024, 2025, None, 2025])
+
+
+@pytest.mark.parametrize("formula, message", [
+    ("name * 2", "Expected a number, got text"),
+    ("MIN(name, name)", "Expected int or float or date, got text"),
+    ("IF(a, 1, 2)", "Expected bool"),
+    ("zz + 1", "Unknown column 'zz'"),
+    ("FOO(1)", "Unknown function FOO"),
+    ("1 +", "Unexpected end of formula"),
+    ("a IN ()", "IN needs at least one value"),
+])
+def test_invalid_formulas(formula, message):
+    with pytest.raises(ExpressionError, match=message):
+        compile_formulas({"result": formula}, DF.dtypes.to_dict())
+
+
+def test_formulas_use_each_other_and_share_subexpressions():
+    plan = compile_formulas({"double": "a * 2", "next": "double + 1", "again": "(a * 2) + 1"}, DF.dtypes.to_dict())
+    results = plan.evaluate(DF, workers=4)
+    assert_values(results["next"].tolist(), [15, -13, 11, None])
+    assert_values(results["again"].tolist(), results["next"].tolist())
+
+
+def test_circular_formulas():
+    with pytest.raises(ExpressionError, match="Circular reference between formulas"):
+        compile_formulas({"x": "y + 1", "y": "x + 1"}, DF.dtypes.to_dict())
+
+
+def test_endpoint_reports_formula_errors(client, upload):
+    file_id = upload(pd.DataFrame({"name": ["a", "b"], "price": [1, 2]}))
+    response = client.post("/api/calculated-column", json={
+        "file_id": file_id, "new_column_name": "bad", "formula": "name * 2"
+    })
+    assert response.status_code == 400
+    assert "Expected a number, got text" in response.json()["detail"]
+
+    response = client.post("/api/calculated-column", json={
+        "file_id": file_id, "new_column_name": "total", "formula": "price // 2 + 1 < 2"
+    })
+    assert response.status_code == 200, response.text
+    preview = client.get(f"/api/preview/{response.json()['file_id']}").json()
+    assert [row["total"] for row in preview["data"]] == [True, False]
@@ -0,0 +1,47 @@
+"""Regression checks for the JSON preview."""
+import io
+import os
+import tempfile
+
+os.environ.setdefault("TEMP_FILES_DIR", tempfile.mkdtemp())
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+
+def _upload(df: pd.DataFrame) -> str:
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    buffer.seek(0)
+    response = client.post("/api/upload", files={"file": ("data.xlsx", buffer, "application/octet-stream")})
+    assert response.status_code == 200, response.text
+    return response.json()["file_id"]
+
+
+def test_preview_of_converted_file_with_empty_cells():
+    file_id = _upload(pd.DataFrame({
+        "flag": ["yes", None, "no"],
+        "count": ["1", None, "300"],
+        "price": [1.5, None, 2.0]
+    }))
+    response = client.post("/api/convert-types", json={
+        "file_id": file_id,
+        "conversions": {"flag": "boolean", "count": "integer", "price": "float"}
+    })
+    assert response.status_code == 200, response.text
+    converted_id = response.json()["file_id"]
+
+    for preview_format in ("records", "columnar"):
+        response = client.get(f"/api/preview/{converted_id}", params={"format": preview_format})
+        assert response.status_code == 200, response.text
+        preview = response.json()
+        assert preview["dtypes"] == {"flag": "boolean", "count": "Int16", "price": "float32"}
+        if preview_format == "records":
+            assert preview["data"][1] == {"flag": "", "count": "", "price": ""}
+            assert preview["data"][0] == {"flag": True, "count": 1, "price": 1.5}
+        else:
+            assert preview["values"][0] == [True, "", False]
@@ -0,0 +1,62 @@
+"""Tests for Persian and Arabic digit and text normalization."""
+import pandas as pd
+
+from app.features.number_normalization.schemas import NormalizationDirection, NumberNormalizationRequest, ZwnjHandling
+from app.features.number_normalization.service import normalization_rules
+from app.shared.text_normalization import ZWNJ, normalize_text, parse_numbers
+
+
+def normalize(values: list, **options) -> list:
+    request = NumberNormalizationRequest(file_id="unused", **options)
+    return normalize_text(pd.Series(values, dtype=object), normalization_rules(request)).tolist()
+
+
+def test_persian_and_arabic_digits_to_english():
+    values = normalize(["۱۲۳", "٤٥٦", "۱٬۲۵۰٫۵", "abc ۹", None, ""], direction=NormalizationDirection.PERSIAN_TO_ENGLISH)
+    assert values == ["123", "456", "1,250.5", "abc 9", None, ""]
+
+
+def test_english_to_persian_converts_separators_only_inside_numbers():
+    values = normalize(["1,250.5", "Mr. Smith", "a,b", "٣"], direction=NormalizationDirection.ENGLISH_TO_PERSIAN)
+    assert values == ["۱٬۲۵۰٫۵", "Mr. Smith", "a,b", "۳"]
+
+
+def test_letters_and_zwnj():
+    text = f"{ZWNJ}مي{ZWNJ}{ZWNJ}خواهم كتاب {ZWNJ}ها{ZWNJ}"
+    tidy = normalize([text], direction=NormalizationDirection.PERSIAN_TO_ENGLISH, normalize_letters=True, zwnj=ZwnjHandling.TIDY)
+    assert tidy == [f"می{ZWNJ}خواهم کتاب ها"]
+    removed = normalize([text], direction=NormalizationDirection.PERSIAN_TO_ENGLISH, zwnj=ZwnjHandling.REMOVE)
+    assert removed == ["ميخواهم كتاب ها"]
+
+
+def test_mixed_columns_keep_their_numbers():
+    assert normalize([5, "۵", 2.5], direction=NormalizationDirection.PERSIAN_TO_ENGLISH) == [5, "5", 2.5]
+
+
+def test_parse_numbers():
+    numbers, not_numbers = parse_numbers(pd.Series(["1,250", " 2.5 ", "", None, "x1"], dtype=object))
+    assert numbers.tolist()[:2] == [1250.0, 2.5]
+    assert numbers.iloc[2:].isna().all()
+    assert not_numbers.tolist() == [False, False, False, False, True]
+
+
+def test_endpoint_leaves_number_columns_alone(client, upload):
+    file_id = upload(pd.DataFrame({
+        "code": ["۱۲", "٣٤", None],
+        "label": ["كد ۱", "b", "c"],
+        "amount": [1.5, 2.0, None],
+    }))
+    response = client.post("/api/normalize-numbers", json={
+        "file_id": file_id, "direction": "persian_to_english", "normalize_letters": True, "parse_numbers": True
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["columns_processed"] == 2
+    assert body["skipped_columns"] == ["amount"]
+    assert body["parsed_columns"] == ["code"]
+
+    preview = client.get(f"/api/preview/{body['file_id']}").json()
+    assert preview["dtypes"]["amount"] == "float64"
+    assert [row["code"] for row in preview["data"]] == [12, 34, ""]
+    assert [row["label"] for row in preview["data"]] == ["کد 1", "b", "c"]
+    assert [row["amount"] for row in preview["data"]] == [1.5, 2.0, ""]
@@ -0,0 +1,73 @@
+"""Tests for multi-pattern, exact and regex search and replace."""
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from app.features.search_replace.schemas import ReplaceMode
+from app.features.search_replace.service import compile_replacer, replace_column
+
+
+def replacer(pairs: dict, mode: ReplaceMode = ReplaceMode.SUBSTRING, case_sensitive: bool = False):
+    return compile_replacer(tuple(pairs.items()), mode, case_sensitive)
+
+
+@pytest.mark.parametrize("pairs, text, expected", [
+    ({"he": "1", "she": "2", "hers": "3"}, "ushers", ("u2rs", 1)),
+    ({"a": "1", "ab": "2", "abc": "3"}, "abcab", ("32", 2)),
+    ({"a": "b", "b": "c"}, "ab", ("bc", 2)),
+    ({"aa": "x"}, "aaa", ("xa", 1)),
+    ({"x": "y"}, "abc", ("abc", 0)),
+    ({"ab": ""}, "abab", ("", 2)),
+])
+def test_overlapping_patterns(pairs, text, expected):
+    assert replacer(pairs)(text) == expected
+
+
+def test_case_folding():
+    assert replacer({"Istanbul": "X"})("İSTANBUL istanbul") == ("X X", 2)
+    assert replacer({"s": "x"})("ſ S") == ("ſ x", 1)
+    assert replacer({"a": "x"}, case_sensitive=True)("aA") == ("xA", 1)
+
+
+def test_exact_mode_matches_whole_cells():
+    replace = replacer({"yes": "1", "no": "0"}, ReplaceMode.EXACT)
+    assert replace("YES") == ("1", 1)
+    assert replace("yes please") == ("yes please", 0)
+
+
+def test_regex_mode():
+    assert replacer({r"(\d+)-(\d+)": r"\2-\1"}, ReplaceMode.REGEX)("1-2 and 3-4") == ("2-1 and 4-3", 2)
+    with pytest.raises(HTTPException) as error:
+        replacer({"(": "x"}, ReplaceMode.REGEX)
+    assert error.value.status_code == 400
+
+
+def test_replace_column_counts_occurrences_and_keeps_other_values():
+    values = pd.Series(["aXa", "aXa", None, 5, "b"], dtype=object)
+    replaced, count = replace_column(values, replacer({"a": "c"}))
+    assert replaced.tolist()[:2] == ["cXc", "cXc"]
+    assert pd.isna(replaced.iloc[2])
+    assert replaced.tolist()[3:] == [5, "b"]
+    assert count == 4
+
+
+def test_endpoint_applies_a_dictionary_in_one_pass(client, upload):
+    file_id = upload(pd.DataFrame({"city": ["Tehran st", "Shiraz ave"], "n": [1, 2]}))
+    response = client.post("/api/search-replace", json={
+        "file_id": file_id, "replacements": {"st": "street", "ave": "avenue", "n": "N"}
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["column_counts"] == {"city": 3}
+    assert body["skipped_columns"] == ["n"]
+
+    preview = client.get(f"/api/preview/{body['file_id']}").json()
+    assert [row["city"] for row in preview["data"]] == ["TehraN street", "Shiraz avenue"]
+    assert [row["n"] for row in preview["data"]] == [1, 2]
+
+
+def test_empty_search_text_is_rejected(client, upload):
+    file_id = upload(pd.DataFrame({"city": ["Tehran"]}))
+    response = client.post("/api/search-replace", json={"file_id": file_id, "replacements": {"": "x"}})
+    assert response.status_code == 422
+    assert "must not be empty" in response.text
@@ -0,0 +1,99 @@
+"""Tests for type inference and dtype-preserving conversion."""
+import pandas as pd
+import pytest
+
+from app.shared.type_inference import bad_values, convert, fits_float32, infer_type, integer_dtype
+
+
+def text(values: list) -> pd.Series:
+    return pd.Series(values, dtype=object)
+
+
+def test_integer_failures_become_missing_not_zero():
+    converted, failed = convert(text(["1", "۱۲٬۵۰۰", "2.5", "abc", "", None]), "integer")
+    assert str(converted.dtype) == "Int64"
+    assert converted.tolist() == [1, 12500, pd.NA, pd.NA, pd.NA, pd.NA]
+    assert failed.tolist() == [False, False, True, True, False, False]
+
+
+def test_long_integers_are_parsed_exactly():
+    converted, failed = convert(text(["9007199254740993", "9223372036854775807", "-9223372036854775808", "9223372036854775808"]), "integer")
+    assert converted.tolist() == [2 ** 53 + 1, 2 ** 63 - 1, -2 ** 63, pd.NA]
+    assert failed.tolist() == [False, False, False, True]
+
+
+def test_boolean_tokens():
+    converted, failed = convert(text(["Yes", "no", "بله", "0", "maybe", " ", None]), "boolean")
+    assert str(converted.dtype) == "boolean"
+    assert converted.tolist() == [True, False, True, False, pd.NA, pd.NA, pd.NA]
+    assert failed.sum() == 1
+
+
+def test_dates_from_text_and_excel_serials():
+    converted, failed = convert(text(["2024-01-31", 45322, "not a date"]), "datetime")
+    assert converted.tolist()[:2] == [pd.Timestamp("2024-01-31"), pd.Timestamp("2024-01-31")]
+    assert failed.tolist() == [False, False, True]
+
+
+def test_strings_drop_the_float_suffix():
+    converted, failed = convert(pd.Series([1.0, 2.5, None]), "string")
+    assert converted.tolist()[:2] == ["1", "2.5"]
+    assert not failed.any()
+
+
+def test_bad_values_lists_distinct_failures():
+    values = text(["x", "1", "x", "y", "z"])
+    _, failed = convert(values, "integer")
+    assert bad_values(values, failed, limit=2) == ["x", "y"]
+
+
+@pytest.mark.parametrize("minimum, maximum, dtype", [
+    (-128, 127, "Int8"),
+    (0, 300, "Int16"),
+    (-70000, 0, "Int32"),
+    (0, 2 ** 40, "Int64"),
+])
+def test_integer_dtype(minimum, maximum, dtype):
+    assert integer_dtype(minimum, maximum) == dtype
+
+
+def test_fits_float32():
+    assert fits_float32(pd.Series([1.5, None, 0.25]))
+    assert not fits_float32(pd.Series([0.1]))
+
+
+@pytest.mark.parametrize("values, expected", [
+    (["1", "2", None], "integer"),
+    (["1.5", "۲"], "float"),
+    (["0912", "123"], "string"),
+    (["yes", "no", ""], "boolean"),
+    (["2024-01-01", "2024/02/03"], "datetime"),
+    (["a", "1"], "string"),
+    ([1.0, None, 3.0], "integer"),
+])
+def test_infer_type(values, expected):
+    assert infer_type(text(values) if isinstance(values[0], str) else pd.Series(values)) == expected
+
+
+def test_endpoint_reports_failures_and_compacts(client, upload):
+    file_id = upload(pd.DataFrame({
+        "count": ["1", "x", "300"],
+        "ratio": ["0.5", "1.25", "bad"],
+        "code": ["7", "8", "9"],
+    }))
+    response = client.post("/api/convert-types", json={
+        "file_id": file_id, "conversions": {"count": "integer", "ratio": "float", "code": "auto"}
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["failures"] == 2
+    assert body["columns"]["count"] == {"data_type": "integer", "dtype": "Int16", "failures": 1, "bad_values": ["x"]}
+    assert body["columns"]["ratio"]["dtype"] == "float32"
+    assert body["columns"]["ratio"]["bad_values"] == ["bad"]
+    assert body["columns"]["code"]["data_type"] == "integer"
+    assert body["columns"]["code"]["dtype"] == "Int8"
+
+    response = client.post("/api/convert-types", json={
+        "file_id": file_id, "conversions": {"count": "integer"}, "compact": False
+    })
+    assert response.json()["columns"]["count"]["dtype"] == "Int64"
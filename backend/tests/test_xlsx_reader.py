@@ -0,0 +1,27 @@
+"""Tests for the streaming XLSX reader, checked against pandas.read_excel."""
+import datetime
+
+import pandas as pd
+import pytest
+
+from app.shared.xlsx_reader import iter_dataframes, iter_typed_dataframes
+
+
+@pytest.mark.parametrize("batch_rows", [1, 2, 100])
+def test_typed_batches_agree_with_read_excel(tmp_path, batch_rows):
+    path = tmp_path / "data.xlsx"
+    # Column kinds differ between batches: numbers then text, blanks then dates
+    df = pd.DataFrame({
+        "a": [1, 2, "x", 4],
+        "b": [None, None, datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 2)],
+        "c": [1, 2, 3.5, None],
+        "d": [True, False, True, False],
+    })
+    df.to_excel(path, index=False)
+    expected = pd.read_excel(path, engine="openpyxl")
+
+    batches = list(iter_typed_dataframes(path, batch_rows, tmp_path / "spill"))
+    assert all(len(batch) <= batch_rows for batch in batches)
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), expected)
+    assert not (tmp_path / "spill").exists()
+    assert sum(len(batch) for batch in iter_dataframes(path, batch_rows)) == len(expected)
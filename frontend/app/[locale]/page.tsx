@@ -532,6 +532,8 @@ export default function Home() {
                 <DataGrid
                   columns={selectedFile.preview.columns}
                   data={selectedFile.preview.data}
+                  fileId={selectedFile.file_id}
+                  totalRows={selectedFile.preview.total_rows}
                 />
               </Card>
             ) : null;
@@ -1133,7 +1135,7 @@ function FeatureCalculatedColumn({ uploadedFiles, selectedFileId, onAddCalculate
                 Available columns: {columns.join(', ')}
               </p>
               <p className="text-xs text-gray-500">
-                Example: Price * Quantity, Column1 + Column2
+                Example: Price * Quantity, IF([Unit Price] &gt; 100, 'high', 'low'), YEAR(Date)
               </p>
             </div>
             <Button
@@ -1207,6 +1209,7 @@ function FeatureTypeConversion({ uploadedFiles, selectedFileId, onConvertTypes,
                   <option value="float">Float (Decimal)</option>
                   <option value="boolean">Boolean (True/False)</option>
                   <option value="datetime">DateTime</option>
+                  <option value="auto">Auto (Inferred)</option>
                 </select>
               </div>
               <Button onClick={addConversion} disabled={!selectedColumn} size="sm">
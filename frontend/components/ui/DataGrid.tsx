@@ -1,18 +1,58 @@
 // Simple Data Grid Component for Excel Preview
 'use client';
 
-import React from 'react';
+import React, { useCallback, useEffect, useState } from 'react';
+import { apiClient } from '@/lib/api';
+
+// Rows fetched per page when scrolling past the loaded rows
+const PAGE_ROWS = 200;
 
 interface DataGridProps {
     columns: string[];
     data: Record<string, any>[];
     maxHeight?: string;
+    // When given, further pages are loaded from the preview endpoint on scroll
+    fileId?: string;
+    totalRows?: number;
 }
 
-export function DataGrid({ columns, data, maxHeight = '400px' }: DataGridProps) {
+export function DataGrid({ columns, data, maxHeight = '400px', fileId, totalRows }: DataGridProps) {
+    const [rows, setRows] = useState<Record<string, any>[]>(data);
+    const [loading, setLoading] = useState(false);
+
+    useEffect(() => {
+        setRows(data);
+    }, [data, fileId]);
+
+    const hasMore = fileId !== undefined && totalRows !== undefined && rows.length < totalRows;
+
+    const loadMore = useCallback(async () => {
+        if (!hasMore || loading || !fileId) return;
+        setLoading(true);
+        try {
+            const page = await apiClient.previewPage(fileId, rows.length, PAGE_ROWS, columns);
+            const values = page.values ?? [];
+            const pageRows = Array.from({ length: page.preview_rows }, (_, rowIdx) =>
+                Object.fromEntries(page.columns.map((col, colIdx) => [col, values[colIdx][rowIdx]]))
+            );
+            setRows((current) => [...current, ...pageRows]);
+        } catch (error) {
+            console.error('Failed to load preview rows', error);
+        } finally {
+            setLoading(false);
+        }
+    }, [hasMore, loading, fileId, rows.length, columns]);
+
+    const handleScroll = (event: React.UIEvent<HTMLDivElement>) => {
+        const target = event.currentTarget;
+        if (target.scrollHeight - target.scrollTop - target.clientHeight < 100) {
+            loadMore();
+        }
+    };
+
     return (
         <div className="w-full border border-gray-300 rounded-lg overflow-hidden">
-            <div className="overflow-auto" style={{ maxHeight }}>
+            <div className="overflow-auto" style={{ maxHeight }} onScroll={handleScroll}>
                 <table className="min-w-full divide-y divide-gray-300">
                     <thead className="bg-primary text-white sticky top-0 z-10">
                         <tr>
@@ -27,7 +67,7 @@ export function DataGrid({ columns, data, maxHeight = '400px' }: DataGridProps)
                         </tr>
                     </thead>
                     <tbody className="divide-y divide-gray-200 bg-white">
-                        {data.length === 0 ? (
+                        {rows.length === 0 ? (
                             <tr>
                                 <td
                                     colSpan={columns.length}
@@ -37,7 +77,7 @@ export function DataGrid({ columns, data, maxHeight = '400px' }: DataGridProps)
                                 </td>
                             </tr>
                         ) : (
-                            data.map((row, rowIdx) => (
+                            rows.map((row, rowIdx) => (
                                 <tr key={rowIdx} className="hover:bg-gray-50">
                                     {columns.map((col, colIdx) => (
                                         <td key={colIdx} className="px-4 py-2 text-sm text-gray-900 whitespace-nowrap">
@@ -50,6 +90,11 @@ export function DataGrid({ columns, data, maxHeight = '400px' }: DataGridProps)
                     </tbody>
                 </table>
             </div>
+            {totalRows !== undefined && (
+                <div className="px-4 py-2 text-xs text-gray-500 bg-gray-50 border-t border-gray-200">
+                    {loading ? 'Loading…' : `${rows.length} / ${totalRows} rows`}
+                </div>
+            )}
         </div>
     );
 }
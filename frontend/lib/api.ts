@@ -1,4 +1,6 @@
 // API client for Excel Tools backend
+import type { AggregationFunction, CalculatedColumnDefinition, NumberNormalizationRequest, PipelineResponse, PipelineStep, PreviewResponse, ReplaceMode } from '@/types';
+
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
 export class ApiClient {
@@ -51,6 +53,17 @@ export class ApiClient {
         return this.fetch(`/api/preview/${fileId}?max_rows=${maxRows}`);
     }
 
+    // One page of rows in the compact columnar shape (values: one list per column)
+    async previewPage(fileId: string, offset: number, limit: number, columns?: string[]): Promise<PreviewResponse> {
+        const params = new URLSearchParams({
+            offset: String(offset),
+            limit: String(limit),
+            format: 'columnar',
+        });
+        columns?.forEach((col) => params.append('columns', col));
+        return this.fetch(`/api/preview/${fileId}?${params}`);
+    }
+
     // Generic POST request
     async post<T>(endpoint: string, data: any): Promise<T> {
         return this.fetch(endpoint, {
@@ -68,10 +81,15 @@ export class ApiClient {
     }
 
     // ============= Feature 2: Deduplicate & Merge =============
-    async deduplicateMerge(fileId: string, duplicateColumns: string[]) {
+    async deduplicateMerge(
+        fileId: string,
+        duplicateColumns: string[],
+        aggregations?: Record<string, AggregationFunction>
+    ) {
         return this.post('/api/deduplicate-merge', {
             file_id: fileId,
-            duplicate_columns: duplicateColumns
+            duplicate_columns: duplicateColumns,
+            aggregations
         });
     }
 
@@ -81,11 +99,17 @@ export class ApiClient {
     }
 
     // ============= Feature 4: Number Normalization =============
-    async normalizeNumbers(fileId: string, direction: string, columns?: string[] | null) {
+    async normalizeNumbers(
+        fileId: string,
+        direction: string,
+        columns?: string[] | null,
+        options?: Pick<NumberNormalizationRequest, 'normalize_letters' | 'zwnj' | 'parse_numbers'>
+    ) {
         return this.post('/api/normalize-numbers', {
             file_id: fileId,
             direction,
-            columns
+            columns,
+            ...options
         });
     }
 
@@ -131,8 +155,31 @@ export class ApiClient {
         });
     }
 
+    async replaceMany(
+        fileId: string,
+        replacements: Record<string, string> | { fileId: string; searchColumn?: string; replaceColumn?: string },
+        columns?: string[] | null,
+        mode: ReplaceMode = 'substring',
+        caseSensitive: boolean = false
+    ) {
+        const table = 'fileId' in replacements && typeof replacements.fileId === 'string'
+            ? {
+                replacements_file_id: replacements.fileId,
+                search_column: replacements.searchColumn,
+                replace_column: replacements.replaceColumn
+            }
+            : { replacements };
+        return this.post('/api/search-replace', {
+            file_id: fileId,
+            ...table,
+            columns,
+            mode,
+            case_sensitive: caseSensitive
+        });
+    }
+
     // ============= Feature 8: Type Conversion =============
-    async convertTypes(fileId: string, conversions: Array<{ column: string; target_type: string }>) {
+    async convertTypes(fileId: string, conversions: Array<{ column: string; target_type: string }>, compact = true) {
         const conversionMap: Record<string, string> = {};
         conversions.forEach(c => {
             conversionMap[c.column] = c.target_type;
@@ -140,7 +187,8 @@ export class ApiClient {
 
         return this.post('/api/convert-types', {
             file_id: fileId,
-            conversions: conversionMap
+            conversions: conversionMap,
+            compact
         });
     }
 
@@ -153,6 +201,13 @@ export class ApiClient {
         });
     }
 
+    async addCalculatedColumns(fileId: string, columns: CalculatedColumnDefinition[]) {
+        return this.post('/api/calculated-column', {
+            file_id: fileId,
+            columns
+        });
+    }
+
     // ============= Feature 10: Split Data =============
     async splitData(fileId: string, method: string, splitColumn?: string, rowsPerFile?: number) {
         return this.post('/api/split', {
@@ -163,6 +218,34 @@ export class ApiClient {
         });
     }
 
+    // All parts of a split as one ZIP archive instead of separate file_ids
+    async splitDataZip(fileId: string, method: string, splitColumn?: string, rowsPerFile?: number): Promise<Blob> {
+        const response = await fetch(`${this.baseURL}/api/split/zip`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                file_id: fileId,
+                method,
+                column: splitColumn,
+                row_count: rowsPerFile
+            }),
+        });
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => ({ detail: 'Unknown error' }));
+            throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+        }
+        return response.blob();
+    }
+
+    // ============= Pipeline =============
+    // Runs several operations with one load and one save instead of chaining the endpoints above
+    async runPipeline(fileId: string, steps: PipelineStep[]): Promise<PipelineResponse> {
+        return this.post('/api/pipeline', {
+            file_id: fileId,
+            steps
+        });
+    }
+
     // Download file (for future use)
     getDownloadUrl(fileId: string): string {
         return `${this.baseURL}/api/download/${fileId}`;
@@ -5,6 +5,8 @@ export interface FileResponse {
     file_id: string;
     message?: string;
     filename?: string;
+    sha256?: string | null;
+    column_types?: Record<string, string> | null;
 }
 
 export interface FileMetadata {
@@ -16,7 +18,11 @@ export interface FileMetadata {
 export interface PreviewResponse {
     file_id: string;
     columns: string[];
+    dtypes: Record<string, string>;
+    sheets: string[];
     data: Record<string, any>[];
+    values?: any[][] | null;
+    offset?: number;
     total_rows: number;
     preview_rows: number;
 }
@@ -51,20 +57,28 @@ export enum SplitMethod {
 // ============= Feature 1: File Merge =============
 export interface FileMergeRequest {
     file_ids: string[];
+    columns?: 'union' | 'intersect';
+    dtype_reconciliation?: 'common' | 'string';
 }
 
 export interface FileMergeResponse {
     file_id: string;
     files_merged: number;
     total_rows: number;
+    reconciled_columns: string[];
     message: string;
 }
 
 // ============= Feature 2: Deduplicate & Merge =============
+export type AggregationFunction =
+    | 'sum' | 'min' | 'max' | 'mean' | 'count'
+    | 'first' | 'last' | 'concat_unique' | 'mode';
+
 export interface DeduplicateMergeRequest {
-    file_ids: string[];
-    key_column: string;
-    value_columns: string[];
+    file_id: string;
+    duplicate_columns: string[];
+    // Per column; others are summed if numeric, else take the first value
+    aggregations?: Record<string, AggregationFunction>;
 }
 
 export interface DeduplicateMergeResponse {
@@ -76,10 +90,19 @@ export interface DeduplicateMergeResponse {
 }
 
 // ============= Feature 3: Sort Data =============
+export interface SortKey {
+    column: string;
+    order?: SortOrder;
+    nulls?: 'first' | 'last';
+}
+
 export interface SortDataRequest {
     file_id: string;
-    column: string;
-    order: SortOrder;
+    column?: string;
+    order?: SortOrder;
+    // Most significant first; replaces column and order
+    keys?: SortKey[];
+    collation?: 'binary' | 'persian';
 }
 
 export interface SortDataResponse {
@@ -90,15 +113,22 @@ export interface SortDataResponse {
 }
 
 // ============= Feature 4: Number Normalization =============
+export type ZwnjHandling = 'keep' | 'tidy' | 'remove';
+
 export interface NumberNormalizationRequest {
     file_id: string;
     columns?: string[] | null;
     direction: NormalizationDirection;
+    normalize_letters?: boolean;  // Arabic yeh/kaf -> Persian
+    zwnj?: ZwnjHandling;
+    parse_numbers?: boolean;  // persian_to_english only
 }
 
 export interface NumberNormalizationResponse {
     file_id: string;
     columns_processed: number;
+    skipped_columns: string[];
+    parsed_columns: string[];
     message: string;
 }
 
@@ -144,17 +174,27 @@ export interface ColumnManagementResponse {
 }
 
 // ============= Feature 7: Search & Replace =============
+export type ReplaceMode = 'substring' | 'regex' | 'exact';
+
 export interface SearchReplaceRequest {
     file_id: string;
     columns?: string[] | null;
-    search_text: string;
-    replace_text: string;
+    // One of search_text, replacements or replacements_file_id
+    search_text?: string;
+    replace_text?: string;
+    replacements?: Record<string, string>;
+    replacements_file_id?: string;
+    search_column?: string;
+    replace_column?: string;
+    mode?: ReplaceMode;
     case_sensitive: boolean;
 }
 
 export interface SearchReplaceResponse {
     file_id: string;
     replacements_made: number;
+    column_counts: Record<string, number>;
+    skipped_columns: string[];
     message: string;
 }
 
@@ -167,24 +207,41 @@ export interface ColumnTypeConversion {
 export interface TypeConversionRequest {
     file_id: string;
     conversions: ColumnTypeConversion[];
+    compact?: boolean;
+}
+
+export interface ColumnConversionReport {
+    data_type: string;
+    dtype: string;
+    failures: number;
+    bad_values: string[];
 }
 
 export interface TypeConversionResponse {
     file_id: string;
-    conversions_applied: number;
+    columns_converted: number;
+    columns: Record<string, ColumnConversionReport>;
+    failures: number;
     message: string;
 }
 
 // ============= Feature 9: Calculated Columns =============
-export interface CalculatedColumnRequest {
-    file_id: string;
+export interface CalculatedColumnDefinition {
     new_column_name: string;
     formula: string;
 }
 
+export interface CalculatedColumnRequest {
+    file_id: string;
+    new_column_name?: string;
+    formula?: string;
+    columns?: CalculatedColumnDefinition[];  // formulas may use other new columns
+}
+
 export interface CalculatedColumnResponse {
     file_id: string;
     new_column: string;
+    new_columns: string[];
     message: string;
 }
 
@@ -198,7 +255,43 @@ export interface SplitDataRequest {
 
 export interface SplitDataResponse {
     file_ids: string[];
+    labels: string[];
     files_created: number;
     message: string;
 }
 
+
+// ============= Pipeline =============
+// Each step carries its endpoint's request fields (without file_id)
+export type PipelineStep = (
+    | ({ operation: 'filter' } & Omit<DataFilteringRequest, 'file_id'>)
+    | ({ operation: 'sort' } & Omit<SortDataRequest, 'file_id'>)
+    | ({ operation: 'rename_columns' } & Omit<RenameColumnsRequest, 'file_id'>)
+    | ({ operation: 'delete_columns' } & Omit<DeleteColumnsRequest, 'file_id'>)
+    | ({ operation: 'reorder_columns' } & Omit<ReorderColumnsRequest, 'file_id'>)
+    | ({ operation: 'search_replace' } & Omit<SearchReplaceRequest, 'file_id'>)
+    | { operation: 'convert_types'; conversions: Record<string, string> }
+    | ({ operation: 'calculated_column' } & Omit<CalculatedColumnRequest, 'file_id'>)
+    | ({ operation: 'normalize_numbers' } & Omit<NumberNormalizationRequest, 'file_id'>)
+    | ({ operation: 'deduplicate_merge' } & Omit<DeduplicateMergeRequest, 'file_id'>)
+) & { save?: boolean };
+
+export interface PipelineRequest {
+    file_id: string;
+    steps: PipelineStep[];
+}
+
+export interface PipelineStepResult {
+    operation: string;
+    rows: number;
+    columns: number;
+    file_id: string | null;
+}
+
+export interface PipelineResponse {
+    file_id: string;
+    original_rows: number;
+    final_rows: number;
+    steps: PipelineStepResult[];
+    message: string;
+}